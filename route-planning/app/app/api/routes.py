@@ -8,7 +8,9 @@ from datetime import datetime
 from app.schemas.route import (
     RouteRequestSchema, RouteResponseSchema, RouteListSchema,
     RouteStatisticsSchema, ObstacleSchema, BoatProfileSchema,
-    ErrorResponseSchema
+    ErrorResponseSchema, BatchRouteRequestSchema, BatchRouteResponseSchema,
+    CourseRequestSchema, CourseResponseSchema, FleetRouteRequestSchema, FleetRouteResponseSchema,
+    DepartureSweepRequestSchema, DepartureSweepResponseSchema, RerouteRequestSchema, RerouteResponseSchema
 )
 from app.schemas.weather import WeatherRequestSchema, WeatherDataSchema
 from app.services.route_service import RouteService
@@ -50,6 +52,8 @@ async def calculate_route(
 
         return route
 
+    except HTTPException:
+        raise
     except asyncio.TimeoutError:
         raise HTTPException(
             status_code=status.HTTP_408_REQUEST_TIMEOUT,
@@ -67,6 +71,128 @@ async def calculate_route(
         )
 
 
+@router.post("/routes/calculate/batch",
+             response_model=BatchRouteResponseSchema,
+             status_code=status.HTTP_201_CREATED,
+             summary="Oblicz wiele tras naraz",
+             description="Oblicza trasy dla wielu par start-meta na jednym wspólnym grafie obszaru")
+async def calculate_routes_batch(
+        batch_request: BatchRouteRequestSchema,
+        route_service: RouteService = Depends(get_route_service)
+):
+    """Oblicza trasy dla całej floty lub wielu pozycji na linii startu"""
+    try:
+        for point in list(batch_request.starts) + list(batch_request.ends):
+            validate_coordinates(point.lat, point.lon)
+
+        return await route_service.calculate_routes_batch(batch_request)
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Błąd obliczania tras: {str(e)}"
+        )
+
+
+@router.post("/routes/calculate/fleet",
+             response_model=FleetRouteResponseSchema,
+             status_code=status.HTTP_201_CREATED,
+             summary="Porównaj łodzie na trasie",
+             description="Oblicza trasę odcinka dla kilku profili łodzi na wspólnej siatce i topologii grafu")
+async def calculate_fleet_routes(
+        fleet_request: FleetRouteRequestSchema,
+        route_service: RouteService = Depends(get_route_service)
+):
+    """Porównuje czasy przejścia kilku łodzi na tym samym odcinku"""
+    try:
+        validate_coordinates(fleet_request.start.lat, fleet_request.start.lon)
+        validate_coordinates(fleet_request.end.lat, fleet_request.end.lon)
+
+        return await route_service.calculate_fleet_routes(fleet_request)
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Błąd obliczania tras: {str(e)}"
+        )
+
+
+@router.post("/routes/calculate/departures",
+             response_model=DepartureSweepResponseSchema,
+             status_code=status.HTTP_201_CREATED,
+             summary="Wybierz chwilę wypłynięcia",
+             description="Oblicza czas przejścia odcinka dla kolejnych chwil wypłynięcia w oknie czasowym "
+                         "(wiatr z prognozy) na jednym grafie i zwraca najszybszą trasę")
+async def calculate_departure_sweep(
+        sweep_request: DepartureSweepRequestSchema,
+        route_service: RouteService = Depends(get_route_service)
+):
+    """Porównuje czasy dotarcia dla chwil wypłynięcia w oknie"""
+    try:
+        validate_coordinates(sweep_request.start.lat, sweep_request.start.lon)
+        validate_coordinates(sweep_request.end.lat, sweep_request.end.lon)
+
+        return await route_service.calculate_departure_sweep(sweep_request)
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Błąd obliczania tras: {str(e)}"
+        )
+
+
+@router.post("/routes/calculate/course",
+             response_model=CourseResponseSchema,
+             status_code=status.HTTP_201_CREATED,
+             summary="Oblicz trasę regatową",
+             description="Oblicza trasę przez kolejne znaki kursu (z zadaną stroną opływania) "
+                         "na jednym wspólnym grafie obszaru")
+async def calculate_course(
+        course_request: CourseRequestSchema,
+        route_service: RouteService = Depends(get_route_service)
+):
+    """Oblicza trasę regatową z czasami poszczególnych odcinków"""
+    try:
+        for mark in course_request.marks:
+            validate_coordinates(mark.lat, mark.lon)
+
+        return await route_service.calculate_course(course_request)
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Błąd obliczania trasy: {str(e)}"
+        )
+
+
 @router.get("/routes",
             response_model=RouteListSchema,
             summary="Pobierz listę tras",
@@ -123,6 +249,37 @@ async def delete_route(
         )
 
 
+@router.post("/routes/{route_id}/reroute",
+             response_model=RerouteResponseSchema,
+             summary="Przelicz aktywną trasę",
+             description="Poprawia trasę obliczoną z keep_search_state po zmianie wiatru lub pozycji łodzi "
+                         "(D* Lite na zachowanym stanie wyszukiwania zamiast obliczenia od nowa)")
+async def reroute(
+        route_id: UUID,
+        reroute_request: RerouteRequestSchema,
+        route_service: RouteService = Depends(get_route_service)
+):
+    """Przelicza trasę od bieżącej pozycji łodzi z aktualnym wiatrem"""
+    try:
+        if reroute_request.position is not None:
+            validate_coordinates(reroute_request.position.lat, reroute_request.position.lon)
+
+        return await route_service.reroute(route_id, reroute_request)
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Błąd przeliczania trasy: {str(e)}"
+        )
+
+
 @router.get("/routes/{route_id}/gpx",
             summary="Eksportuj trasę do GPX",
             description="Eksportuje trasę do formatu GPX")
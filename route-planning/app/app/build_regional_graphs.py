@@ -0,0 +1,78 @@
+"""Krok budowania grafów regionalnych mapowanych przez procesy robocze
+
+Dla każdego regionu z settings.REGIONAL_GRAPH_REGIONS pobiera przeszkody
+z bazy, buduje graf nawigacyjny (węzły, CSR sąsiedztwa, długości i kursy
+krawędzi) i zapisuje go do settings.REGIONAL_GRAPH_DIR.
+Procesy robocze mapują te pliki tylko do odczytu. Plik pasujący do bieżącej
+wersji przeszkód zastępuje budowę grafu w procesie, więc krok należy powtórzyć
+po każdej zmianie przeszkód w bazie.
+
+Uruchomienie (z katalogu route-planning/app), przed startem serwera:
+    python -m app.build_regional_graphs [region ...]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from typing import List
+
+from app.core.config import settings
+from app.core.obstacles import ObstacleIndex
+from app.core.regional_graph import RegionalGraph, RegionalGraphCache, regional_graph_path
+from app.db.crud import ObstacleCRUD
+from app.db.session import async_session, engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def load_obstacles(bounds: dict) -> ObstacleIndex:
+    """Przeszkody regionu z bazy - te same, które pobiera serwis dla zapytań o graf regionalny"""
+    try:
+        async with async_session() as session:
+            obstacles = await ObstacleCRUD(session).get_obstacles_in_area(
+                north=bounds["north"], south=bounds["south"], east=bounds["east"], west=bounds["west"]
+            )
+        return ObstacleIndex(obstacles)
+    except Exception as e:
+        # Serwis bez bazy działa bez przeszkód - graf bez przeszkód pasuje do takich zapytań
+        logger.warning(f"Nie udało się pobrać przeszkód z bazy ({e}) - graf bez przeszkód")
+        return ObstacleIndex([])
+
+
+def build_region(name: str, bounds: dict, obstacle_index: ObstacleIndex, directory: str) -> str:
+    """Buduje graf regionu i zapisuje go; zwraca ścieżkę pliku"""
+    t0 = time.time()
+    graph = RegionalGraph.build(RegionalGraphCache.make_key(bounds, obstacle_index), obstacle_index)
+    path = regional_graph_path(name, directory)
+    graph.save(path)
+    logger.info(
+        f"Region {name}: {graph.graph.num_nodes} węzłów, {graph.graph.num_edges} krawędzi, "
+        f"{os.path.getsize(path) / 2 ** 20:.1f} MB, "
+        f"{time.time() - t0:.1f} s -> {path}"
+    )
+    return path
+
+
+async def main(names: List[str], directory: str):
+    regions = settings.REGIONAL_GRAPH_REGIONS
+    unknown = [name for name in names if name not in regions]
+    if unknown:
+        raise SystemExit(f"Nieznane regiony: {', '.join(unknown)} (dostępne: {', '.join(regions)})")
+
+    os.makedirs(directory, exist_ok=True)
+    try:
+        for name in names or list(regions):
+            obstacle_index = await load_obstacles(regions[name])
+            build_region(name, regions[name], obstacle_index, directory)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Buduje pliki grafów regionalnych")
+    parser.add_argument("regions", nargs="*", help="Regiony z REGIONAL_GRAPH_REGIONS (domyślnie wszystkie)")
+    parser.add_argument("--directory", default=settings.REGIONAL_GRAPH_DIR, help="Katalog plików grafów")
+    arguments = parser.parse_args()
+    asyncio.run(main(arguments.regions, arguments.directory))
@@ -49,6 +49,50 @@ class Settings(BaseSettings):
     DEFAULT_GRID_RESOLUTION_NM: float = 0.5
     DEFAULT_CORRIDOR_MARGIN_NM: float = 2.0
     MAX_ROUTE_CALCULATION_TIME: int = 30  # seconds
+    ANYTIME_REFINEMENT_LEVELS: int = 3  # coarse-to-fine grid levels (1 - requested resolution only)
+    ANYTIME_BUDGET_FRACTION: float = 0.8  # share of the time limit planned for refinement
+    WIND_SAMPLES_PER_EDGE: int = 3  # wind samples along each graph edge
+    GRID_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # memory cap of the route grid cache
+    GRID_CACHE_QUANTUM_DEG: float = 0.001  # start/end quantization for grid cache keys
+
+    # Alternative routes (penalty method)
+    ALTERNATIVE_PENALTY: float = 0.5  # cost increase of edges into nodes of the previous route
+    ALTERNATIVE_MAX_OVERLAP: float = 0.7  # max share of time shared with an accepted route
+    ALTERNATIVE_MAX_STRETCH: float = 0.25  # max time increase over the optimal route
+
+    # Time-dependent routing (wind forecast)
+    FORECAST_HOURS: int = 48  # forecast horizon fetched for time-dependent routing
+    ISOCHRONE_STEP_HOURS: float = 0.5  # isochrone width used to prune dominated nodes
+    ISOCHRONE_SECTOR_DEG: float = 0.0  # default bearing sector of isochrone pruning (0 - no pruning, exact search)
+    DEPARTURE_SWEEP_MAX_DEPARTURES: int = 97  # max departure times evaluated in one sweep request
+
+    # A* heuristic
+    ALT_LANDMARKS: int = 8  # ALT landmarks compared in bench_heuristic / bench_bidirectional
+
+    # Regional graph (grid_mode "regional", graph file shared by workers)
+    REGIONAL_GRAPH_RESOLUTION_NM: float = 0.5  # hex lattice spacing of the regional sea graph
+    REGIONAL_GRAPH_CONNECTION_NM: float = 2.5  # edge radius of the regional graph (start/finish attach radius too)
+    REGIONAL_GRAPH_CACHE_SIZE: int = 1  # regional graphs built in a worker (topology) kept per worker
+    REGIONAL_WEIGHTS_CACHE_SIZE: int = 4  # edge travel time sets (weather x boat) kept per graph
+
+    # Incremental rerouting of active routes (D* Lite, POST /routes/{id}/reroute)
+    REROUTE_STATE_MAX_BYTES: int = 256 * 1024 * 1024  # memory cap of kept search states (least recently used evicted)
+    REROUTE_STATE_TTL_SECONDS: int = 6 * 3600  # search state unused for longer is dropped
+    REROUTE_MAX_CHANGED_FRACTION: float = 0.3  # share of changed edges above which the search restarts
+
+    # Batch route calculation
+    BATCH_MAX_ROUTES: int = 200  # max start/end pairs in one batch request
+
+    # Fleet comparison
+    FLEET_MAX_BOATS: int = 20  # max boat profiles compared in one request
+
+    # Regatta courses
+    COURSE_MAX_MARKS: int = 30  # max marks (start and finish included) in one course
+    MARK_ROUNDING_RADIUS_NM: float = 0.1  # distance of rounding points from a mark
+
+    # Compute pool settings (CPU-bound route calculation)
+    COMPUTE_POOL_WORKERS: int = 2  # worker processes (0 - run in a thread of the API process)
+    COMPUTE_POOL_MAX_PENDING: int = 8  # queued + running calculations before rejecting with 503
 
     # Geographical bounds for Gdansk Bay
     GDANSK_BAY_BOUNDS: dict = {
@@ -58,6 +102,10 @@ class Settings(BaseSettings):
         "west": 18.3
     }
 
+    # Persisted regional graphs (python -m app.build_regional_graphs)
+    REGIONAL_GRAPH_DIR: str = "data/regional_graphs"  # memory-mapped regional graph files shared by workers
+    REGIONAL_GRAPH_REGIONS: dict = {"gdansk_bay": GDANSK_BAY_BOUNDS}  # regions precomputed by the build step
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,389 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from app.core.graph import CSRGraph, NoPathError, SearchResult
+from app.utils.geodesy import LocalProjection
+
+# Największa część grafu numerowana bez dalszego podziału
+DISSECTION_LEAF_SIZE = 32
+
+
+def nested_dissection_order(graph: CSRGraph, leaf_size: int = DISSECTION_LEAF_SIZE) -> np.ndarray:
+    """Kolejność kontrakcji węzłów z rekurencyjnego podziału geometrycznego (nested dissection)
+
+    Część grafu dzielona jest w medianie dłuższej osi lokalnego odwzorowania
+    metrycznego. Separatorem jest mniejszy z brzegów obu połówek (węzły mające
+    sąsiada po drugiej stronie) - po jego usunięciu połówki nie są połączone.
+    Połówki numerowane są rekurencyjnie, a separator dostaje najwyższe numery.
+    Zwraca węzły w kolejności kontrakcji.
+    """
+    projection = LocalProjection.around(graph.lons, graph.lats)
+    xy = np.column_stack(projection.to_xy(graph.lons, graph.lats))
+    side = np.zeros(graph.num_nodes, dtype=np.int8)  # 0 - poza częścią, 1/2 - połówka części
+    order: List[np.ndarray] = []
+
+    # Stos części do podziału; separatory odkładane są po obu połówkach
+    stack: List[Tuple[bool, np.ndarray]] = [(False, np.arange(graph.num_nodes, dtype=np.int64))]
+    while stack:
+        is_separator, nodes = stack.pop()
+        if is_separator or len(nodes) <= leaf_size:
+            order.append(nodes)
+            continue
+
+        extent = xy[nodes].max(axis=0) - xy[nodes].min(axis=0)
+        coords = xy[nodes, int(np.argmax(extent))]
+        left = coords <= np.median(coords)
+        if left.all():
+            order.append(nodes)
+            continue
+
+        side[nodes] = np.where(left, 1, 2)
+        starts, ends = graph.indptr[nodes], graph.indptr[nodes + 1]
+        sources = np.repeat(nodes, ends - starts)
+        targets = graph.indices[csr_ranges(starts, ends)]
+        crossing = (side[targets] != 0) & (side[targets] != side[sources])
+        boundary = np.zeros(graph.num_nodes, dtype=bool)
+        boundary[sources[crossing]] = True
+        side[nodes] = 0
+
+        left_boundary = boundary[nodes] & left
+        right_boundary = boundary[nodes] & ~left
+        separator = left_boundary if left_boundary.sum() <= right_boundary.sum() else right_boundary
+        # Kolejność na stosie: lewa połówka, prawa, separator (numerowany na końcu)
+        stack.append((True, nodes[separator]))
+        stack.append((False, nodes[~left & ~separator]))
+        stack.append((False, nodes[left & ~separator]))
+
+    return np.concatenate(order) if order else np.empty(0, dtype=np.int64)
+
+
+def csr_ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Konkatenacja zakresów starts[k]:ends[k] bez pętli"""
+    lengths = ends - starts
+    if lengths.sum() == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    return np.arange(lengths.sum(), dtype=np.int64) + offsets
+
+
+@dataclass
+class ContractionHierarchy:
+    """Hierarchia kontrakcji niezależna od wag krawędzi (customizable contraction hierarchy)
+
+    Węzły są numerowane rangami (rank) według kolejności nested dissection,
+    a graf jest kontraktowany symbolicznie: sąsiedzi węzła o wyższych rangach
+    tworzą klikę (skróty). Łuk a = (niższy, wyższy) ma sąsiadów wyższych
+    zapisanych w CSR up_indptr/up_indices (rangi, rosnąco). Trójkąty
+    (a, b, c) - łuki (x, u), (x, v), (u, v) dla x < u < v - są pogrupowane
+    według poziomu węzła x w drzewie eliminacji i posortowane według c, więc
+    kastomizacja jednego poziomu to kilka operacji numpy.
+
+    Struktura zależy tylko od topologii grafu (siatka i przeszkody); wagi
+    przypisuje customize() - wiele razy, dla kolejnych prognoz i łodzi.
+    """
+    order: np.ndarray  # Węzły grafu w kolejności rang
+    rank: np.ndarray  # Ranga każdego węzła grafu
+    up_indptr: np.ndarray  # CSR łuków według niższego końca (rangi)
+    up_indices: np.ndarray  # Wyższy koniec łuku (ranga)
+    parent: np.ndarray  # Rodzic w drzewie eliminacji (ranga, -1 dla korzeni)
+    down_indptr: np.ndarray  # CSR łuków według wyższego końca (rangi)
+    down_indices: np.ndarray  # Niższy koniec łuku (ranga), rosnąco
+    down_arcs: np.ndarray  # Numer łuku dla kolejnych pozycji down_indices
+    input_arcs: np.ndarray  # Łuk hierarchii dla każdej krawędzi skierowanej grafu wejściowego
+    input_up: np.ndarray  # True - krawędź wejściowa biegnie w górę (od niższej rangi)
+    triangle_a: np.ndarray
+    triangle_b: np.ndarray
+    triangle_c: np.ndarray  # Trójkąty w kolejności poziomów, w poziomie według c
+    level_bounds: np.ndarray  # Granice poziomów w tablicach trójkątów
+    group_starts: np.ndarray  # Początki grup trójkątów o tym samym c (dla minimum.reduceat)
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.order)
+
+    @property
+    def num_arcs(self) -> int:
+        return len(self.up_indices)
+
+    @property
+    def num_triangles(self) -> int:
+        return len(self.triangle_c)
+
+    @classmethod
+    def build(cls, graph: CSRGraph, order: Optional[np.ndarray] = None,
+              max_triangles: Optional[int] = None) -> "ContractionHierarchy":
+        """Kontrakcja symboliczna grafu (domyślnie w kolejności nested dissection)
+
+        Przy max_triangles graf, którego kontrakcja dałaby więcej trójkątów
+        (zbyt gęsty graf), jest odrzucany wyjątkiem ValueError przed ich wyznaczeniem.
+        """
+        n = graph.num_nodes
+        order = nested_dissection_order(graph) if order is None else np.asarray(order, dtype=np.int64)
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = np.arange(n)
+
+        # Sąsiedzi wyższych rang w grafie wejściowym, w przestrzeni rang
+        src = rank[np.repeat(np.arange(n), np.diff(graph.indptr))]
+        dst = rank[graph.indices]
+        upward = src < dst
+        sorting = np.argsort(src[upward], kind="stable")
+        up_src, up_dst = src[upward][sorting], dst[upward][sorting]
+        bounds = np.searchsorted(up_src, np.arange(n + 1))
+        pending: List[List[np.ndarray]] = [[up_dst[bounds[x]:bounds[x + 1]]] for x in range(n)]
+
+        # Gra eliminacji: wyżsi sąsiedzi węzła (bez rodzica) dołączają do wyższych sąsiadów rodzica
+        upper: List[np.ndarray] = []
+        parent = np.full(n, -1, dtype=np.int64)
+        for x in range(n):
+            neighbours = np.unique(np.concatenate(pending[x]))
+            pending[x] = None
+            upper.append(neighbours)
+            if len(neighbours):
+                parent[x] = neighbours[0]
+                pending[neighbours[0]].append(neighbours[1:])
+
+        degrees = np.array([len(u) for u in upper], dtype=np.int64)
+        triangles = int((degrees * (degrees - 1) // 2).sum())
+        if max_triangles is not None and triangles > max_triangles:
+            raise ValueError(f"Kontrakcja grafu daje {triangles} trójkątów (limit {max_triangles}) - graf jest zbyt gęsty")
+
+        up_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(degrees, out=up_indptr[1:])
+        up_indices = np.concatenate(upper) if n else np.empty(0, dtype=np.int64)
+        arc_low = np.repeat(np.arange(n, dtype=np.int64), degrees)
+
+        # Łuki według wyższego końca (niższe końce rosnąco)
+        by_high = np.lexsort((arc_low, up_indices))
+        down_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(up_indices, minlength=n), out=down_indptr[1:])
+
+        hierarchy = cls(
+            order=order, rank=rank, up_indptr=up_indptr, up_indices=up_indices, parent=parent,
+            down_indptr=down_indptr, down_indices=arc_low[by_high], down_arcs=by_high,
+            input_arcs=np.empty(0, dtype=np.int64), input_up=upward,
+            triangle_a=np.empty(triangles, dtype=np.int32), triangle_b=np.empty(triangles, dtype=np.int32),
+            triangle_c=np.empty(triangles, dtype=np.int32), level_bounds=np.zeros(1, dtype=np.int64),
+            group_starts=np.empty(0, dtype=np.int64)
+        )
+        hierarchy.input_arcs = hierarchy.arc_ids(np.minimum(src, dst), np.maximum(src, dst))
+        hierarchy._enumerate_triangles(degrees)
+        return hierarchy
+
+    def arc_ids(self, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+        """Numery łuków (low, high) podanych w rangach (łuki muszą istnieć)"""
+        return np.searchsorted(self._arc_keys(), np.asarray(low) * self.num_nodes + np.asarray(high))
+
+    def _arc_keys(self) -> np.ndarray:
+        """Klucze low * n + high łuków - rosnące, bo łuki są posortowane według (low, high)"""
+        return np.repeat(np.arange(self.num_nodes, dtype=np.int64), np.diff(self.up_indptr)) * self.num_nodes \
+            + self.up_indices
+
+    def _enumerate_triangles(self, degrees: np.ndarray):
+        """Wypełnia tablice trójkątów dolnych łuków, pogrupowane według poziomów drzewa eliminacji
+
+        Poziom węzła to 0 bez niższych sąsiadów, a inaczej 1 + największy poziom
+        niższego sąsiada. Trójkąty węzła x czytają tylko łuki o niższym końcu x,
+        poprawiane wyłącznie przez trójkąty niższych poziomów.
+        """
+        n = self.num_nodes
+        level = np.zeros(n, dtype=np.int64)
+        for x in range(n):
+            start, end = self.up_indptr[x], self.up_indptr[x + 1]
+            if end > start:
+                targets = self.up_indices[start:end]
+                level[targets] = np.maximum(level[targets], level[x] + 1)
+
+        keys = self._arc_keys()
+        nodes = np.flatnonzero(degrees >= 2)
+        nodes = nodes[np.argsort(level[nodes], kind="stable")]
+        counts = degrees[nodes] * (degrees[nodes] - 1) // 2
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        node_levels = np.searchsorted(level[nodes], np.arange(level.max() + 2 if n else 1))
+        self.level_bounds = offsets[node_levels]
+
+        for position, x in enumerate(nodes.tolist()):
+            start, end = int(self.up_indptr[x]), int(self.up_indptr[x + 1])
+            i, j = np.triu_indices(end - start, k=1)
+            neighbours = self.up_indices[start:end]
+            part = slice(offsets[position], offsets[position + 1])
+            self.triangle_a[part] = start + i
+            self.triangle_b[part] = start + j
+            self.triangle_c[part] = np.searchsorted(keys, neighbours[i] * n + neighbours[j])
+
+        # W poziomie trójkąty posortowane według poprawianego łuku c
+        for lvl in range(len(self.level_bounds) - 1):
+            part = slice(self.level_bounds[lvl], self.level_bounds[lvl + 1])
+            sorting = np.argsort(self.triangle_c[part], kind="stable")
+            for values in (self.triangle_a, self.triangle_b, self.triangle_c):
+                values[part] = values[part][sorting]
+
+        new_group = np.ones(self.num_triangles, dtype=bool)
+        new_group[1:] = self.triangle_c[1:] != self.triangle_c[:-1]
+        new_group[self.level_bounds[:-1][self.level_bounds[:-1] < self.num_triangles]] = True
+        self.group_starts = np.flatnonzero(new_group).astype(np.int32)
+
+    def customize(self, times: np.ndarray) -> "CustomizedHierarchy":
+        """Przypisuje wagi łukom: times to czasy krawędzi skierowanych grafu wejściowego (CSRGraph.times)
+
+        Najpierw łuki dostają wagi krawędzi wejściowych (skróty - nieskończoność),
+        potem poziom po poziomie drzewa eliminacji każdy trójkąt (x, u, v)
+        poprawia wagi łuku (u, v) w obu kierunkach przez węzeł x.
+        """
+        times = np.asarray(times, dtype=float)
+        up = np.full(self.num_arcs, np.inf)
+        down = np.full(self.num_arcs, np.inf)
+        up[self.input_arcs[self.input_up]] = times[self.input_up]
+        down[self.input_arcs[~self.input_up]] = times[~self.input_up]
+        original_up, original_down = up.copy(), down.copy()
+
+        group_bounds = np.searchsorted(self.group_starts, self.level_bounds)
+        for level in range(len(self.level_bounds) - 1):
+            start, end = self.level_bounds[level], self.level_bounds[level + 1]
+            if start == end:
+                continue
+            a, b = self.triangle_a[start:end], self.triangle_b[start:end]
+            groups = self.group_starts[group_bounds[level]:group_bounds[level + 1]] - start
+            targets = self.triangle_c[start:end][groups]
+            # u -> x -> v oraz v -> x -> u
+            up[targets] = np.minimum(up[targets], np.minimum.reduceat(down[a] + up[b], groups))
+            down[targets] = np.minimum(down[targets], np.minimum.reduceat(down[b] + up[a], groups))
+
+        return CustomizedHierarchy(self, up, down, original_up, original_down)
+
+
+@dataclass
+class CustomizedHierarchy:
+    """Hierarchia kontrakcji z wagami łuków w obu kierunkach (wynik customize)
+
+    up[a] to czas przejścia łuku a od niższej rangi do wyższej, down[a] - odwrotnie.
+    Zapytanie przeszukuje w górę przodków startu i mety w drzewie eliminacji
+    (wszyscy wyżsi sąsiedzi węzła są jego przodkami) i łączy obie połówki
+    we wspólnym przodku o najmniejszej sumie etykiet.
+    """
+    hierarchy: ContractionHierarchy
+    up: np.ndarray
+    down: np.ndarray
+    original_up: np.ndarray  # Wagi krawędzi wejściowych (nieskończoność dla skrótów)
+    original_down: np.ndarray
+
+    def query(self, source: int, target: int) -> SearchResult:
+        """Najszybsza ścieżka source -> target (węzły grafu wejściowego)"""
+        return self.query_between([source], [0.0], [target], [0.0])
+
+    def query_between(self, sources: List[int], source_costs: List[float],
+                      targets: List[int], target_costs: List[float]) -> SearchResult:
+        """Najszybsza ścieżka z dowolnego źródła do dowolnego celu
+
+        source_costs i target_costs to koszty dojścia do źródeł i dalej od
+        celów (np. czasy odcinków od punktu startu do kilku pobliskich węzłów),
+        wliczane do kosztu ścieżki. Ścieżka zawiera węzły grafu od wybranego
+        źródła do wybranego celu.
+        """
+        h = self.hierarchy
+        forward_chain, forward, forward_pred = self._upward_search(h.rank[sources], source_costs, self.up)
+        backward_chain, backward, backward_pred = self._upward_search(h.rank[targets], target_costs, self.down)
+
+        # Spotkanie we wspólnym przodku źródła i celu
+        _, in_forward, in_backward = np.intersect1d(
+            forward_chain, backward_chain, assume_unique=True, return_indices=True
+        )
+        totals = forward[in_forward] + backward[in_backward]
+        best = int(np.argmin(totals)) if len(totals) else 0
+        if not len(totals) or not np.isfinite(totals[best]):
+            raise NoPathError(f"Węzły {list(targets)} nie są osiągalne z {list(sources)}")
+
+        # Łuki od źródła do węzła spotkania (w górę) i od węzła spotkania do celu (w dół)
+        forward_arcs, origin = self._trace(forward_chain, forward_pred, int(in_forward[best]))
+        backward_arcs, _ = self._trace(backward_chain, backward_pred, int(in_backward[best]))
+        path = [origin]
+        for arc in forward_arcs[::-1]:
+            path.extend(self._unpack(arc, True))
+        for arc in backward_arcs:
+            path.extend(self._unpack(arc, False))
+
+        return SearchResult(
+            path=[int(h.order[r]) for r in path],
+            cost=float(totals[best]),
+            nodes_expanded=len(forward_chain) + len(backward_chain)
+        )
+
+    def _upward_search(self, origins: np.ndarray, costs: List[float],
+                       weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Przeszukanie przodków origins (rangi) w drzewie eliminacji: przodkowie, ich etykiety i poprzednicy
+
+        Wyżsi sąsiedzi węzła są jego przodkami, więc łuki wychodzące z przodków
+        tworzą mały graf skierowany, przeszukiwany Dijkstrą ze scipy z dodatkowego
+        wspólnego źródła (połączonego z origins kosztami dojścia). Poprzednicy są
+        pozycjami w tablicy przodków (poza nią - źródło lub brak).
+        """
+        h = self.hierarchy
+        ancestors = set()
+        for node in np.asarray(origins).tolist():
+            while node != -1 and node not in ancestors:
+                ancestors.add(node)
+                node = int(h.parent[node])
+        chain = np.array(sorted(ancestors), dtype=np.int64)
+        size = len(chain)
+
+        # Łuki przodków w CSR o węzłach numerowanych pozycjami, wiersz size - wspólne źródło
+        starts, ends = h.up_indptr[chain], h.up_indptr[chain + 1]
+        arcs = csr_ranges(starts, ends)
+        position = np.empty(h.num_nodes, dtype=np.int32)
+        position[chain] = np.arange(size, dtype=np.int32)
+        indptr = np.zeros(size + 2, dtype=np.int32)
+        np.cumsum(ends - starts, out=indptr[1:-1])
+        indptr[-1] = indptr[-2] + len(origins)
+        matrix = csr_matrix((
+            np.concatenate((weights[arcs], np.asarray(costs, dtype=float))),
+            np.concatenate((position[h.up_indices[arcs]], position[origins])),
+            indptr
+        ), shape=(size + 1, size + 1))
+        labels, predecessors = dijkstra(matrix, directed=True, indices=size, return_predecessors=True)
+        return chain, labels[:size], predecessors[:size]
+
+    def _trace(self, chain: np.ndarray, predecessors: np.ndarray, position: int) -> Tuple[List[int], int]:
+        """Łuki drzewa przeszukiwania od pozycji position do początku przeszukiwania i węzeł początkowy (ranga)"""
+        h = self.hierarchy
+        trace = []
+        while 0 <= predecessors[position] < len(chain):
+            previous = int(predecessors[position])
+            low, high = int(chain[previous]), int(chain[position])
+            start = int(h.up_indptr[low])
+            trace.append(start + int(np.searchsorted(h.up_indices[start:h.up_indptr[low + 1]], high)))
+            position = previous
+        return trace, int(chain[position])
+
+    def _unpack(self, arc: int, upward: bool) -> List[int]:
+        """Węzły (rangi) ścieżki łuku bez węzła początkowego: w górę (niższy -> wyższy) lub w dół"""
+        h = self.hierarchy
+        stack = [(arc, upward)]
+        nodes = []
+        while stack:
+            arc, upward = stack.pop()
+            low = int(np.searchsorted(h.up_indptr, arc, side="right") - 1)
+            high = int(h.up_indices[arc])
+            weight = self.up[arc] if upward else self.down[arc]
+            if weight == (self.original_up[arc] if upward else self.original_down[arc]):
+                nodes.append(high if upward else low)
+                continue
+
+            # Trójkąt dolny (x, low, high) realizujący wagę łuku
+            low_pos = slice(h.down_indptr[low], h.down_indptr[low + 1])
+            high_pos = slice(h.down_indptr[high], h.down_indptr[high + 1])
+            common, in_low, in_high = np.intersect1d(
+                h.down_indices[low_pos], h.down_indices[high_pos], assume_unique=True, return_indices=True
+            )
+            a = h.down_arcs[low_pos][in_low]  # (x, low)
+            b = h.down_arcs[high_pos][in_high]  # (x, high)
+            via = self.down[a] + self.up[b] if upward else self.down[b] + self.up[a]
+            k = int(np.argmin(np.abs(via - weight)))
+            # Kolejność na stosie odwrotna do kolejności na ścieżce
+            if upward:
+                stack.extend([(int(b[k]), True), (int(a[k]), False)])
+            else:
+                stack.extend([(int(a[k]), True), (int(b[k]), False)])
+        return nodes
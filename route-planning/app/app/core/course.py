@@ -0,0 +1,85 @@
+import numpy as np
+from dataclasses import dataclass
+from shapely.geometry import Polygon
+from typing import List, Optional, Tuple
+
+from app.utils.geodesy import destination_point, initial_bearing
+
+
+# Strony opływania znaku: lewą (port) lub prawą (starboard) burtą
+ROUNDING_SIDES = ("port", "starboard")
+
+# Liczba wierzchołków wielokąta przybliżającego znak jako przeszkodę
+MARK_POLYGON_VERTICES = 16
+
+
+@dataclass
+class CourseMark:
+    """Znak kursu regatowego"""
+    lon: float
+    lat: float
+    rounding: Optional[str] = None  # "port", "starboard" lub None (punkt zwrotny)
+
+
+def mark_passages(marks: List[CourseMark], radius_nm: float) -> List[List[Tuple[float, float]]]:
+    """Punkty (lon, lat), przez które trasa przechodzi przy kolejnych znakach kursu
+
+    Znak bez strony opływania (oraz pierwszy i ostatni znak) to pojedynczy punkt
+    - sam znak. Pozostałe znaki zastępuje łuk punktów odległych o radius_nm,
+    w kolejności przejścia (rounding_arc).
+    """
+    passages = []
+    for number, mark in enumerate(marks):
+        if mark.rounding is None or number == 0 or number == len(marks) - 1:
+            passages.append([(mark.lon, mark.lat)])
+            continue
+        previous, following = marks[number - 1], marks[number + 1]
+        passages.append(rounding_arc(
+            (previous.lon, previous.lat), (mark.lon, mark.lat), (following.lon, following.lat),
+            mark.rounding, radius_nm
+        ))
+    return passages
+
+
+def rounding_arc(previous: Tuple[float, float], mark: Tuple[float, float], following: Tuple[float, float],
+                 side: str, radius_nm: float) -> List[Tuple[float, float]]:
+    """Punkty opływania znaku (lon, lat) w kolejności przejścia
+
+    Znak opływany lewą burtą leży po lewej stronie łodzi, więc punkty leżą
+    prostopadle w prawo od kursu (dla prawej burty - w lewo). Gdy kurs skręca
+    w stronę znaku, łuk od punktu wejścia do punktu wyjścia obiega znak
+    z zewnątrz, z punktami co najwyżej co 90° - cięciwy nie przecinają znaku.
+    Przy skręcie w przeciwną stronę (znak tylko mijany) wystarcza jeden punkt
+    na dwusiecznej kursów - tak jak linka napięta wzdłuż trasy.
+    """
+    if side not in ROUNDING_SIDES:
+        raise ValueError(f"Nieznana strona opływania: {side}")
+    bearing_in = float(initial_bearing(previous[0], previous[1], mark[0], mark[1]))
+    bearing_out = float(initial_bearing(mark[0], mark[1], following[0], following[1]))
+
+    # Kąt skrętu w stronę znaku (w lewo dla lewej burty, w prawo dla prawej)
+    sign, offset = (-1.0, 90.0) if side == "port" else (1.0, -90.0)
+    turn = (sign * (bearing_out - bearing_in)) % 360.0
+
+    if turn <= 180.0:
+        steps = max(int(np.ceil(turn / 90.0)), 1)
+        bearings = bearing_in + offset + sign * turn * np.arange(steps + 1) / steps
+        if turn == 0.0:
+            bearings = bearings[:1]
+    else:
+        bearings = np.array([bearing_in + offset - sign * (360.0 - turn) / 2])
+
+    lons, lats = destination_point(mark[0], mark[1], bearings % 360.0, radius_nm)
+    return list(zip(np.atleast_1d(lons).tolist(), np.atleast_1d(lats).tolist()))
+
+
+def mark_obstacles(marks: List[CourseMark], radius_nm: float) -> List[Polygon]:
+    """Znaki z zadaną stroną opływania jako małe przeszkody (trasa nie przecina znaku)"""
+    bearings = np.linspace(0.0, 360.0, MARK_POLYGON_VERTICES, endpoint=False)
+    obstacles = []
+    for number, mark in enumerate(marks):
+        if mark.rounding is None or number == 0 or number == len(marks) - 1:
+            continue
+        lons, lats = destination_point(mark.lon, mark.lat, bearings, radius_nm)
+        obstacles.append(Polygon(zip(lons.tolist(), lats.tolist())))
+    return obstacles
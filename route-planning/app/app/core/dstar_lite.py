@@ -0,0 +1,251 @@
+import copy
+from dataclasses import replace
+from heapq import heapify, heappop, heappush
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.graph import DEADLINE_CHECK_INTERVAL, CSRGraph, NoPathError
+from app.utils.geodesy import haversine_nm
+
+
+def reverse_slots(graph: CSRGraph) -> np.ndarray:
+    """Dla każdej pozycji krawędzi u -> v pozycja krawędzi przeciwnej v -> u
+
+    Każda krawędź nieskierowana występuje w obu kierunkach (CSRGraph.from_edges),
+    więc times[reverse_slots(graph)] to czasy krawędzi wchodzących do węzła.
+    """
+    sources = np.repeat(np.arange(graph.num_nodes), np.diff(graph.indptr))
+    forward = np.lexsort((graph.indices, sources))
+    backward = np.lexsort((sources, graph.indices))
+    slots = np.empty(len(graph.indices), dtype=np.int64)
+    slots[forward] = backward
+    return slots
+
+
+class DStarLite:
+    """Przyrostowe wyszukiwanie najszybszej trasy D* Lite (Koenig, Likhachev 2002)
+
+    Wyszukiwanie prowadzone jest wstecz, od mety: g[v] to czas przejścia z węzła v
+    do mety, a rhs[v] - jego wartość wyliczona z następników (min c(v, s) + g[s]).
+    Po zmianie czasów krawędzi (nowy wiatr) albo położenia łodzi poprawiane są
+    tylko węzły, których g przestało się zgadzać z rhs, a nie całe drzewo.
+
+    Łódź to dodatkowy węzeł (indeks num_nodes) z krawędziami do pobliskich
+    węzłów siatki, więc jej pozycja nie musi być węzłem grafu.
+    Heurystyka to odległość od łodzi / górne ograniczenie prędkości; przy
+    przesunięciu łodzi przesunięcie klucza k_m rośnie o odległość przebytą
+    w tej prędkości, więc klucze w kolejce pozostają dolnymi ograniczeniami.
+    Kolejka to kopiec z leniwym usuwaniem - wpis jest aktualny, jeśli jego
+    klucz jest równy kluczowi zapisanemu dla węzła.
+    """
+
+    def __init__(self, graph: CSRGraph, goal: int, speed: float, position: Tuple[float, float],
+                 start_nodes: np.ndarray, start_times: np.ndarray):
+        self.graph = graph
+        self.goal = goal
+        self.speed = speed
+        self.boat = graph.num_nodes
+        self.reverse = reverse_slots(graph)
+        self.g = np.full(graph.num_nodes + 1, np.inf)
+        self.rhs = np.full(graph.num_nodes + 1, np.inf)
+        self.rhs[goal] = 0.0
+        self.k_m = 0.0
+        self.nodes_expanded = 0  # Węzły rozwinięte od utworzenia
+
+        self._heap: List[Tuple[float, float, int]] = []
+        self._queued = np.zeros(graph.num_nodes + 1, dtype=bool)
+        self._keys = np.full((graph.num_nodes + 1, 2), np.inf)
+
+        self.position = position
+        self._heuristic = self._heuristic_from(position)
+        self._start_times = {}
+        self._set_start_edges(start_nodes, start_times)
+        self._update_vertex(goal)
+
+    def move_start(self, position: Tuple[float, float], start_nodes: np.ndarray, start_times: np.ndarray):
+        """Przenosi łódź do nowej pozycji dołączonej do węzłów start_nodes (czasy start_times)"""
+        self.k_m += self._distance_hours(self.position, position)
+        self.position = position
+        self._heuristic = self._heuristic_from(position)
+        self._set_start_edges(start_nodes, start_times)
+
+    def update_edges(self, slots: np.ndarray, times: np.ndarray):
+        """Zmienia czasy krawędzi na pozycjach slots (tablice CSR grafu)"""
+        if len(slots) == 0:
+            return
+        self.graph.times[slots] = times
+        sources = np.searchsorted(self.graph.indptr, slots, side="right") - 1
+        for node in np.unique(sources).tolist():
+            if node != self.goal:
+                self.rhs[node] = self._lookahead(node)
+                self._update_vertex(node)
+
+    def copy(self) -> "DStarLite":
+        """Niezależna kopia stanu (czasy krawędzi grafu także kopiowane, geometria współdzielona)"""
+        search = copy.copy(self)
+        search.graph = replace(self.graph, times=self.graph.times.copy(), _matrix=None)
+        search.g = self.g.copy()
+        search.rhs = self.rhs.copy()
+        search._heap = list(self._heap)
+        search._queued = self._queued.copy()
+        search._keys = self._keys.copy()
+        search._start_times = dict(self._start_times)
+        return search
+
+    def compute(self, check_deadline: Optional[Callable[[], None]] = None) -> int:
+        """Poprawia wartości g do chwili, gdy czas z pozycji łodzi jest pewny
+
+        check_deadline wywoływane jest co DEADLINE_CHECK_INTERVAL rozwinięć
+        i może przerwać obliczenie wyjątkiem (stan pozostaje wtedy niespójny).
+        Zwraca liczbę węzłów rozwiniętych w tym wywołaniu.
+        """
+        g, rhs, boat = self.g, self.rhs, self.boat
+        expanded = 0
+        if check_deadline is not None:
+            check_deadline()
+        while True:
+            top = self._top()
+            if top is None:
+                break
+            boat_key = self._key(boat)
+            # Przy równych kluczach węzeł niedospójny też jest rozwijany - krawędź łodzi
+            # może mieć zerowy czas (łódź w węźle siatki), a wtedy klucze węzła i łodzi są równe
+            if not (top[:2] < boat_key or rhs[boat] > g[boat]
+                    or (top[:2] == boat_key and g[top[2]] < rhs[top[2]])):
+                break
+
+            k1, k2, node = heappop(self._heap)
+            self._queued[node] = False
+            key = self._key(node)
+            if (k1, k2) < key:
+                self._push(node, key)
+                continue
+
+            expanded += 1
+            if check_deadline is not None and expanded % DEADLINE_CHECK_INTERVAL == 0:
+                check_deadline()
+            predecessors, costs = self._predecessors(node)
+            if g[node] > rhs[node]:
+                # Węzeł nadspójny - czas do mety się skrócił
+                g[node] = rhs[node]
+                candidates = costs + g[node]
+                improved = (candidates < rhs[predecessors]) & (predecessors != self.goal)
+                for predecessor, value in zip(predecessors[improved].tolist(), candidates[improved].tolist()):
+                    rhs[predecessor] = value
+                    self._update_vertex(predecessor)
+            else:
+                # Węzeł niedospójny - czas do mety się wydłużył, poprzednicy liczą rhs od nowa
+                previous = g[node]
+                g[node] = np.inf
+                supported = (rhs[predecessors] == costs + previous) & (predecessors != self.goal)
+                for predecessor in predecessors[supported].tolist():
+                    rhs[predecessor] = self._lookahead(predecessor)
+                    self._update_vertex(predecessor)
+                self._update_vertex(node)
+
+        self.nodes_expanded += expanded
+        self._compact()
+        return expanded
+
+    def path(self) -> Tuple[List[int], float]:
+        """Najszybsza trasa z pozycji łodzi: (węzły grafu od pierwszego po łodzi do mety, czas)"""
+        if not np.isfinite(self.rhs[self.boat]):
+            raise NoPathError("Brak ścieżki z pozycji łodzi do mety")
+
+        path: List[int] = []
+        total = 0.0
+        node = self.boat
+        while node != self.goal:
+            successors, costs = self._successors(node)
+            candidates = costs + self.g[successors]
+            best = int(np.argmin(candidates))
+            if not np.isfinite(candidates[best]) or len(path) > self.graph.num_nodes:
+                raise NoPathError("Brak ścieżki z pozycji łodzi do mety")
+            node = int(successors[best])
+            total += float(costs[best])
+            path.append(node)
+        return path, total
+
+    @property
+    def nbytes(self) -> int:
+        """Przybliżony rozmiar stanu w pamięci (bajty)"""
+        arrays = (self.reverse, self.g, self.rhs, self._queued, self._keys)
+        return sum(value.nbytes for value in arrays) + 32 * len(self._heap)
+
+    def _set_start_edges(self, nodes: np.ndarray, times: np.ndarray):
+        self._start_times = dict(zip(np.asarray(nodes).tolist(), np.asarray(times, dtype=float).tolist()))
+        self.rhs[self.boat] = self._lookahead(self.boat)
+        self._update_vertex(self.boat)
+
+    def _successors(self, node: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Następnicy węzła i czasy krawędzi do nich"""
+        if node == self.boat:
+            return (np.fromiter(self._start_times.keys(), dtype=np.int64, count=len(self._start_times)),
+                    np.fromiter(self._start_times.values(), dtype=float, count=len(self._start_times)))
+        start, end = self.graph.indptr[node], self.graph.indptr[node + 1]
+        return self.graph.indices[start:end], self.graph.times[start:end]
+
+    def _predecessors(self, node: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Poprzednicy węzła (także łódź) i czasy krawędzi z nich do węzła"""
+        if node == self.boat:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        start, end = self.graph.indptr[node], self.graph.indptr[node + 1]
+        predecessors = self.graph.indices[start:end]
+        costs = self.graph.times[self.reverse[start:end]]
+        if node in self._start_times:
+            predecessors = np.append(predecessors, self.boat)
+            costs = np.append(costs, self._start_times[node])
+        return predecessors, costs
+
+    def _lookahead(self, node: int) -> float:
+        """rhs węzła: min c(node, s) + g[s] po następnikach"""
+        successors, costs = self._successors(node)
+        if len(successors) == 0:
+            return np.inf
+        return float(np.min(costs + self.g[successors]))
+
+    def _key(self, node: int) -> Tuple[float, float]:
+        value = min(self.g[node], self.rhs[node])
+        return value + self._heuristic[node] + self.k_m, value
+
+    def _update_vertex(self, node: int):
+        if self.g[node] != self.rhs[node]:
+            self._push(node, self._key(node))
+        else:
+            self._queued[node] = False
+
+    def _push(self, node: int, key: Tuple[float, float]):
+        self._queued[node] = True
+        self._keys[node] = key
+        heappush(self._heap, (key[0], key[1], node))
+
+    def _top(self):
+        """Aktualny wpis z początku kolejki (nieaktualne są usuwane) lub None"""
+        heap = self._heap
+        while heap:
+            k1, k2, node = heap[0]
+            if self._queued[node] and self._keys[node, 0] == k1 and self._keys[node, 1] == k2:
+                return heap[0]
+            heappop(heap)
+        return None
+
+    def _compact(self):
+        """Usuwa z kopca nieaktualne wpisy, gdy stanowią większość"""
+        if len(self._heap) > 4 * max(int(self._queued.sum()), 16):
+            self._heap = [entry for entry in self._heap
+                          if self._queued[entry[2]] and self._keys[entry[2], 0] == entry[0]
+                          and self._keys[entry[2], 1] == entry[1]]
+            heapify(self._heap)
+
+    def _heuristic_from(self, position: Tuple[float, float]) -> np.ndarray:
+        """Dolne ograniczenie czasu od łodzi do każdego węzła (łódź - 0)"""
+        heuristic = np.zeros(self.graph.num_nodes + 1)
+        if self.speed > 0:
+            heuristic[:-1] = haversine_nm(position[0], position[1], self.graph.lons, self.graph.lats) / self.speed
+        return heuristic
+
+    def _distance_hours(self, first: Tuple[float, float], second: Tuple[float, float]) -> float:
+        if self.speed <= 0:
+            return 0.0
+        return float(haversine_nm(first[0], first[1], second[0], second[1])) / self.speed
@@ -0,0 +1,475 @@
+import numpy as np
+from heapq import heappush, heappop
+from itertools import count
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+# Co ile rozwiniętych węzłów sprawdzany jest termin obliczenia
+DEADLINE_CHECK_INTERVAL = 256
+
+
+class NoPathError(Exception):
+    """Brak ścieżki między węzłami grafu"""
+
+
+@dataclass
+class SearchResult:
+    """Wynik przeszukiwania grafu"""
+    path: List[int]  # Indeksy kolejnych węzłów trasy
+    cost: float  # Całkowity koszt (czas w godzinach)
+    nodes_expanded: int = 0  # Liczba rozwiniętych węzłów
+
+
+@dataclass
+class CSRGraph:
+    """Nieskierowany graf nawigacyjny przechowywany w tablicach numpy (format CSR)
+
+    Węzły to tablice współrzędnych lons/lats, a krawędzie węzła v zajmują
+    zakres indptr[v]:indptr[v + 1] tablic indices, distances i times.
+    Każda krawędź nieskierowana występuje w obu kierunkach. Sąsiedzi węzła
+    są posortowani rosnąco, tak jak w grafie networkx budowanym przez
+    RouteOptimizer.build_graph. Graf zbudowany z reverse_times ma różne
+    czasy przejścia krawędzi w obu kierunkach (pod wiatr i z wiatrem) - wtedy
+    directed_times jest True.
+    """
+    lons: np.ndarray
+    lats: np.ndarray
+    indptr: np.ndarray
+    indices: np.ndarray
+    distances: np.ndarray  # NM
+    times: np.ndarray  # godziny
+    directed_times: bool = False  # Czy czas krawędzi u -> v może różnić się od v -> u
+    _matrix: Optional[csr_matrix] = field(default=None, repr=False)
+
+    @classmethod
+    def from_edges(cls, lons: np.ndarray, lats: np.ndarray,
+                   edges_i: np.ndarray, edges_j: np.ndarray,
+                   distances: np.ndarray, times: np.ndarray,
+                   reverse_times: Optional[np.ndarray] = None) -> "CSRGraph":
+        """Buduje graf z listy krawędzi nieskierowanych (i, j)
+
+        times to czasy przejścia i -> j, reverse_times (domyślnie te same) - j -> i.
+        """
+        num_nodes = len(lons)
+        src = np.concatenate((edges_i, edges_j)).astype(np.int64)
+        dst = np.concatenate((edges_j, edges_i)).astype(np.int64)
+        order = np.lexsort((dst, src))
+
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=num_nodes), out=indptr[1:])
+
+        return cls(
+            lons=np.asarray(lons, dtype=float),
+            lats=np.asarray(lats, dtype=float),
+            indptr=indptr,
+            indices=dst[order],
+            distances=np.concatenate((distances, distances))[order].astype(float),
+            times=np.concatenate((times, times if reverse_times is None else reverse_times))[order].astype(float),
+            directed_times=reverse_times is not None
+        )
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.lons)
+
+    @property
+    def num_edges(self) -> int:
+        """Liczba krawędzi nieskierowanych"""
+        return len(self.indices) // 2
+
+    def edge_time(self, u: int, v: int) -> float:
+        """Zwraca czas przejścia krawędzi (u, v)"""
+        start, end = self.indptr[u], self.indptr[u + 1]
+        pos = start + np.searchsorted(self.indices[start:end], v)
+        if pos >= end or self.indices[pos] != v:
+            raise KeyError((u, v))
+        return float(self.times[pos])
+
+    def to_matrix(self) -> csr_matrix:
+        """Zwraca macierz rzadką wag (czasów) dla scipy.sparse.csgraph"""
+        if self._matrix is None:
+            self._matrix = csr_matrix(
+                (self.times, self.indices, self.indptr),
+                shape=(self.num_nodes, self.num_nodes)
+            )
+        return self._matrix
+
+
+@dataclass
+class Landmarks:
+    """Punkty orientacyjne heurystyki ALT (A*, landmarks, triangle inequality)
+
+    distances[k, v] to najkrótszy czas (lub inna waga krawędzi) między punktem
+    nodes[k] a węzłem v. Graf jest nieskierowany, więc z nierówności trójkąta
+    d(v, t) >= |d(L, t) - d(L, v)| dla każdego punktu L - oszacowanie jest
+    dopuszczalne i spójne, także przy kosztach krawędzi zwiększonych karami.
+    """
+    nodes: np.ndarray
+    distances: np.ndarray  # (punkty, węzły), inf dla węzłów nieosiągalnych
+
+    @classmethod
+    def select(cls, graph: CSRGraph, count: int, first: int = 0,
+               weights: Optional[np.ndarray] = None) -> "Landmarks":
+        """Wybiera punkty metodą najdalszego punktu i liczy odległości Dijkstrą
+
+        Pierwszy punkt to węzeł najdalszy od węzła first, każdy kolejny - węzeł
+        najdalszy od już wybranych. Odległości liczone są w czasie przejścia,
+        a z podanymi weights - w tych wagach krawędzi (np. graph.distances).
+        """
+        count = min(count, graph.num_nodes)
+        if weights is None:
+            matrix = graph.to_matrix()
+        else:
+            matrix = csr_matrix((weights, graph.indices, graph.indptr), shape=(graph.num_nodes, graph.num_nodes))
+        nodes: List[int] = []
+        rows: List[np.ndarray] = []
+
+        from_first = dijkstra(matrix, directed=True, indices=first)
+        reachable = np.isfinite(from_first)
+        nearest = np.full(graph.num_nodes, np.inf)
+        for _ in range(count):
+            scores = np.where(reachable, from_first if not nodes else nearest, -np.inf)
+            candidate = int(np.argmax(scores))
+            if not np.isfinite(scores[candidate]) or candidate in nodes:
+                break
+            nodes.append(candidate)
+            rows.append(dijkstra(matrix, directed=True, indices=candidate))
+            nearest = np.minimum(nearest, rows[-1])
+
+        distances = np.array(rows) if rows else np.empty((0, graph.num_nodes))
+        return cls(nodes=np.array(nodes, dtype=np.int64), distances=distances)
+
+    def heuristic(self, target: int) -> np.ndarray:
+        """Oszacowanie czasu z każdego węzła do target (0 bez punktów orientacyjnych)"""
+        if len(self.nodes) == 0:
+            return np.zeros(self.distances.shape[1])
+        to_target = self.distances[:, target][:, None]
+        with np.errstate(invalid='ignore'):
+            bounds = np.abs(to_target - self.distances)
+        # Punkt, z którego węzeł lub cel są nieosiągalne, nic nie mówi o odległości
+        bounds[~np.isfinite(bounds)] = 0.0
+        return bounds.max(axis=0)
+
+
+def astar(graph: CSRGraph, source: int, target: int, heuristic: np.ndarray,
+          check_deadline: Optional[Callable[[], None]] = None) -> SearchResult:
+    """Algorytm A* na tablicach CSR
+
+    heuristic[v] to oszacowanie kosztu z węzła v do celu. Kolejność
+    rozwijania węzłów i rozstrzyganie remisów odpowiadają nx.astar_path,
+    więc oba silniki zwracają tę samą trasę.
+    """
+    indptr, indices, times = graph.indptr, graph.indices, graph.times
+
+    def expand(node: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = indptr[node], indptr[node + 1]
+        return indices[start:end], times[start:end]
+
+    return lazy_astar(graph.num_nodes, source, target, heuristic, expand, check_deadline)
+
+
+def lazy_astar(num_nodes: int, source: int, target: int, heuristic: np.ndarray,
+               expand: Callable[[int], Tuple[np.ndarray, np.ndarray]],
+               check_deadline: Optional[Callable[[], None]] = None) -> SearchResult:
+    """Algorytm A*, w którym sąsiedzi węzła są generowani dopiero przy jego rozwinięciu
+
+    expand(node) zwraca posortowane rosnąco indeksy sąsiadów oraz koszty
+    krawędzi do nich. Funkcja jest wywoływana co najwyżej raz na węzeł.
+    check_deadline wywoływane jest co DEADLINE_CHECK_INTERVAL rozwinięć
+    i może przerwać wyszukiwanie wyjątkiem.
+    """
+    g_cost = np.full(num_nodes, np.inf)
+    h_cost = np.zeros(num_nodes)
+    enqueued = np.zeros(num_nodes, dtype=bool)
+    explored = np.zeros(num_nodes, dtype=bool)
+    parents = np.full(num_nodes, -1, dtype=np.int64)
+
+    c = count()
+    queue = [(0.0, next(c), source, 0.0, -1)]
+    nodes_expanded = 0
+
+    while queue:
+        _, __, node, dist, parent = heappop(queue)
+
+        if node == target:
+            path = [node]
+            while parent != -1:
+                path.append(parent)
+                parent = parents[parent]
+            path.reverse()
+            return SearchResult(path=[int(n) for n in path], cost=dist, nodes_expanded=nodes_expanded)
+
+        if explored[node]:
+            if parents[node] == -1:
+                continue
+            if g_cost[node] < dist:
+                continue
+
+        explored[node] = True
+        parents[node] = parent
+        nodes_expanded += 1
+        if check_deadline is not None and nodes_expanded % DEADLINE_CHECK_INTERVAL == 0:
+            check_deadline()
+
+        # Relaksacja wszystkich krawędzi węzła naraz
+        neighbours, edge_costs = expand(node)
+        new_costs = dist + edge_costs
+
+        improved = ~enqueued[neighbours] | (g_cost[neighbours] > new_costs)
+        neighbours, new_costs = neighbours[improved], new_costs[improved]
+
+        fresh = neighbours[~enqueued[neighbours]]
+        h_cost[fresh] = heuristic[fresh]
+        enqueued[neighbours] = True
+        g_cost[neighbours] = new_costs
+
+        priorities = new_costs + h_cost[neighbours]
+        for neighbour, new_cost, priority in zip(neighbours.tolist(), new_costs.tolist(), priorities.tolist()):
+            heappush(queue, (priority, next(c), neighbour, new_cost, node))
+
+    raise NoPathError(f"Węzeł {target} nie jest osiągalny z {source}")
+
+
+def time_dependent_astar(num_nodes: int, source: int, target: int, heuristic: np.ndarray,
+                         expand: Callable[[int, float], Tuple[np.ndarray, np.ndarray]],
+                         dominated: Optional[Callable[[int, float], bool]] = None,
+                         check_deadline: Optional[Callable[[], None]] = None) -> SearchResult:
+    """Algorytm A* z kosztami krawędzi zależnymi od chwili dotarcia do węzła
+
+    expand(node, time) zwraca sąsiadów węzła i czasy przejścia krawędzi przy
+    wypłynięciu z node w chwili time (godziny od startu). Przy własności FIFO
+    (późniejsze wypłynięcie nie daje wcześniejszego dotarcia) wystarcza jedna
+    etykieta na węzeł - najwcześniejsze dotarcie. dominated(node, time) pozwala
+    nie rozwijać węzła (przycinanie izochron); cel nigdy nie jest pomijany.
+    check_deadline działa jak w lazy_astar.
+    """
+    arrival = np.full(num_nodes, np.inf)
+    parents = np.full(num_nodes, -1, dtype=np.int64)
+    settled = np.zeros(num_nodes, dtype=bool)
+    arrival[source] = 0.0
+
+    c = count()
+    queue = [(float(heuristic[source]), next(c), source)]
+    nodes_expanded = 0
+
+    while queue:
+        _, __, node = heappop(queue)
+        if settled[node]:
+            continue
+        settled[node] = True
+        time = float(arrival[node])
+
+        if node == target:
+            return SearchResult(path=_trace(parents, node)[::-1], cost=time, nodes_expanded=nodes_expanded)
+        if dominated is not None and dominated(node, time):
+            continue
+        nodes_expanded += 1
+        if check_deadline is not None and nodes_expanded % DEADLINE_CHECK_INTERVAL == 0:
+            check_deadline()
+
+        neighbours, edge_costs = expand(node, time)
+        new_times = time + edge_costs
+        improved = ~settled[neighbours] & (new_times < arrival[neighbours])
+        neighbours, new_times = neighbours[improved], new_times[improved]
+        arrival[neighbours] = new_times
+        parents[neighbours] = node
+
+        priorities = new_times + heuristic[neighbours]
+        for neighbour, priority in zip(neighbours.tolist(), priorities.tolist()):
+            heappush(queue, (priority, next(c), neighbour))
+
+    raise NoPathError(f"Węzeł {target} nie jest osiągalny z {source}")
+
+
+def bidirectional_astar(graph: CSRGraph, source: int, target: int,
+                        heuristic_to_target: np.ndarray, heuristic_to_source: np.ndarray,
+                        check_deadline: Optional[Callable[[], None]] = None) -> SearchResult:
+    """Dwukierunkowy A* na tablicach CSR (potencjały uśrednione)
+
+    Graf jest nieskierowany, więc przeszukiwanie wsteczne używa tych samych
+    krawędzi. Obie strony korzystają z potencjału p(v) = (h_t(v) - h_s(v)) / 2
+    (wstecz z -p), dzięki czemu są przeszukiwaniami Dijkstry na tym samym
+    grafie o kosztach zredukowanych i kryterium spotkania jest takie jak
+    w dwukierunkowej Dijkstrze: kończymy, gdy suma minimalnych priorytetów
+    kolejek osiągnie koszt najlepszej znalezionej ścieżki. Heurystyki muszą
+    być spójne. Za każdym razem rozwijana jest strona z krótszą kolejką.
+
+    Na grafach z bench_bidirectional rozwija tyle samo węzłów co A* (mniej
+    tylko na krótkich odcinkach, więcej na odcinkach 20-40 NM), dlatego nie
+    jest oferowany w API - pozostaje trybem RouteOptimizer do porównań.
+    check_deadline działa jak w lazy_astar.
+    """
+    if graph.directed_times:
+        raise ValueError("Dwukierunkowy A* wymaga równych czasów krawędzi w obu kierunkach")
+    indptr, indices, times = graph.indptr, graph.indices, graph.times
+    num_nodes = graph.num_nodes
+    if source == target:
+        return SearchResult(path=[source], cost=0.0)
+
+    potential = (heuristic_to_target - heuristic_to_source) / 2
+    sides = []
+    for origin, sign in ((source, 1.0), (target, -1.0)):
+        g_cost = np.full(num_nodes, np.inf)
+        g_cost[origin] = 0.0
+        sides.append({
+            "g": g_cost,
+            "parents": np.full(num_nodes, -1, dtype=np.int64),
+            "settled": np.zeros(num_nodes, dtype=bool),
+            "queue": [(sign * potential[origin], origin)],
+            "sign": sign,
+        })
+
+    best_cost = np.inf
+    nodes_expanded = 0
+
+    while sides[0]["queue"] and sides[1]["queue"]:
+        if sides[0]["queue"][0][0] + sides[1]["queue"][0][0] >= best_cost:
+            break
+
+        side = 0 if len(sides[0]["queue"]) <= len(sides[1]["queue"]) else 1
+        this, other = sides[side], sides[1 - side]
+        _, node = heappop(this["queue"])
+        if this["settled"][node]:
+            continue
+        this["settled"][node] = True
+        nodes_expanded += 1
+        if check_deadline is not None and nodes_expanded % DEADLINE_CHECK_INTERVAL == 0:
+            check_deadline()
+
+        start, end = indptr[node], indptr[node + 1]
+        neighbours, new_costs = indices[start:end], this["g"][node] + times[start:end]
+
+        # Spotkanie z drugą stroną przez krawędź node - sąsiad
+        through = new_costs + other["g"][neighbours]
+        if len(through):
+            best_cost = min(best_cost, float(through.min()))
+
+        improved = new_costs < this["g"][neighbours]
+        neighbours, new_costs = neighbours[improved], new_costs[improved]
+        this["g"][neighbours] = new_costs
+        this["parents"][neighbours] = node
+
+        priorities = new_costs + this["sign"] * potential[neighbours]
+        for neighbour, priority in zip(neighbours.tolist(), priorities.tolist()):
+            heappush(this["queue"], (priority, neighbour))
+
+    if not np.isfinite(best_cost):
+        raise NoPathError(f"Węzeł {target} nie jest osiągalny z {source}")
+
+    # Węzeł spotkania: najmniejsza suma etykiet obu stron (równa best_cost)
+    total = sides[0]["g"] + sides[1]["g"]
+    meeting = int(np.argmin(total))
+    path = _trace(sides[0]["parents"], meeting)[::-1] + _trace(sides[1]["parents"], meeting)[1:]
+    return SearchResult(path=path, cost=float(total[meeting]), nodes_expanded=nodes_expanded)
+
+
+def _trace(parents: np.ndarray, node: int) -> List[int]:
+    """Ścieżka od node do korzenia drzewa przeszukiwania"""
+    path = [node]
+    while parents[path[-1]] != -1:
+        path.append(int(parents[path[-1]]))
+    return path
+
+
+def dijkstra_path(graph: CSRGraph, source: int, target: int) -> SearchResult:
+    """Algorytm Dijkstry z scipy.sparse.csgraph (jedno źródło)"""
+    costs, predecessors = dijkstra(
+        graph.to_matrix(), directed=True, indices=source, return_predecessors=True
+    )
+    if not np.isfinite(costs[target]):
+        raise NoPathError(f"Węzeł {target} nie jest osiągalny z {source}")
+
+    return SearchResult(
+        path=reconstruct_path(predecessors, source, target),
+        cost=float(costs[target]),
+        nodes_expanded=int(np.isfinite(costs).sum())
+    )
+
+
+def shortest_path_trees(graph: CSRGraph, sources: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Drzewa najkrótszych ścieżek z wielu źródeł naraz (Dijkstra z scipy)
+
+    Zwraca tablice kosztów i poprzedników o kształcie (źródła, węzły).
+    """
+    costs, predecessors = dijkstra(
+        graph.to_matrix(), directed=True, indices=np.asarray(sources, dtype=np.int64),
+        return_predecessors=True
+    )
+    return np.atleast_2d(costs), np.atleast_2d(predecessors)
+
+
+def reconstruct_path(predecessors: np.ndarray, source: int, target: int) -> List[int]:
+    """Odtwarza ścieżkę z tablicy poprzedników zwróconej przez scipy"""
+    path = [target]
+    node = target
+    while node != source:
+        node = predecessors[node]
+        if node < 0:
+            raise NoPathError(f"Węzeł {target} nie jest osiągalny z {source}")
+        path.append(int(node))
+    path.reverse()
+    return [int(n) for n in path]
+
+
+def penalty_alternatives(num_nodes: int, source: int, target: int, heuristic: np.ndarray,
+                         expand: Callable[[int], Tuple[np.ndarray, np.ndarray]],
+                         primary: SearchResult, num_alternatives: int, penalty: float = 0.5,
+                         max_overlap: float = 0.7, max_stretch: float = 0.25,
+                         max_rounds: Optional[int] = None) -> List[SearchResult]:
+    """Trasy alternatywne metodą kar na tym samym grafie
+
+    Po każdym wyszukiwaniu koszty krawędzi prowadzących do węzłów pośrednich
+    ostatniej trasy są zwiększane o ułamek penalty, po czym A* jest powtarzany
+    z tą samą heurystyką (kary tylko zwiększają koszty, więc heurystyka
+    pozostaje dopuszczalna). Trasa jest przyjmowana, jeśli co najwyżej
+    max_overlap jej czasu przypada na krawędzie tras już przyjętych, a jej
+    rzeczywisty czas przekracza czas trasy głównej najwyżej o max_stretch.
+    Zwracane koszty są rzeczywiste, bez kar.
+    """
+    factors = np.ones(num_nodes)
+
+    def penalised(node: int) -> Tuple[np.ndarray, np.ndarray]:
+        neighbours, edge_costs = expand(node)
+        return neighbours, edge_costs * factors[neighbours]
+
+    accepted_edges = [_edge_costs(primary.path, expand)]
+    alternatives: List[SearchResult] = []
+    last_path = primary.path
+
+    for _ in range(max_rounds if max_rounds is not None else 3 * num_alternatives):
+        if len(alternatives) >= num_alternatives:
+            break
+        interior = last_path[1:-1]
+        if not interior:
+            break
+        factors[interior] += penalty
+
+        try:
+            result = lazy_astar(num_nodes, source, target, heuristic, penalised)
+        except NoPathError:
+            break
+        last_path = result.path
+
+        edges = _edge_costs(result.path, expand)
+        cost = float(sum(edges.values()))
+        if cost > primary.cost * (1 + max_stretch):
+            break
+
+        overlap = max(sum(t for e, t in edges.items() if e in other) for other in accepted_edges)
+        if cost > 0 and overlap / cost <= max_overlap:
+            accepted_edges.append(edges)
+            alternatives.append(SearchResult(path=result.path, cost=cost, nodes_expanded=result.nodes_expanded))
+
+    return alternatives
+
+
+def _edge_costs(path: List[int], expand: Callable[[int], Tuple[np.ndarray, np.ndarray]]) -> Dict[Tuple[int, int], float]:
+    """Rzeczywiste koszty krawędzi ścieżki, kluczowane parą (min, max)"""
+    costs = {}
+    for u, v in zip(path, path[1:]):
+        neighbours, edge_costs = expand(u)
+        pos = int(np.searchsorted(neighbours, v))
+        costs[(min(u, v), max(u, v))] = float(edge_costs[pos])
+    return costs
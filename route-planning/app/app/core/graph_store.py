@@ -0,0 +1,84 @@
+import json
+import os
+import struct
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+# Sygnatura i wersja formatu pliku grafu
+MAGIC = b"SAILGRPH"
+FORMAT_VERSION = 1
+# Wyrównanie początku każdej tablicy w pliku (bajty)
+ALIGNMENT = 64
+
+_PREFIX = struct.Struct("<8sIQ")  # sygnatura, wersja formatu, długość nagłówka JSON
+
+
+def write_graph_file(path: str, arrays: Dict[str, np.ndarray], metadata: dict):
+    """Zapisuje tablice numpy i metadane do pliku binarnego do odczytu przez mmap
+
+    Plik to prefiks (sygnatura, wersja, długość nagłówka), nagłówek JSON
+    z metadanymi i opisem tablic (typ, kształt, przesunięcie) oraz tablice
+    w porządku C, każda wyrównana do ALIGNMENT bajtów. Plik zapisywany jest
+    pod nazwą tymczasową i podmieniany atomowo - procesy mające otwarty
+    poprzedni plik nadal widzą jego spójną zawartość.
+    """
+    arrays = {name: np.ascontiguousarray(value) for name, value in arrays.items()}
+    layout = {}
+    offset = 0
+    for name, value in arrays.items():
+        offset = _align(offset)
+        layout[name] = {"dtype": value.dtype.str, "shape": list(value.shape), "offset": offset}
+        offset += value.nbytes
+
+    header = json.dumps({"metadata": metadata, "arrays": layout}).encode()
+    data_start = _align(_PREFIX.size + len(header))
+
+    temporary = f"{path}.tmp{os.getpid()}"
+    with open(temporary, "wb") as handle:
+        handle.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)))
+        handle.write(header)
+        for name, value in arrays.items():
+            handle.seek(data_start + layout[name]["offset"])
+            handle.write(value.tobytes())
+        handle.truncate(data_start + offset)
+    os.replace(temporary, path)
+
+
+def read_graph_header(path: str) -> dict:
+    """Odczytuje sam nagłówek pliku grafu (metadane i opis tablic)"""
+    with open(path, "rb") as handle:
+        return _read_header(handle, path)[0]
+
+
+def open_graph_file(path: str) -> Tuple[Dict[str, np.ndarray], dict]:
+    """Mapuje plik grafu do pamięci tylko do odczytu: (tablice, metadane)
+
+    Tablice są widokami jednego mapowania - strony pliku są współdzielone
+    przez wszystkie procesy, które go otworzyły, i wczytywane przy pierwszym
+    dostępie, więc otwarcie pliku nie zależy od jego rozmiaru.
+    """
+    with open(path, "rb") as handle:
+        header, data_start = _read_header(handle, path)
+
+    mapping = np.memmap(path, dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, entry in header["arrays"].items():
+        dtype = np.dtype(entry["dtype"])
+        count = int(np.prod(entry["shape"], dtype=np.int64))
+        start = data_start + entry["offset"]
+        arrays[name] = mapping[start:start + count * dtype.itemsize].view(dtype).reshape(entry["shape"])
+    return arrays, header["metadata"]
+
+
+def _read_header(handle, path: str) -> Tuple[dict, int]:
+    """Nagłówek pliku i położenie początku tablic"""
+    magic, version, header_size = _PREFIX.unpack(handle.read(_PREFIX.size))
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"Nieobsługiwany format pliku grafu: {path}")
+    return json.loads(handle.read(header_size)), _align(_PREFIX.size + header_size)
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
@@ -1,9 +1,16 @@
 import numpy as np
+import shapely
+from scipy.spatial import cKDTree
+from shapely import contains_xy, prepare
 from shapely.geometry import Point, Polygon, MultiPoint
 from typing import List, Tuple, Optional
-import random
 from dataclasses import dataclass
 
+from app.core.obstacles import ObstacleIndex
+from app.core.spatial import GridLattice
+from app.core.weather import WeatherData
+from app.utils.geodesy import LocalProjection, haversine_nm
+
 
 @dataclass
 class GridConfig:
@@ -11,131 +18,211 @@ class GridConfig:
     min_distance_nm: float = 0.5
     max_attempts: int = 30
     corridor_margin_nm: float = 2.0
+    seed: Optional[int] = None  # Ziarno generatora losowego (None - losowe)
+    # GRID_MODES: "poisson", "adaptive" (wielorozdzielcza) lub "hex" (heksagonalna); "regional" nie tworzy
+    # siatki - run_route_job liczy wtedy trasę na grafie regionalnym, bez generatora siatki
+    grid_mode: str = "poisson"
+    max_spacing_nm: float = 2.0  # Największy odstęp punktów siatki wielorozdzielczej
+    spacing_growth: float = 0.25  # Przyrost odstępu (NM) na każdą milę od przeszkód, startu i mety
+    wind_gradient_threshold: Optional[float] = None  # Gradient wiatru [(m/s)/NM] zagęszczający siatkę (None - wyłączone)
+
+
+# Dostępne rodzaje siatki
+GRID_MODES = ("poisson", "adaptive", "hex")
 
 
 class PoissonDiskSampler:
-    """Implementacja algorytmu Poisson disk sampling dla generowania siatki"""
+    """Implementacja algorytmu Poisson disk sampling dla generowania siatki
+
+    Próbkowanie odbywa się w lokalnym odwzorowaniu metrycznym (mile morskie),
+    więc min_distance_nm i rozmiar komórek siatki pomocniczej mają spójne
+    jednostki. Dla wybranego punktu aktywnego wszystkie max_attempts
+    kandydatów losowanych jest jedną partią numpy i sprawdzanych hurtowo
+    względem siatki pomocniczej oraz przygotowanego wielokąta korytarza.
+    """
 
     def __init__(self, config: GridConfig):
         self.config = config
         self.cell_size = config.min_distance_nm / np.sqrt(2)
-        self.grid = {}
-        self.active_list = []
-        self.samples = []
+        self.rng = np.random.default_rng(config.seed)
+        self.projection: Optional[LocalProjection] = None
+        self._reset()
 
     def generate_grid(self, start: Point, end: Point,
                       boundary: Optional[Polygon] = None) -> List[Point]:
         """Generuje siatkę punktów między startem a metą"""
+        # Przy zadanym ziarnie ta sama konfiguracja daje zawsze tę samą siatkę
+        self.rng = np.random.default_rng(self.config.seed)
+        self.projection = LocalProjection.around([start.x, end.x], [start.y, end.y])
 
-        # Utwórz korytarz między punktami
+        # Utwórz korytarz między punktami (w NM)
         corridor = self._create_corridor(start, end)
 
         # Jeśli jest granica, użyj przecięcia
         if boundary:
-            corridor = corridor.intersection(boundary)
+            corridor = corridor.intersection(self.projection.project_geometry(boundary))
 
-        # Zresetuj stan
-        self._reset()
+        start_xy = np.array(self.projection.to_xy(start.x, start.y), dtype=float)
+        end_xy = np.array(self.projection.to_xy(end.x, end.y), dtype=float)
+
+        samples_xy = self.sample(corridor, [start_xy])
 
-        # Dodaj punkt startowy
-        self._add_sample(start)
+        # Upewnij się, że punkt końcowy jest w siatce
+        if np.all(np.hypot(*(samples_xy - end_xy).T) >= self.config.min_distance_nm):
+            samples_xy = np.vstack((samples_xy, end_xy))
 
-        # Generuj próbki
+        lons, lats = self.projection.to_lonlat(samples_xy[:, 0], samples_xy[:, 1])
+        self.samples = [Point(lon, lat) for lon, lat in zip(lons.tolist(), lats.tolist())]
+        return self.samples
+
+    def sample(self, area: Polygon, seeds: List[np.ndarray], radius: Optional[float] = None,
+               fixed: Optional[np.ndarray] = None) -> np.ndarray:
+        """Próbkuje obszar (współrzędne w NM) zaczynając od punktów seeds
+
+        Zwraca tablicę (n, 2) punktów odległych od siebie o co najmniej radius
+        (domyślnie min_distance_nm). Punkty seeds są zawsze dołączane do wyniku.
+        Punkty fixed (np. gęstsza siatka sąsiedniego obszaru) nie trafiają do wyniku,
+        ale nowe punkty zachowują od nich odstęp radius, a te leżące przy obszarze
+        służą jako punkty wyjścia próbkowania.
+        """
+        self._reset()
+        self._radius = radius = radius or self.config.min_distance_nm
+        self.cell_size = radius / np.sqrt(2)
+        seeds_xy = np.array(seeds, dtype=float).reshape(-1, 2)
+        if area.is_empty:
+            return seeds_xy
+
+        prepare(area)
+        fixed_tree = None
+        emitters = np.empty((0, 2), dtype=float)
+        if fixed is not None and len(fixed):
+            fixed = np.asarray(fixed, dtype=float).reshape(-1, 2)
+            fixed_tree = cKDTree(fixed)
+            near = shapely.dwithin(area, shapely.points(fixed), 2 * radius)
+            emitters = fixed[near]
+
+        # Części obszaru bez punktu wyjścia dostają własny punkt startowy
+        starts = np.vstack((seeds_xy, emitters))
+        for part in getattr(area, 'geoms', [area]):
+            if len(starts) == 0 or not np.any(shapely.dwithin(part, shapely.points(starts), 2 * radius)):
+                anchor = part.representative_point()
+                if fixed_tree is None or fixed_tree.query([anchor.x, anchor.y])[0] >= radius:
+                    seeds_xy = np.vstack((seeds_xy, [anchor.x, anchor.y]))
+
+        all_points = np.vstack((seeds_xy, emitters))
+        min_x, min_y, max_x, max_y = area.bounds
+        self._origin = np.array([min(min_x, all_points[:, 0].min(initial=min_x)),
+                                 min(min_y, all_points[:, 1].min(initial=min_y))])
+        extent = np.array([max(max_x, all_points[:, 0].max(initial=max_x)),
+                           max(max_y, all_points[:, 1].max(initial=max_y))]) - self._origin
+
+        # Siatka pomocnicza z marginesem 2 komórek (sąsiedztwo 5x5 bez sprawdzania zakresów)
+        shape = (np.ceil(extent / self.cell_size).astype(int) + 1) + 4
+        self.grid = np.full(shape, -1, dtype=np.int64)
+        self._points = np.empty((max(64, len(all_points)), 2), dtype=float)
+
+        # Punkty wyjścia spoza obszaru: tylko na liście aktywnej, bez wpisu do siatki i wyniku
+        for emitter_xy in emitters:
+            self._add_point(emitter_xy, in_grid=False)
+        self._first_sample = len(emitters)
+        for seed_xy in seeds_xy:
+            self._add_sample(seed_xy)
+
+        offsets = np.arange(-2, 3)
         while self.active_list:
             # Wybierz losowy punkt z listy aktywnej
-            idx = random.randint(0, len(self.active_list) - 1)
-            current_point = self.active_list[idx]
+            idx = int(self.rng.integers(len(self.active_list)))
+            center = self._points[self.active_list[idx]]
 
-            # Próbuj wygenerować nowe punkty wokół aktualnego
-            found = False
-            for _ in range(self.config.max_attempts):
-                candidate = self._generate_candidate(current_point)
+            # Wszyscy kandydaci w pierścieniu [r, 2r] jedną partią
+            angles = self.rng.uniform(0.0, 2 * np.pi, self.config.max_attempts)
+            distances = self.rng.uniform(radius, 2 * radius, self.config.max_attempts)
+            candidates = center + np.column_stack((np.cos(angles), np.sin(angles))) * distances[:, None]
+
+            inside = contains_xy(area, candidates[:, 0], candidates[:, 1])
+            candidates = candidates[inside]
+            if len(candidates) and fixed_tree is not None:
+                candidates = candidates[fixed_tree.query(candidates, distance_upper_bound=radius)[0] >= radius]
 
-                if (corridor.contains(candidate) and
-                        self._is_valid_candidate(candidate)):
+            found = False
+            if len(candidates):
+                cells = self._cell_of(candidates)
+                neighbourhood = self.grid[
+                    cells[:, 0, None, None] + offsets[None, :, None],
+                    cells[:, 1, None, None] + offsets[None, None, :]
+                ].reshape(len(candidates), -1)
+
+                neighbours = self._points[np.maximum(neighbourhood, 0)]
+                gaps = np.hypot(*(neighbours - candidates[:, None, :]).transpose(2, 0, 1))
+                valid = np.all((neighbourhood < 0) | (gaps >= radius), axis=1)
+
+                # Dodaj poprawnych kandydatów, pilnując odstępów również wewnątrz partii
+                for candidate in candidates[valid]:
+                    if found and not self._is_valid_candidate(candidate):
+                        continue
                     self._add_sample(candidate)
                     found = True
-                    break
 
             # Jeśli nie znaleziono nowego punktu, usuń z listy aktywnej
             if not found:
                 self.active_list.pop(idx)
 
-        # Upewnij się, że punkt końcowy jest w siatce
-        if not any(self._distance_nm(end, sample) < self.config.min_distance_nm
-                   for sample in self.samples):
-            self.samples.append(end)
-
-        return self.samples
+        return self._points[self._first_sample:self._count].copy()
 
     def _create_corridor(self, start: Point, end: Point) -> Polygon:
-        """Tworzy korytarz między punktami start i end"""
+        """Tworzy korytarz (w NM) między punktami start i end"""
         from shapely.geometry import LineString
 
-        # Utwórz linię między punktami
-        line = LineString([start, end])
-
-        # Rozszerz o margines (w stopniach - przybliżenie)
-        margin_degrees = self.config.corridor_margin_nm / 60.0
-        corridor = line.buffer(margin_degrees)
-
-        return corridor
+        # Utwórz linię między punktami i rozszerz o margines
+        line = self.projection.project_geometry(LineString([start, end]))
+        return line.buffer(self.config.corridor_margin_nm)
 
     def _reset(self):
         """Resetuje stan samplera"""
-        self.grid = {}
+        self.grid = np.full((0, 0), -1, dtype=np.int64)
         self.active_list = []
         self.samples = []
+        self._points = np.empty((0, 2), dtype=float)
+        self._origin = np.zeros(2)
+        self._radius = self.config.min_distance_nm
+        self._count = 0
+        self._first_sample = 0
 
-    def _add_sample(self, point: Point):
+    def _add_sample(self, point_xy: np.ndarray):
         """Dodaje próbkę do siatki"""
-        self.samples.append(point)
-        self.active_list.append(point)
-
-        # Dodaj do siatki przestrzennej
-        grid_x = int(point.x / self.cell_size)
-        grid_y = int(point.y / self.cell_size)
-        self.grid[(grid_x, grid_y)] = point
-
-    def _generate_candidate(self, center: Point) -> Point:
-        """Generuje kandydata w pierścieniu wokół punktu centralnego"""
-        # Generuj losowy kąt
-        angle = random.uniform(0, 2 * np.pi)
-
-        # Generuj losową odległość w pierścieniu
-        min_dist = self.config.min_distance_nm / 60.0  # Konwersja na stopnie
-        max_dist = 2 * min_dist
-        distance = random.uniform(min_dist, max_dist)
-
-        # Oblicz nowe współrzędne
-        new_x = center.x + distance * np.cos(angle)
-        new_y = center.y + distance * np.sin(angle)
-
-        return Point(new_x, new_y)
-
-    def _is_valid_candidate(self, candidate: Point) -> bool:
+        self.samples.append(self._add_point(point_xy, in_grid=True))
+
+    def _add_point(self, point_xy: np.ndarray, in_grid: bool) -> int:
+        """Zapisuje punkt, dodaje go do listy aktywnej i (opcjonalnie) do siatki przestrzennej"""
+        idx = self._count
+        if idx == len(self._points):
+            self._points = np.vstack((self._points, np.empty_like(self._points)))
+        self._points[idx] = point_xy
+        self._count += 1
+        self.active_list.append(idx)
+
+        if in_grid:
+            cell = self._cell_of(point_xy[None, :])[0]
+            self.grid[cell[0], cell[1]] = idx
+        return idx
+
+    def _cell_of(self, points_xy: np.ndarray) -> np.ndarray:
+        """Indeksy komórek siatki pomocniczej (z uwzględnieniem marginesu)"""
+        return np.floor((points_xy - self._origin) / self.cell_size).astype(np.int64) + 2
+
+    def _is_valid_candidate(self, candidate: np.ndarray) -> bool:
         """Sprawdza czy kandydat jest w wystarczającej odległości od innych punktów"""
-        # Sprawdź sąsiadujące komórki w siatce
-        grid_x = int(candidate.x / self.cell_size)
-        grid_y = int(candidate.y / self.cell_size)
-
-        for dx in [-1, 0, 1]:
-            for dy in [-1, 0, 1]:
-                key = (grid_x + dx, grid_y + dy)
-                if key in self.grid:
-                    existing_point = self.grid[key]
-                    if self._distance_nm(candidate, existing_point) < self.config.min_distance_nm:
-                        return False
-
-        return True
+        cell = self._cell_of(candidate[None, :])[0]
+        neighbourhood = self.grid[cell[0] - 2:cell[0] + 3, cell[1] - 2:cell[1] + 3].ravel()
+        neighbourhood = neighbourhood[neighbourhood >= 0]
+        if len(neighbourhood) == 0:
+            return True
+        gaps = np.hypot(*(self._points[neighbourhood] - candidate).T)
+        return bool(np.all(gaps >= self._radius))
 
     def _distance_nm(self, point1: Point, point2: Point) -> float:
         """Oblicza odległość między punktami w milach morskich"""
-        from geopy.distance import geodesic
-        return geodesic(
-            (point1.y, point1.x),
-            (point2.y, point2.x)
-        ).nautical
+        return float(haversine_nm(point1.x, point1.y, point2.x, point2.y))
 
 
 class AdaptiveGridGenerator:
@@ -144,19 +231,29 @@ class AdaptiveGridGenerator:
     def __init__(self, config: GridConfig):
         self.config = config
         self.sampler = PoissonDiskSampler(config)
+        self.lattice: Optional[GridLattice] = None  # Siatka losowa - brak niejawnego sąsiedztwa
 
     def generate_route_grid(self, start: Point, end: Point,
-                            obstacles: List = None) -> List[Point]:
-        """Generuje adaptacyjną siatkę dla routingu"""
+                            obstacles: List = None,
+                            weather_data: Optional[WeatherData] = None) -> List[Point]:
+        """Generuje adaptacyjną siatkę dla routingu
+
+        W trybie "adaptive" siatka jest zagęszczana także tam, gdzie według
+        weather_data zmienia się wiatr (patrz _wind_shift_points).
+        """
 
         # Utwórz granice obszaru
         boundary = self._create_boundary(start, end)
 
         # Usuń przeszkody z granicy
         if obstacles:
-            for obstacle in obstacles:
-                if hasattr(obstacle, 'geom'):
-                    boundary = boundary.difference(obstacle.geom)
+            for geom in ObstacleIndex.ensure(obstacles).geometries:
+                boundary = boundary.difference(geom)
+
+        if self.config.grid_mode == "adaptive":
+            return self._generate_multi_resolution(
+                start, end, boundary, ObstacleIndex.ensure(obstacles), weather_data
+            )
 
         # Generuj siatkę
         grid_points = self.sampler.generate_grid(start, end, boundary)
@@ -167,15 +264,169 @@ class AdaptiveGridGenerator:
 
         return grid_points
 
+    def generate_region_grid(self, points: List[Point], obstacles: List = None) -> List[Point]:
+        """Generuje jednorodną siatkę obszaru obejmującego wszystkie punkty (zapytania zbiorcze)
+
+        Obszar to otoczka wypukła punktów poszerzona o corridor_margin_nm, bez
+        przeszkód. Próbkowanie zaczyna się od podanych punktów, które zachowują
+        odstęp od węzłów, ale nie są zwracane - wywołujący umieszcza je w grafie
+        przed siatką.
+        """
+        lons = np.array([p.x for p in points], dtype=float)
+        lats = np.array([p.y for p in points], dtype=float)
+        projection = LocalProjection.around(lons, lats)
+        self.sampler.rng = np.random.default_rng(self.config.seed)
+        self.sampler.projection = projection
+
+        points_xy = np.column_stack(projection.to_xy(lons, lats))
+        area = MultiPoint(points_xy).convex_hull.buffer(self.config.corridor_margin_nm)
+        for geom in ObstacleIndex.ensure(obstacles).geometries:
+            area = area.difference(projection.project_geometry(geom))
+
+        samples_xy = self.sampler.sample(area, list(points_xy))[len(points_xy):]
+
+        grid_lons, grid_lats = projection.to_lonlat(samples_xy[:, 0], samples_xy[:, 1])
+        return [Point(lon, lat) for lon, lat in zip(grid_lons.tolist(), grid_lats.tolist())]
+
     def _create_boundary(self, start: Point, end: Point) -> Polygon:
         """Tworzy granice obszaru routingu"""
         from shapely.geometry import LineString
 
-        # Utwórz rozszerzony korytarz
-        line = LineString([start, end])
-        margin_degrees = self.config.corridor_margin_nm / 60.0
-
-        return line.buffer(margin_degrees)
+        # Utwórz rozszerzony korytarz (bufor metryczny w lokalnym odwzorowaniu)
+        projection = LocalProjection.around([start.x, end.x], [start.y, end.y])
+        line = projection.project_geometry(LineString([start, end]))
+
+        return projection.unproject_geometry(line.buffer(self.config.corridor_margin_nm))
+
+    def _generate_multi_resolution(self, start: Point, end: Point, boundary: Polygon,
+                                   obstacle_index: ObstacleIndex,
+                                   weather_data: Optional[WeatherData] = None) -> List[Point]:
+        """Siatka wielorozdzielcza: gęsta przy przeszkodach, starcie i mecie, rzadka na otwartej wodzie
+
+        Odstęp punktów rośnie liniowo z odległością d od przeszkód, startu i mety:
+        r(d) = min_distance_nm + spacing_growth * d (do max_spacing_nm). Korytarz
+        dzielony jest na pasma, w których odstęp się podwaja, i każde pasmo
+        próbkowane jest osobno (od najgęstszego) z zachowaniem odstępu od punktów
+        pasm już wygenerowanych. Wierzchołki przeszkód (odsunięte od nich o pół
+        min_distance_nm) są punktami startowymi - tam trasa najczęściej skręca.
+        Strefy zmiany wiatru traktowane są jak przeszkody (gęsto w strefie,
+        rzadko w obszarach o jednorodnym wietrze).
+        """
+        projection = LocalProjection.around([start.x, end.x], [start.y, end.y])
+        self.sampler.rng = np.random.default_rng(self.config.seed)
+
+        corridor = projection.project_geometry(boundary)
+        start_xy = np.array(projection.to_xy(start.x, start.y), dtype=float)
+        end_xy = np.array(projection.to_xy(end.x, end.y), dtype=float)
+
+        obstacles_xy = None
+        if len(obstacle_index):
+            obstacles_xy = projection.project_geometry(shapely.union_all(obstacle_index.geometries))
+        wind_shifts = self._wind_shift_points(projection, corridor, weather_data)
+        hazards = shapely.union_all([shapely.multipoints([start_xy, end_xy]), obstacles_xy, wind_shifts])
+
+        seeds = self._vertex_seeds(corridor, obstacles_xy, np.array([start_xy, end_xy]))
+
+        points = np.empty((0, 2), dtype=float)
+        for radius, band in self._spacing_bands(corridor, hazards):
+            band_points = self.sampler.sample(band, seeds, radius=radius, fixed=points)
+            points = np.vstack((points, band_points))
+            seeds = []
+
+        # Kolejność wzdłuż odcinka start -> meta: czas krawędzi liczony jest od węzła
+        # o mniejszym indeksie, więc tak jak w siatce rosnącej od startu odpowiada
+        # on kierunkowi płynięcia
+        direction = end_xy - start_xy
+        points = points[np.argsort((points - start_xy) @ direction, kind='stable')]
+
+        lons, lats = projection.to_lonlat(points[:, 0], points[:, 1])
+        return [Point(lon, lat) for lon, lat in zip(lons.tolist(), lats.tolist())]
+
+    def _wind_shift_points(self, projection: LocalProjection, corridor: Polygon,
+                           weather_data: Optional[WeatherData]):
+        """Punkty korytarza (w NM), w których gradient wiatru przekracza wind_gradient_threshold
+
+        Wiatr próbkowany jest na rastrze o oczku min_distance_nm. Różnica wektorów
+        wiatru między sąsiednimi oczkami dzielona jest przez typową odległość
+        punktów pogodowych, bo dane pogodowe są przypisywane z najbliższego punktu
+        i zmiana wiatru rozkłada się w rzeczywistości na całą tę odległość.
+        """
+        threshold = self.config.wind_gradient_threshold
+        if weather_data is None or threshold is None:
+            return None
+        station_spacing = weather_data.station_spacing_nm()
+        if not station_spacing:
+            return None
+
+        step = self.config.min_distance_nm
+        min_x, min_y, max_x, max_y = corridor.bounds
+        grid_x, grid_y = np.meshgrid(np.arange(min_x, max_x + step, step),
+                                     np.arange(min_y, max_y + step, step), indexing='ij')
+        lons, lats = projection.to_lonlat(grid_x, grid_y)
+        speeds, directions = weather_data.get_wind_arrays(lons, lats)
+        u = speeds * np.sin(np.radians(directions))
+        v = speeds * np.cos(np.radians(directions))
+
+        # Największa zmiana wektora wiatru do sąsiedniego oczka (w obu osiach)
+        change = np.zeros(u.shape)
+        for axis in (0, 1):
+            jump = np.hypot(np.diff(u, axis=axis), np.diff(v, axis=axis))
+            lower = [slice(None), slice(None)]
+            upper = [slice(None), slice(None)]
+            lower[axis], upper[axis] = slice(None, -1), slice(1, None)
+            change[tuple(lower)] = np.maximum(change[tuple(lower)], jump)
+            change[tuple(upper)] = np.maximum(change[tuple(upper)], jump)
+
+        shifted = (change / station_spacing > threshold) & contains_xy(corridor, grid_x, grid_y)
+        if not np.any(shifted):
+            return None
+        return shapely.multipoints(np.column_stack((grid_x[shifted], grid_y[shifted])))
+
+    def _spacing_bands(self, corridor: Polygon, hazards):
+        """Zwraca pary (odstęp, obszar pasma) od najgęstszego pasma do najrzadszego"""
+        min_spacing = self.config.min_distance_nm
+        max_spacing = max(self.config.max_spacing_nm, min_spacing)
+        growth = self.config.spacing_growth
+        if growth <= 0 or max_spacing <= min_spacing:
+            return [(min_spacing, corridor)]
+
+        radii = [min_spacing]
+        while radii[-1] * 2 < max_spacing:
+            radii.append(radii[-1] * 2)
+        radii.append(max_spacing)
+
+        bands = []
+        covered = None
+        for radius, next_radius in zip(radii, radii[1:] + [None]):
+            if next_radius is None:
+                region = corridor
+            else:
+                # Obszar, w którym r(d) < next_radius
+                region = corridor.intersection(hazards.buffer((next_radius - min_spacing) / growth))
+            band = region if covered is None else region.difference(covered)
+            covered = region
+            if not band.is_empty:
+                bands.append((radius, band))
+        return bands
+
+    def _vertex_seeds(self, corridor: Polygon, obstacles_xy, fixed_seeds: np.ndarray) -> np.ndarray:
+        """Punkty przy wierzchołkach przeszkód (wraz z fixed_seeds), odległe o co najmniej min_distance_nm"""
+        spacing = self.config.min_distance_nm
+        seeds = [seed for seed in fixed_seeds]
+        if obstacles_xy is None:
+            return np.array(seeds)
+
+        # Wierzchołki przeszkód odsunięte na zewnątrz (ostre narożniki zachowane)
+        clearance = obstacles_xy.buffer(spacing / 2, join_style="mitre", mitre_limit=2.0).simplify(spacing / 2)
+        vertices = shapely.get_coordinates(shapely.boundary(clearance))
+        if len(vertices) == 0:
+            return np.array(seeds)
+        vertices = vertices[contains_xy(corridor, vertices[:, 0], vertices[:, 1])]
+
+        for vertex in vertices:
+            if np.all(np.hypot(*(np.array(seeds) - vertex).T) >= spacing):
+                seeds.append(vertex)
+        return np.array(seeds)
 
     def _add_strategic_points(self, start: Point, end: Point,
                               existing_points: List[Point]) -> List[Point]:
@@ -196,6 +447,97 @@ class AdaptiveGridGenerator:
         return strategic_points
 
 
+class HexLatticeGenerator:
+    """Generator regularnej siatki heksagonalnej przyciętej do korytarza
+
+    Sieć o boku min_distance_nm ma początek w punkcie startowym i jedną oś
+    skierowaną na metę. Wszystkie punkty są generowane i przycinane do korytarza
+    (bez przeszkód) jedną operacją numpy, a po generowaniu atrybut lattice
+    opisuje komórki punktów - sąsiedztwo w grafie wynika z samych indeksów.
+    """
+
+    def __init__(self, config: GridConfig):
+        self.config = config
+        self.lattice: Optional[GridLattice] = None
+
+    def generate_route_grid(self, start: Point, end: Point,
+                            obstacles: List = None) -> List[Point]:
+        """Generuje siatkę heksagonalną dla routingu"""
+        from shapely.geometry import LineString
+
+        projection = LocalProjection.around([start.x, end.x], [start.y, end.y])
+        start_xy = np.array(projection.to_xy(start.x, start.y), dtype=float)
+        end_xy = np.array(projection.to_xy(end.x, end.y), dtype=float)
+
+        # Korytarz w NM bez przeszkód
+        corridor = projection.project_geometry(LineString([start, end])).buffer(self.config.corridor_margin_nm)
+        if obstacles:
+            geometries = ObstacleIndex.ensure(obstacles).geometries
+            if len(geometries):
+                corridor = corridor.difference(projection.project_geometry(shapely.union_all(geometries)))
+        prepare(corridor)
+
+        return self._cut_lattice(corridor, projection, start_xy, self._basis(end_xy - start_xy))
+
+    def generate_region_grid(self, points: List[Point], obstacles: List = None) -> List[Point]:
+        """Generuje siatkę heksagonalną obszaru obejmującego wszystkie punkty (graf regionalny)
+
+        Obszar to otoczka wypukła punktów poszerzona o corridor_margin_nm, bez
+        przeszkód. Sieć ma początek w pierwszym punkcie i oś skierowaną na wschód,
+        więc ta sama lista punktów daje zawsze tę samą siatkę.
+        """
+        lons = np.array([p.x for p in points], dtype=float)
+        lats = np.array([p.y for p in points], dtype=float)
+        projection = LocalProjection.around(lons, lats)
+        points_xy = np.column_stack(projection.to_xy(lons, lats))
+
+        area = MultiPoint(points_xy).convex_hull.buffer(self.config.corridor_margin_nm)
+        if obstacles:
+            geometries = ObstacleIndex.ensure(obstacles).geometries
+            if len(geometries):
+                area = area.difference(projection.project_geometry(shapely.union_all(geometries)))
+        prepare(area)
+
+        return self._cut_lattice(area, projection, points_xy[0], self._basis(np.array([1.0, 0.0])))
+
+    def _cut_lattice(self, area: Polygon, projection: LocalProjection, origin_xy: np.ndarray,
+                     basis: np.ndarray) -> List[Point]:
+        """Punkty sieci o początku origin_xy leżące w obszarze (NM); ustawia self.lattice"""
+        # Zakres komórek pokrywający prostokąt otaczający obszar
+        min_x, min_y, max_x, max_y = area.bounds
+        corners = np.array([[min_x, min_y], [min_x, max_y], [max_x, min_y], [max_x, max_y]]) - origin_xy
+        corner_cells = corners @ np.linalg.inv(basis)
+        low = np.floor(corner_cells.min(axis=0)).astype(int)
+        high = np.ceil(corner_cells.max(axis=0)).astype(int)
+
+        a, b = np.meshgrid(np.arange(low[0], high[0] + 1), np.arange(low[1], high[1] + 1), indexing='ij')
+        cells = np.column_stack((a.ravel(), b.ravel()))
+        xy = origin_xy + cells @ basis
+
+        inside = contains_xy(area, xy[:, 0], xy[:, 1])
+        cells, xy = cells[inside], xy[inside]
+
+        self.lattice = GridLattice(cells=cells, basis_nm=basis)
+        lons, lats = projection.to_lonlat(xy[:, 0], xy[:, 1])
+        return [Point(lon, lat) for lon, lat in zip(lons.tolist(), lats.tolist())]
+
+    def _basis(self, direction: np.ndarray) -> np.ndarray:
+        """Wektory bazowe sieci heksagonalnej (pierwszy w kierunku direction)"""
+        spacing = self.config.min_distance_nm
+        angle = np.arctan2(direction[1], direction[0]) if np.any(direction) else 0.0
+        angles = np.array([angle, angle + np.pi / 3])
+        return spacing * np.column_stack((np.cos(angles), np.sin(angles)))
+
+
+def create_grid_generator(config: GridConfig):
+    """Tworzy generator siatki odpowiedni dla config.grid_mode"""
+    if config.grid_mode == "hex":
+        return HexLatticeGenerator(config)
+    if config.grid_mode in ("poisson", "adaptive"):
+        return AdaptiveGridGenerator(config)
+    raise ValueError(f"Nieznany rodzaj siatki: {config.grid_mode}")
+
+
 # Funkcje pomocnicze
 def create_default_grid(start: Point, end: Point,
                         resolution_nm: float = 0.5) -> List[Point]:
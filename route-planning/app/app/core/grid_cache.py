@@ -0,0 +1,156 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import List, Optional, Tuple
+
+import numpy as np
+from shapely.geometry import Point
+
+from app.core.config import settings
+from app.core.grid import AdaptiveGridGenerator, GridConfig
+from app.core.obstacles import ObstacleIndex
+from app.core.weather import WeatherData
+
+
+@dataclass(frozen=True)
+class GridCacheKey:
+    """Klucz siatki: skwantowany korytarz, parametry siatki, wersja przeszkód i danych wiatru"""
+    start: Tuple[int, int]
+    end: Tuple[int, int]
+    quantum_deg: float
+    min_distance_nm: float
+    corridor_margin_nm: float
+    max_attempts: int
+    grid_mode: str
+    max_spacing_nm: float
+    spacing_growth: float
+    wind_gradient_threshold: Optional[float]
+    obstacle_version: str
+    weather_version: str
+
+    @property
+    def seed(self) -> int:
+        """Ziarno generatora wyprowadzone z klucza (siatka jest odtwarzalna)"""
+        digest = hashlib.sha1(repr(self).encode()).digest()
+        return int.from_bytes(digest[:8], "little")
+
+    def points(self) -> Tuple[Point, Point]:
+        """Skwantowane punkty startu i mety"""
+        return (
+            Point(self.start[0] * self.quantum_deg, self.start[1] * self.quantum_deg),
+            Point(self.end[0] * self.quantum_deg, self.end[1] * self.quantum_deg)
+        )
+
+
+class GridCache:
+    """Pamięć podręczna siatek routingu z wyrzucaniem LRU i limitem pamięci
+
+    Zapytania o prawie ten sam odcinek (np. wokół tych samych znaków regatowych)
+    trafiają w ten sam klucz, bo start i meta są kwantowane do quantum_deg.
+    Siatka generowana jest dla skwantowanych punktów z ziarnem wyprowadzonym
+    z klucza, więc wynik nie zależy od tego, które zapytanie ją utworzyło.
+    Siatki przechowywane są jako tablice (n, 2) lon/lat.
+    """
+
+    def __init__(self, max_bytes: int = settings.GRID_CACHE_MAX_BYTES,
+                 quantum_deg: float = settings.GRID_CACHE_QUANTUM_DEG):
+        self.max_bytes = max_bytes
+        self.quantum_deg = quantum_deg
+        self._entries: "OrderedDict[GridCacheKey, np.ndarray]" = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, start: Point, end: Point, config: GridConfig,
+                 obstacle_index: ObstacleIndex,
+                 weather_data: Optional[WeatherData] = None) -> GridCacheKey:
+        """Buduje klucz siatki dla odcinka start -> meta"""
+        # Dane pogodowe wpływają tylko na siatkę wielorozdzielczą
+        uses_weather = weather_data is not None and config.grid_mode == "adaptive" \
+            and config.wind_gradient_threshold is not None
+        return GridCacheKey(
+            start=self._quantize(start),
+            end=self._quantize(end),
+            quantum_deg=self.quantum_deg,
+            min_distance_nm=float(config.min_distance_nm),
+            corridor_margin_nm=float(config.corridor_margin_nm),
+            max_attempts=int(config.max_attempts),
+            grid_mode=config.grid_mode,
+            max_spacing_nm=float(config.max_spacing_nm),
+            spacing_growth=float(config.spacing_growth),
+            wind_gradient_threshold=config.wind_gradient_threshold,
+            obstacle_version=obstacle_index.version,
+            weather_version=weather_data.version if uses_weather else ""
+        )
+
+    def get_route_grid(self, start: Point, end: Point, config: GridConfig,
+                       obstacle_index: Optional[ObstacleIndex] = None,
+                       weather_data: Optional[WeatherData] = None) -> List[Point]:
+        """Zwraca siatkę z pamięci podręcznej lub generuje ją i zapamiętuje"""
+        obstacle_index = ObstacleIndex.ensure(obstacle_index)
+        key = self.make_key(start, end, config, obstacle_index, weather_data)
+
+        coords = self.get(key)
+        if coords is None:
+            quantized_start, quantized_end = key.points()
+            generator = AdaptiveGridGenerator(replace(config, seed=key.seed))
+            grid_points = generator.generate_route_grid(
+                quantized_start, quantized_end, obstacle_index,
+                weather_data if key.weather_version else None
+            )
+            coords = np.array([(p.x, p.y) for p in grid_points], dtype=float).reshape(-1, 2)
+            self.put(key, coords)
+
+        return [Point(lon, lat) for lon, lat in coords.tolist()]
+
+    def get(self, key: GridCacheKey) -> Optional[np.ndarray]:
+        """Zwraca zapamiętaną siatkę (i oznacza ją jako ostatnio używaną)"""
+        with self._lock:
+            coords = self._entries.get(key)
+            if coords is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return coords
+
+    def put(self, key: GridCacheKey, coords: np.ndarray):
+        """Zapamiętuje siatkę, usuwając najdawniej używane wpisy ponad limit pamięci"""
+        coords = np.ascontiguousarray(coords, dtype=float)
+        coords.setflags(write=False)
+        if coords.nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size_bytes -= previous.nbytes
+            self._entries[key] = coords
+            self._size_bytes += coords.nbytes
+
+            while self._size_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size_bytes -= evicted.nbytes
+
+    def clear(self):
+        """Czyści pamięć podręczną"""
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _quantize(self, point: Point) -> Tuple[int, int]:
+        """Kwantuje współrzędne punktu do wielokrotności quantum_deg"""
+        return int(round(point.x / self.quantum_deg)), int(round(point.y / self.quantum_deg))
+
+
+# Wspólna pamięć podręczna siatek dla całej aplikacji
+grid_cache = GridCache()
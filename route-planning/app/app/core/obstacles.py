@@ -0,0 +1,107 @@
+import hashlib
+
+import numpy as np
+import shapely
+from shapely import wkb
+from shapely.geometry import Point
+from shapely.geometry.base import BaseGeometry
+from shapely.strtree import STRtree
+from typing import List, Optional
+
+
+class ObstacleIndex:
+    """Indeks kolizji z przeszkodami budowany raz na obliczenie trasy
+
+    Geometrie przeszkód są dekodowane z WKB jeden raz, przygotowywane
+    (shapely.prepare) i umieszczane w drzewie STRtree. Sprawdzanie kolizji
+    odbywa się hurtowo dla tablic odcinków z użyciem wektorowych predykatów.
+    """
+
+    # Liczba odcinków sprawdzanych w jednej partii (ogranicza zużycie pamięci)
+    BATCH_SIZE = 200_000
+
+    def __init__(self, obstacles: Optional[List] = None):
+        geometries = []
+        for obstacle in obstacles or []:
+            geom = self.decode_geometry(obstacle)
+            if geom is not None and not geom.is_empty:
+                geometries.append(geom)
+
+        self.geometries = np.array(geometries, dtype=object)
+        shapely.prepare(self.geometries)
+        self.tree = STRtree(self.geometries) if len(self.geometries) else None
+        self._version: Optional[str] = None
+
+    @classmethod
+    def ensure(cls, obstacles) -> "ObstacleIndex":
+        """Zwraca indeks - istniejący lub zbudowany z listy przeszkód"""
+        if isinstance(obstacles, cls):
+            return obstacles
+        return cls(obstacles)
+
+    @staticmethod
+    def decode_geometry(obstacle) -> Optional[BaseGeometry]:
+        """Konwertuje przeszkodę (model z PostGIS lub geometrię Shapely) na geometrię"""
+        if isinstance(obstacle, BaseGeometry):
+            return obstacle
+
+        try:
+            if hasattr(obstacle, 'geom') and obstacle.geom:
+                # Konwertuj geometrię z PostGIS
+                if hasattr(obstacle.geom, 'data'):
+                    return wkb.loads(bytes(obstacle.geom.data))
+                if isinstance(obstacle.geom, BaseGeometry):
+                    return obstacle.geom
+        except Exception:
+            # Jeśli konwersja się nie powiedzie, pomiń przeszkodę
+            pass
+
+        return None
+
+    def __len__(self) -> int:
+        return len(self.geometries)
+
+    @property
+    def version(self) -> str:
+        """Skrót zbioru przeszkód (niezależny od kolejności) - zmienia się przy każdej zmianie geometrii"""
+        if self._version is None:
+            digest = hashlib.sha1()
+            for geom_wkb in sorted(shapely.to_wkb(self.geometries).tolist()):
+                digest.update(geom_wkb)
+            self._version = digest.hexdigest()
+        return self._version
+
+    def segments_blocked(self, x1: np.ndarray, y1: np.ndarray,
+                         x2: np.ndarray, y2: np.ndarray) -> np.ndarray:
+        """Zwraca maskę odcinków (x1, y1) -> (x2, y2) przecinających dowolną przeszkodę"""
+        count = len(x1)
+        blocked = np.zeros(count, dtype=bool)
+        if self.tree is None or count == 0:
+            return blocked
+
+        for offset in range(0, count, self.BATCH_SIZE):
+            batch = slice(offset, offset + self.BATCH_SIZE)
+            coords = np.stack((
+                np.column_stack((x1[batch], y1[batch])),
+                np.column_stack((x2[batch], y2[batch]))
+            ), axis=1)
+            lines = shapely.linestrings(coords)
+
+            # Kandydaci z drzewa (przecięcie prostokątów otaczających)
+            line_idx, obstacle_idx = self.tree.query(lines)
+            if len(line_idx) == 0:
+                continue
+
+            # Dokładny test na przygotowanych geometriach przeszkód
+            hits = shapely.intersects(self.geometries[obstacle_idx], lines[line_idx])
+            blocked[offset + line_idx[hits]] = True
+
+        return blocked
+
+    def can_connect(self, point1: Point, point2: Point) -> bool:
+        """Sprawdza czy odcinek między dwoma punktami omija wszystkie przeszkody"""
+        blocked = self.segments_blocked(
+            np.array([point1.x]), np.array([point1.y]),
+            np.array([point2.x]), np.array([point2.y])
+        )
+        return not blocked[0]
@@ -0,0 +1,136 @@
+import json
+import numpy as np
+from typing import Any, Dict, Optional, Sequence, Union
+
+# Przelicznik prędkości: węzły -> m/s
+KNOTS_TO_MS = 0.514444
+
+
+def normalize_twa(twa) -> np.ndarray:
+    """Sprowadza kąt względem wiatru do zakresu 0-180 stopni"""
+    twa = np.abs(np.asarray(twa, dtype=float)) % 360
+    return np.where(twa > 180, 360 - twa, twa)
+
+
+class PolarTable:
+    """Skompilowana tablica polarna TWA × TWS z interpolacją dwuliniową
+
+    Tablica jest gęsta i równomierna (domyślnie co 1° TWA i co 0.5 m/s TWS),
+    więc indeks komórki wyznaczany jest arytmetycznie, bez wyszukiwania.
+    Prędkość wiatru (TWS) podawana jest w m/s, tak jak w WindData,
+    a prędkość łodzi zwracana jest w węzłach.
+    """
+
+    TWA_STEP = 1.0
+    TWS_STEP = 0.5
+    TWS_MAX = 30.0
+
+    def __init__(self, speeds: np.ndarray, twa_step: float = TWA_STEP, tws_step: float = TWS_STEP):
+        self.speeds = np.ascontiguousarray(speeds, dtype=float)
+        self.twa_step = twa_step
+        self.tws_step = tws_step
+        self.twa_axis = np.arange(self.speeds.shape[0]) * twa_step
+        self.tws_axis = np.arange(self.speeds.shape[1]) * tws_step
+
+    @classmethod
+    def axes(cls):
+        """Zwraca osie gęstej tablicy (TWA w stopniach, TWS w m/s)"""
+        twa_axis = np.arange(0.0, 180.0 + cls.TWA_STEP / 2, cls.TWA_STEP)
+        tws_axis = np.arange(0.0, cls.TWS_MAX + cls.TWS_STEP / 2, cls.TWS_STEP)
+        return twa_axis, tws_axis
+
+    @classmethod
+    def from_twa_curve(cls, twa_values: Sequence[float], speed_values: Sequence[float]) -> "PolarTable":
+        """Kompiluje jednowymiarową polarę (prędkość od TWA) do tablicy TWA × TWS
+
+        Wpływ wiatru modelowany jest współczynnikiem min(TWS / 10, 1.5),
+        tak jak w dotychczasowym SailingPolar.get_speed.
+        """
+        twa_axis, tws_axis = cls.axes()
+        base_speed = np.interp(twa_axis, twa_values, speed_values)
+        wind_factor = np.minimum(tws_axis / 10.0, 1.5)
+        return cls(np.outer(base_speed, wind_factor))
+
+    @classmethod
+    def from_grid(cls, twa_values: Sequence[float], tws_values_ms: Sequence[float],
+                  speeds: Sequence[Sequence[float]]) -> "PolarTable":
+        """Kompiluje polarę zadaną na dowolnej siatce TWA × TWS (wiersze - TWA, kolumny - TWS)"""
+        twa_values = np.asarray(twa_values, dtype=float)
+        tws_values_ms = np.asarray(tws_values_ms, dtype=float)
+        speeds = np.asarray(speeds, dtype=float)
+        if speeds.shape != (len(twa_values), len(tws_values_ms)):
+            raise ValueError("Wymiary tablicy prędkości nie pasują do osi TWA i TWS")
+
+        twa_order = np.argsort(twa_values)
+        tws_order = np.argsort(tws_values_ms)
+        twa_values, tws_values_ms = twa_values[twa_order], tws_values_ms[tws_order]
+        speeds = speeds[twa_order][:, tws_order]
+
+        # Przepróbkowanie na gęstą siatkę: najpierw po TWS (wiersze), potem po TWA (kolumny)
+        twa_axis, tws_axis = cls.axes()
+        by_tws = np.array([np.interp(tws_axis, tws_values_ms, row) for row in speeds])
+        return cls(np.array([np.interp(twa_axis, twa_values, column) for column in by_tws.T]).T)
+
+    @classmethod
+    def from_profile_data(cls, polar_data: Union[str, Dict[str, Any], list]) -> "PolarTable":
+        """Kompiluje dane polarne z profilu łodzi (BoatProfile.polar_data)
+
+        Obsługiwane formaty:
+        - {"twa": [...], "tws": [...], "speeds": [[...], ...]} - pełna polara,
+          TWS w węzłach, wiersze tablicy odpowiadają kolejnym TWA,
+        - {"twa": [...], "speed": [...]} - prędkość tylko od TWA,
+        - [{"twa": ..., "speed": ...}, ...] - jak wyżej, jako lista punktów.
+        """
+        if isinstance(polar_data, str):
+            polar_data = json.loads(polar_data)
+
+        if isinstance(polar_data, list):
+            points = sorted(((float(p["twa"]), float(p["speed"])) for p in polar_data))
+            return cls.from_twa_curve([p[0] for p in points], [p[1] for p in points])
+
+        if not isinstance(polar_data, dict) or "twa" not in polar_data:
+            raise ValueError("Nieprawidłowy format danych polarnych")
+
+        if "speeds" in polar_data:
+            tws_ms = np.asarray(polar_data["tws"], dtype=float) * KNOTS_TO_MS
+            return cls.from_grid(polar_data["twa"], tws_ms, polar_data["speeds"])
+
+        order = np.argsort(np.asarray(polar_data["twa"], dtype=float))
+        return cls.from_twa_curve(
+            np.asarray(polar_data["twa"], dtype=float)[order],
+            np.asarray(polar_data["speed"], dtype=float)[order]
+        )
+
+    def get_speeds(self, twa, tws) -> np.ndarray:
+        """Zwraca prędkości łodzi (węzły) dla tablic TWA (stopnie) i TWS (m/s)"""
+        twa = normalize_twa(twa)
+        tws = np.asarray(tws, dtype=float)
+
+        twa_idx, twa_frac = self._cell(twa / self.twa_step, self.speeds.shape[0])
+        tws_idx, tws_frac = self._cell(tws / self.tws_step, self.speeds.shape[1])
+
+        s = self.speeds
+        return (
+            s[twa_idx, tws_idx] * (1 - twa_frac) * (1 - tws_frac)
+            + s[twa_idx + 1, tws_idx] * twa_frac * (1 - tws_frac)
+            + s[twa_idx, tws_idx + 1] * (1 - twa_frac) * tws_frac
+            + s[twa_idx + 1, tws_idx + 1] * twa_frac * tws_frac
+        )
+
+    def get_speed(self, twa: float, tws: float) -> float:
+        """Zwraca prędkość łodzi dla pojedynczej pary TWA / TWS"""
+        return float(self.get_speeds(twa, tws))
+
+    def max_speed(self, tws_max: Optional[float] = None) -> float:
+        """Maksymalna prędkość łodzi dla wiatru nie silniejszego niż tws_max (m/s)"""
+        if tws_max is None:
+            return float(self.speeds.max())
+        columns = int(np.ceil(min(tws_max, self.tws_axis[-1]) / self.tws_step)) + 1
+        return float(self.speeds[:, :columns].max())
+
+    @staticmethod
+    def _cell(position: np.ndarray, size: int):
+        """Indeks lewej komórki i ułamek położenia w komórce (z obcięciem do zakresu)"""
+        position = np.clip(position, 0, size - 1)
+        idx = np.minimum(position.astype(np.int64), size - 2)
+        return idx, position - idx
@@ -0,0 +1,352 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import shapely
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from shapely.geometry import Point
+
+from app.core.config import settings
+from app.core.graph import CSRGraph, NoPathError, SearchResult, reconstruct_path
+from app.core.graph_store import open_graph_file, write_graph_file
+from app.core.grid import GridConfig, HexLatticeGenerator
+from app.core.obstacles import ObstacleIndex
+from app.core.routing import SailingPolar, SearchStatistics
+from app.core.spatial import LatticeIndex, PointIndex
+from app.core.travel_time import calculate_travel_times
+from app.core.weather import WeatherData
+from app.utils.geodesy import initial_bearing
+
+logger = logging.getLogger(__name__)
+
+
+# Najbliższe węzły sprawdzane przy dołączaniu startu i mety spoza zasięgu krawędzi grafu regionalnego
+SNAP_CANDIDATES = 8
+
+
+@dataclass(frozen=True)
+class RegionKey:
+    """Klucz grafu regionalnego: obszar, parametry siatki i wersja przeszkód"""
+    bounds: Tuple[float, float, float, float]  # (west, south, east, north)
+    resolution_nm: float
+    connection_nm: float
+    obstacle_version: str
+
+
+class RegionalGraph:
+    """Graf całego akwenu wspólny dla powtarzanych zapytań
+
+    Topologia (siatka heksagonalna obszaru, krawędzie w promieniu connection_nm
+    bez kolizji z przeszkodami, ich długości i kursy) liczona jest raz dla wersji
+    przeszkód - w procesie (build) albo wcześniej, przez krok budowania
+    zapisujący ją do pliku mapowanego przez wszystkie procesy robocze
+    (save / load). Czasy przejścia krawędzi dla pary (dane wiatru, polara)
+    zapamiętywane są w małej pamięci LRU, a trasy liczy Dijkstra ze scipy
+    na całym grafie (find_route).
+
+    Podgraf korytarza wycinany z grafu okazał się wolniejszy od Dijkstry na
+    całym grafie i gubił trasy wychodzące poza korytarz, a hierarchia kontrakcji
+    (contraction.py) - wolniejsza od Dijkstry i zajmująca setki MB
+    (bench_graph_store, bench_contraction).
+    """
+
+    def __init__(self, key: RegionKey, obstacle_index: ObstacleIndex, graph: CSRGraph, bearings: np.ndarray,
+                 weights_cache_size: int = settings.REGIONAL_WEIGHTS_CACHE_SIZE):
+        self.key = key
+        self.obstacle_index = obstacle_index
+        self.graph = graph
+        self.bearings = bearings  # Kurs każdej krawędzi skierowanej grafu (stopnie)
+        self.weights_cache_size = weights_cache_size
+        self.point_index = PointIndex(graph.lons, graph.lats)
+        self._weights: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, key: RegionKey, obstacle_index: ObstacleIndex) -> "RegionalGraph":
+        """Buduje topologię grafu obszaru"""
+        west, south, east, north = key.bounds
+        corners = [Point(west, south), Point(east, south), Point(east, north), Point(west, north)]
+        generator = HexLatticeGenerator(GridConfig(
+            min_distance_nm=key.resolution_nm, corridor_margin_nm=0.0, grid_mode="hex"
+        ))
+        points = generator.generate_region_grid(corners, obstacle_index)
+        lons = np.array([p.x for p in points], dtype=float)
+        lats = np.array([p.y for p in points], dtype=float)
+
+        # Sąsiedztwo z indeksów komórek sieci, kolizje - jedno hurtowe zapytanie
+        index = LatticeIndex(lons, lats, generator.lattice, np.arange(len(points)))
+        pairs_i, pairs_j, distances = index.pairs_within(key.connection_nm)
+        blocked = obstacle_index.segments_blocked(lons[pairs_i], lats[pairs_i], lons[pairs_j], lats[pairs_j])
+        pairs_i, pairs_j, distances = pairs_i[~blocked], pairs_j[~blocked], distances[~blocked]
+
+        graph = CSRGraph.from_edges(lons, lats, pairs_i, pairs_j, distances, np.zeros(len(pairs_i)))
+        src = np.repeat(np.arange(graph.num_nodes), np.diff(graph.indptr))
+        bearings = initial_bearing(lons[src], lats[src], lons[graph.indices], lats[graph.indices])
+        return cls(key, obstacle_index, graph, bearings)
+
+    @classmethod
+    def load(cls, path: str) -> "RegionalGraph":
+        """Otwiera graf zapisany przez save() - tablice są mapowane z pliku tylko do odczytu"""
+        arrays, metadata = open_graph_file(path)
+        key = RegionKey(
+            bounds=tuple(metadata["bounds"]),
+            resolution_nm=metadata["resolution_nm"],
+            connection_nm=metadata["connection_nm"],
+            obstacle_version=metadata["obstacle_version"]
+        )
+        wkb, offsets = arrays["obstacles.wkb"], arrays["obstacles.offsets"].tolist()
+        obstacle_index = ObstacleIndex(shapely.from_wkb(
+            [wkb[start:end].tobytes() for start, end in zip(offsets[:-1], offsets[1:])]
+        ).tolist())
+        graph = CSRGraph(**{name: arrays[f"graph.{name}"]
+                            for name in ("lons", "lats", "indptr", "indices", "distances", "times")})
+        return cls(key, obstacle_index, graph, arrays["graph.bearings"])
+
+    def save(self, path: str):
+        """Zapisuje graf i przeszkody do pliku mapowanego przez procesy robocze"""
+        graph = self.graph
+        wkb = shapely.to_wkb(self.obstacle_index.geometries).tolist()
+        arrays = {
+            "graph.lons": graph.lons, "graph.lats": graph.lats, "graph.indptr": graph.indptr,
+            "graph.indices": graph.indices, "graph.distances": graph.distances, "graph.times": graph.times,
+            "graph.bearings": self.bearings,
+            "obstacles.wkb": np.frombuffer(b"".join(wkb), dtype=np.uint8),
+            "obstacles.offsets": np.concatenate(([0], np.cumsum([len(b) for b in wkb], dtype=np.int64))),
+        }
+        write_graph_file(path, arrays, {
+            "bounds": list(self.key.bounds),
+            "resolution_nm": self.key.resolution_nm,
+            "connection_nm": self.key.connection_nm,
+            "obstacle_version": self.key.obstacle_version
+        })
+
+    def weights(self, weather_data: WeatherData, polar: SailingPolar) -> Tuple[np.ndarray, int]:
+        """Czasy przejścia krawędzi skierowanych grafu dla danych wiatru i polary oraz liczba policzonych krawędzi
+
+        Czasy liczone są tylko przy pierwszym użyciu pary (wiatr, polara).
+        """
+        key = (weather_data.version, _polar_digest(polar))
+        with self._lock:
+            times = self._weights.get(key)
+            if times is not None:
+                self._weights.move_to_end(key)
+                return times, 0
+
+        times = self._edge_times(self.graph, self.bearings, weather_data, polar)
+
+        with self._lock:
+            self._weights[key] = times
+            while len(self._weights) > self.weights_cache_size:
+                self._weights.popitem(last=False)
+        return times, len(times)
+
+    def find_route(self, start: Point, end: Point, weather_data: WeatherData,
+                   polar: SailingPolar) -> Tuple[List[Point], float, SearchStatistics]:
+        """Najszybsza trasa start -> meta: (punkty trasy, czas w godzinach, statystyki)
+
+        Start i meta dołączane są do kilku najbliższych węzłów grafu, do których
+        prowadzi odcinek bez kolizji - czas tych odcinków wlicza się do
+        wyszukiwania, więc krótki odcinek pod wiatr nie wymusza złego węzła.
+        Bez ścieżki w grafie - linia prosta.
+        """
+        times, evaluated = self.weights(weather_data, polar)
+        sources, source_costs = self._attach(start, weather_data, polar, outbound=True)
+        targets, target_costs = self._attach(end, weather_data, polar, outbound=False)
+        statistics = SearchStatistics(
+            search_mode="eager",
+            edges_evaluated=evaluated + len(sources) + len(targets),
+            edges_possible=self.graph.num_edges,
+            heuristic="none"
+        )
+
+        try:
+            if not len(sources) or not len(targets):
+                raise NoPathError("Start lub meta nie mają połączenia z grafem regionalnym")
+            result = self._dijkstra_between(times, sources, source_costs, targets, target_costs)
+        except NoPathError:
+            statistics.path_found = False
+            return [start, end], self._travel_time([start], [end], weather_data, polar), statistics
+
+        statistics.nodes_expanded = result.nodes_expanded
+        lons, lats = self.graph.lons, self.graph.lats
+        route = [start] + [Point(lons[node], lats[node]) for node in result.path] + [end]
+        return route, result.cost, statistics
+
+    def _dijkstra_between(self, times: np.ndarray, sources: np.ndarray, source_costs: np.ndarray,
+                          targets: np.ndarray, target_costs: np.ndarray) -> SearchResult:
+        """Najszybsza ścieżka z dowolnego źródła do dowolnego celu (Dijkstra ze scipy)
+
+        Źródła łączy dodatkowy węzeł (wiersz n macierzy) krawędziami o kosztach
+        source_costs; target_costs dolicza się do etykiet celów.
+        """
+        graph = self.graph
+        n = graph.num_nodes
+        matrix = csr_matrix((
+            np.concatenate((times, source_costs)),
+            np.concatenate((graph.indices, sources)),
+            np.concatenate((graph.indptr, [graph.indptr[-1] + len(sources)]))
+        ), shape=(n + 1, n + 1))
+        costs, predecessors = dijkstra(matrix, directed=True, indices=n, return_predecessors=True)
+
+        totals = costs[targets] + target_costs
+        best = int(np.argmin(totals))
+        if not np.isfinite(totals[best]):
+            raise NoPathError(f"Węzły {targets.tolist()} nie są osiągalne z {sources.tolist()}")
+        return SearchResult(
+            path=reconstruct_path(predecessors, n, int(targets[best]))[1:],
+            cost=float(totals[best]),
+            nodes_expanded=int(np.isfinite(costs[:n]).sum())
+        )
+
+    @staticmethod
+    def _edge_times(graph: CSRGraph, bearings: np.ndarray, weather_data: WeatherData,
+                    polar: SailingPolar) -> np.ndarray:
+        """Czasy przejścia krawędzi skierowanych grafu z zapisanych długości i kursów"""
+        src = np.repeat(np.arange(graph.num_nodes), np.diff(graph.indptr))
+        return calculate_travel_times(
+            graph.lons[src], graph.lats[src], graph.lons[graph.indices], graph.lats[graph.indices],
+            weather_data, polar, wind_samples=settings.WIND_SAMPLES_PER_EDGE,
+            geometry=(graph.distances, bearings)
+        )
+
+    def _attach(self, point: Point, weather_data: WeatherData, polar: SailingPolar,
+                outbound: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """Pobliskie węzły połączone z punktem odcinkiem bez kolizji i czasy tych odcinków
+
+        outbound=True - odcinki od punktu do węzłów (start), inaczej od węzłów do punktu (meta).
+        Kandydatami są węzły w promieniu krawędzi grafu (connection_nm) - jak
+        sąsiedzi węzła grafu - a poza zasięgiem grafu SNAP_CANDIDATES najbliższych.
+        Węzły z nieskończonym czasem odcinka są pomijane.
+        """
+        candidates, _ = self.point_index.within(point.x, point.y, self.key.connection_nm)
+        if not len(candidates):
+            k = min(SNAP_CANDIDATES, self.graph.num_nodes)
+            if k == 0:
+                return np.empty(0, dtype=np.int64), np.empty(0)
+            candidates = np.atleast_1d(self.point_index.nearest([point.x], [point.y], k=k)[0])
+        k = len(candidates)
+        lons, lats = self.graph.lons[candidates], self.graph.lats[candidates]
+        px, py = np.full(k, point.x), np.full(k, point.y)
+        blocked = self.obstacle_index.segments_blocked(px, py, lons, lats)
+
+        if outbound:
+            times = calculate_travel_times(px, py, lons, lats, weather_data, polar,
+                                           wind_samples=settings.WIND_SAMPLES_PER_EDGE)
+        else:
+            times = calculate_travel_times(lons, lats, px, py, weather_data, polar,
+                                           wind_samples=settings.WIND_SAMPLES_PER_EDGE)
+        usable = ~blocked & np.isfinite(times)
+        return candidates[usable], times[usable]
+
+    @staticmethod
+    def _travel_time(starts: List[Point], ends: List[Point], weather_data: WeatherData,
+                     polar: SailingPolar) -> float:
+        """Łączny czas przejścia odcinków starts[k] -> ends[k]"""
+        times = calculate_travel_times(
+            np.array([p.x for p in starts]), np.array([p.y for p in starts]),
+            np.array([p.x for p in ends]), np.array([p.y for p in ends]),
+            weather_data, polar, wind_samples=settings.WIND_SAMPLES_PER_EDGE
+        )
+        return float(times.sum())
+
+
+class RegionalGraphCache:
+    """Grafy regionalne procesu: zapisane przez krok budowania i budowane w procesie (LRU)
+
+    Grafy skonfigurowanych regionów (settings.REGIONAL_GRAPH_REGIONS) zapisane
+    w katalogu directory są mapowane z plików tylko do odczytu - otwarcie
+    jest natychmiastowe, a strony pamięci są wspólne dla wszystkich procesów.
+    Graf, którego nie ma w plikach (np. po zmianie przeszkód), budowany jest
+    w procesie pod blokadą - budowa zajmuje sekundy, więc równoległe zapytania
+    o ten sam obszar czekają na jeden wynik.
+    """
+
+    def __init__(self, max_size: int = settings.REGIONAL_GRAPH_CACHE_SIZE,
+                 directory: str = settings.REGIONAL_GRAPH_DIR):
+        self.max_size = max_size
+        self.directory = directory
+        self._entries: "OrderedDict[RegionKey, RegionalGraph]" = OrderedDict()
+        self._stored: Optional[Dict[RegionKey, RegionalGraph]] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(bounds: dict, obstacle_index: ObstacleIndex,
+                 resolution_nm: float = settings.REGIONAL_GRAPH_RESOLUTION_NM,
+                 connection_nm: float = settings.REGIONAL_GRAPH_CONNECTION_NM) -> RegionKey:
+        """Klucz grafu dla granic obszaru w postaci {north, south, east, west}"""
+        return RegionKey(
+            bounds=(float(bounds["west"]), float(bounds["south"]), float(bounds["east"]), float(bounds["north"])),
+            resolution_nm=float(resolution_nm),
+            connection_nm=float(connection_nm),
+            obstacle_version=obstacle_index.version
+        )
+
+    def load_stored(self) -> int:
+        """Mapuje pliki grafów skonfigurowanych regionów (raz na proces); zwraca liczbę grafów"""
+        with self._lock:
+            if self._stored is None:
+                self._stored = {}
+                for name in settings.REGIONAL_GRAPH_REGIONS:
+                    path = regional_graph_path(name, self.directory)
+                    if not os.path.exists(path):
+                        continue
+                    try:
+                        graph = RegionalGraph.load(path)
+                    except (OSError, ValueError, KeyError) as e:
+                        logger.warning(f"Pominięto plik grafu regionalnego {path}: {e}")
+                        continue
+                    self._stored[graph.key] = graph
+            return len(self._stored)
+
+    def get_graph(self, bounds: dict, obstacle_index: Optional[ObstacleIndex] = None) -> RegionalGraph:
+        """Zwraca graf regionalny z pliku lub pamięci podręcznej albo buduje go i zapamiętuje"""
+        obstacle_index = ObstacleIndex.ensure(obstacle_index)
+        key = self.make_key(bounds, obstacle_index)
+        self.load_stored()
+        with self._lock:
+            graph = self._stored.get(key)
+            if graph is not None:
+                return graph
+            graph = self._entries.get(key)
+            if graph is not None:
+                self._entries.move_to_end(key)
+                return graph
+
+            # Nowa wersja przeszkód zastępuje poprzedni graf przed budową (pamięć)
+            while self._entries and len(self._entries) >= self.max_size:
+                self._entries.popitem(last=False)
+            graph = RegionalGraph.build(key, obstacle_index)
+            self._entries[key] = graph
+            return graph
+
+    def clear(self):
+        """Czyści grafy budowane w procesie i zapomina otwarte pliki (kolejne użycie otworzy je ponownie)"""
+        with self._lock:
+            self._entries.clear()
+            self._stored = None
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._stored or {})
+
+
+def regional_graph_path(name: str, directory: str = settings.REGIONAL_GRAPH_DIR) -> str:
+    """Ścieżka pliku grafu regionu z settings.REGIONAL_GRAPH_REGIONS"""
+    return os.path.join(directory, f"{name}.graph")
+
+
+def _polar_digest(polar: SailingPolar) -> str:
+    """Skrót tablicy polary (klucz kastomizacji)"""
+    table = polar.table
+    digest = hashlib.sha1(np.ascontiguousarray(table.speeds, dtype=float).tobytes())
+    digest.update(repr((table.twa_step, table.tws_step)).encode())
+    return digest.hexdigest()
+
+
+# Wspólna pamięć podręczna grafów regionalnych dla procesu
+regional_graphs = RegionalGraphCache()
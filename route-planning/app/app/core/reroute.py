@@ -0,0 +1,227 @@
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import Point
+
+from app.core.config import settings
+from app.core.dstar_lite import DStarLite
+from app.core.graph import CSRGraph, NoPathError
+from app.core.obstacles import ObstacleIndex
+from app.core.polar import PolarTable
+from app.core.routing import RouteOptimizer, SailingPolar, SearchStatistics
+from app.core.spatial import PointIndex
+from app.core.travel_time import calculate_travel_times, edge_sample_points, travel_times_from_wind
+from app.core.weather import WeatherData
+from app.utils.geodesy import haversine_nm, initial_bearing
+
+
+@dataclass
+class RerouteSession:
+    """Stan przeliczania aktywnej trasy: graf siatki z czasami w obu kierunkach i stan D* Lite
+
+    Graf, kursy krawędzi i przeszkody nie zmieniają się po utworzeniu sesji.
+    Wiatr w punkcie próbkowania krawędzi pochodzi z najbliższego punktu
+    pogodowego - sesja pamięta ten punkt dla każdej próbki, więc nowy wiatr
+    zmienia (i wymaga przeliczenia) czasy tylko krawędzi próbkowanych
+    w zmienionych punktach pogodowych. Nowa pozycja łodzi zmienia tylko jej
+    połączenia z siatką, a D* Lite poprawia trasę zamiast liczyć ją od nowa.
+    Sesja zawiera wyłącznie tablice numpy i proste typy - jest przekazywana
+    do procesu obliczeniowego i z powrotem.
+    """
+    search: DStarLite
+    bearings: np.ndarray  # Kurs każdej krawędzi skierowanej (pozycje tablic CSR)
+    wind_stations: np.ndarray  # (krawędzie, próbki) - punkt pogodowy najbliższy punktowi próbkowania
+    obstacles_wkb: List[bytes]
+    polar_speeds: np.ndarray
+    polar_steps: Tuple[float, float]
+    weather_arrays: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]  # Wiatr, na którym oparte są czasy
+    weather_timestamp: Optional[datetime]
+    weather_version: str
+
+    @classmethod
+    def create(cls, start: Point, end: Point, grid_points: List[Point], obstacle_index: ObstacleIndex,
+               weather_data: WeatherData, polar: SailingPolar) -> "RerouteSession":
+        """Buduje graf siatki trasy i wykonuje pierwsze (pełne) wyszukiwanie od mety do startu"""
+        graph, _, end_node = RouteOptimizer(polar, backend="csr").build_time_dependent_graph(
+            start, end, grid_points, obstacle_index
+        )
+        sources = np.repeat(np.arange(graph.num_nodes), np.diff(graph.indptr))
+        bearings = initial_bearing(graph.lons[sources], graph.lats[sources],
+                                   graph.lons[graph.indices], graph.lats[graph.indices])
+        wind_stations = cls._wind_stations(graph, weather_data)
+        graph.times = cls._edge_times(graph, bearings, wind_stations, weather_data, polar)
+        graph.directed_times = True
+        nodes, times = cls._attach(graph, (start.x, start.y), weather_data, polar, obstacle_index)
+        search = DStarLite(graph, end_node, polar.table.max_speed(weather_data.max_wind_speed()),
+                           (start.x, start.y), nodes, times)
+        search.compute()
+        return cls(
+            search=search,
+            bearings=bearings,
+            wind_stations=wind_stations,
+            obstacles_wkb=shapely.to_wkb(obstacle_index.geometries).tolist(),
+            polar_speeds=polar.table.speeds,
+            polar_steps=(polar.table.twa_step, polar.table.tws_step),
+            weather_arrays=weather_data.to_arrays(),
+            weather_timestamp=weather_data.timestamp,
+            weather_version=weather_data.version
+        )
+
+    def copy(self) -> "RerouteSession":
+        """Kopia sesji do naprawy - repair zmienia stan wyszukiwania w miejscu"""
+        return replace(self, search=self.search.copy())
+
+    def repair(self, position: Optional[Point] = None, weather_data: Optional[WeatherData] = None,
+               check_deadline: Optional[Callable[[], None]] = None) -> Tuple[SearchStatistics, int, bool]:
+        """Uwzględnia nową pozycję łodzi i/lub nowy wiatr i poprawia trasę
+
+        Zwraca (statystyki, liczba krawędzi ze zmienionym czasem, czy wyszukiwano
+        od nowa). Przy tych samych punktach pogodowych przeliczane są tylko
+        krawędzie próbkowane w punktach ze zmienionym wiatrem. Wyszukiwanie
+        od nowa zastępuje naprawę, gdy zmieniła się ponad
+        REROUTE_MAX_CHANGED_FRACTION krawędzi albo wiatr jest silniejszy niż
+        w ograniczeniu prędkości heurystyki (heurystyka nie byłaby dopuszczalna).
+        Wyjątek z check_deadline przerywa naprawę, zostawiając sesję niespójną -
+        naprawiana powinna być kopia (copy).
+        """
+        polar = self.polar
+        search = self.search
+        graph = search.graph
+        statistics = SearchStatistics(search_mode="incremental", edges_possible=graph.num_edges)
+        changed = 0
+        full_search = False
+
+        weather_changed = weather_data is not None and weather_data.version != self.weather_version
+        if weather_changed:
+            lons, lats, speeds, directions = self.weather_arrays
+            new_lons, new_lats, new_speeds, new_directions = weather_data.to_arrays()
+            if np.array_equal(lons, new_lons) and np.array_equal(lats, new_lats):
+                stations = np.flatnonzero((speeds != new_speeds) | (directions != new_directions))
+                slots = np.flatnonzero(np.isin(self.wind_stations, stations).any(axis=1))
+            else:
+                self.wind_stations = self._wind_stations(graph, weather_data)
+                slots = np.arange(len(graph.times))
+            times = self._edge_times(graph, self.bearings, self.wind_stations, weather_data, polar, slots)
+            statistics.edges_evaluated += len(slots)
+
+            updated = times != graph.times[slots]
+            slots, times = slots[updated], times[updated]
+            changed = len(slots)
+            speed = polar.table.max_speed(weather_data.max_wind_speed())
+            full_search = speed > search.speed or changed > settings.REROUTE_MAX_CHANGED_FRACTION * len(graph.times)
+            if full_search:
+                graph.times[slots] = times
+            else:
+                search.update_edges(slots, times)
+            self.weather_arrays = weather_data.to_arrays()
+            self.weather_timestamp = weather_data.timestamp
+            self.weather_version = weather_data.version
+            if check_deadline is not None:
+                check_deadline()
+        weather_data = self.weather_data()
+
+        if position is not None or weather_changed:
+            location = (position.x, position.y) if position is not None else search.position
+            nodes, times = self._attach(graph, location, weather_data, polar, self.obstacle_index())
+            statistics.edges_evaluated += len(nodes)
+            if full_search:
+                self.search = DStarLite(graph, search.goal, polar.table.max_speed(weather_data.max_wind_speed()),
+                                        location, nodes, times)
+            else:
+                search.move_start(location, nodes, times)
+
+        statistics.nodes_expanded = self.search.compute(check_deadline)
+        return statistics, changed, full_search
+
+    def route(self) -> Tuple[List[Point], float, bool]:
+        """Trasa z bieżącej pozycji łodzi: (punkty, czas, czy znaleziono ścieżkę w grafie)
+
+        Bez ścieżki w grafie - linia prosta do mety, jak w RouteOptimizer.
+        """
+        graph = self.search.graph
+        position = Point(*self.search.position)
+        goal = Point(graph.lons[self.search.goal], graph.lats[self.search.goal])
+        try:
+            path, total_time = self.search.path()
+        except NoPathError:
+            times = calculate_travel_times(
+                np.array([position.x]), np.array([position.y]), np.array([goal.x]), np.array([goal.y]),
+                self.weather_data(), self.polar, wind_samples=settings.WIND_SAMPLES_PER_EDGE
+            )
+            return [position, goal], float(times[0]), False
+        if path and (graph.lons[path[0]], graph.lats[path[0]]) == self.search.position:
+            # Łódź w węźle siatki (np. na starcie) - bez zerowego odcinka
+            path = path[1:]
+        return [position] + [Point(graph.lons[node], graph.lats[node]) for node in path], total_time, True
+
+    @property
+    def polar(self) -> SailingPolar:
+        return SailingPolar([], table=PolarTable(self.polar_speeds, *self.polar_steps))
+
+    def weather_data(self) -> WeatherData:
+        """Wiatr, na którym oparte są bieżące czasy krawędzi"""
+        return WeatherData.from_arrays(*self.weather_arrays, timestamp=self.weather_timestamp)
+
+    def obstacle_index(self) -> ObstacleIndex:
+        return ObstacleIndex(shapely.from_wkb(self.obstacles_wkb).tolist())
+
+    @property
+    def nbytes(self) -> int:
+        """Przybliżony rozmiar sesji w pamięci (bajty)"""
+        graph = self.search.graph
+        arrays = (graph.lons, graph.lats, graph.indptr, graph.indices, graph.distances, graph.times, self.bearings,
+                  self.wind_stations)
+        return sum(value.nbytes for value in arrays) + self.search.nbytes + sum(map(len, self.obstacles_wkb))
+
+    @staticmethod
+    def _wind_stations(graph: CSRGraph, weather_data: WeatherData) -> np.ndarray:
+        """Indeks najbliższego punktu pogodowego w każdym punkcie próbkowania krawędzi (krawędzie, próbki)"""
+        sources = np.repeat(np.arange(graph.num_nodes), np.diff(graph.indptr))
+        sample_lons, sample_lats = edge_sample_points(
+            graph.lons[sources], graph.lats[sources], graph.lons[graph.indices], graph.lats[graph.indices],
+            settings.WIND_SAMPLES_PER_EDGE
+        )
+        lons, lats, _, _ = weather_data.to_arrays()
+        if len(lons) == 0:
+            return np.zeros(sample_lons.shape, dtype=np.int32)
+        nearest = PointIndex(lons, lats).nearest(sample_lons.ravel(), sample_lats.ravel())
+        return nearest.reshape(sample_lons.shape).astype(np.int32)
+
+    @staticmethod
+    def _edge_times(graph: CSRGraph, bearings: np.ndarray, wind_stations: np.ndarray, weather_data: WeatherData,
+                    polar: SailingPolar, slots: Optional[np.ndarray] = None) -> np.ndarray:
+        """Czasy przejścia krawędzi skierowanych (wszystkich lub na pozycjach slots) przy danym wietrze
+
+        Wiatr odczytywany jest z zapamiętanych punktów pogodowych próbek - wynik
+        jest taki sam jak z calculate_travel_times.
+        """
+        _, _, speeds, directions = weather_data.to_arrays()
+        if len(speeds) == 0:
+            # Bez punktów pogodowych - wiatr domyślny, jak w WeatherData.get_wind_arrays
+            speeds, directions = np.array([5.0]), np.array([270.0])
+        if slots is None:
+            slots = slice(None)
+        stations = wind_stations[slots]
+        return travel_times_from_wind(graph.distances[slots], bearings[slots],
+                                      speeds[stations], directions[stations], polar)
+
+    @staticmethod
+    def _attach(graph: CSRGraph, location: Tuple[float, float], weather_data: WeatherData,
+                polar: SailingPolar, obstacle_index: ObstacleIndex) -> Tuple[np.ndarray, np.ndarray]:
+        """Węzły siatki połączone z pozycją łodzi i czasy tych odcinków
+
+        Łódź łączona jest tak jak węzły siatki między sobą: z węzłami w promieniu
+        MAX_CONNECTION_DISTANCE_NM, odcinkiem bez kolizji z przeszkodami.
+        """
+        distances = haversine_nm(location[0], location[1], graph.lons, graph.lats)
+        nodes = np.flatnonzero(distances <= RouteOptimizer.MAX_CONNECTION_DISTANCE_NM)
+        px, py = np.full(len(nodes), location[0]), np.full(len(nodes), location[1])
+        lons, lats = graph.lons[nodes], graph.lats[nodes]
+        blocked = obstacle_index.segments_blocked(px, py, lons, lats)
+        times = calculate_travel_times(px, py, lons, lats, weather_data, polar,
+                                       wind_samples=settings.WIND_SAMPLES_PER_EDGE)
+        usable = ~blocked & np.isfinite(times)
+        return nodes[usable], times[usable]
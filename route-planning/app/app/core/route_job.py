@@ -0,0 +1,685 @@
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import Point
+
+from app.core.course import CourseMark, mark_obstacles, mark_passages
+from app.core.graph import CSRGraph
+from app.core.grid import AdaptiveGridGenerator, GridConfig, create_grid_generator
+from app.core.grid_cache import grid_cache
+from app.core.obstacles import ObstacleIndex
+from app.core.polar import PolarTable
+from app.core.regional_graph import regional_graphs
+from app.core.reroute import RerouteSession
+from app.core.routing import CalculationTimeoutError, RouteOptimizer, SailingPolar, SearchStatistics
+from app.core.spatial import GridLattice
+from app.core.time_dependent import TimeDependentEdgeCosts
+from app.core.travel_time import calculate_travel_times
+from app.core.weather import WeatherData, WeatherForecast
+
+
+# Zakładany minimalny wzrost czasu obliczenia przy dwukrotnym zagęszczeniu siatki:
+# czterokrotnie więcej węzłów, każdy z czterokrotnie większą liczbą sąsiadów
+# w promieniu połączenia, czyli około szesnastokrotnie więcej krawędzi
+REFINEMENT_MIN_GROWTH = 16.0
+
+
+class _ComputeJob:
+    """Wspólna część zadań obliczeniowych: przeszkody, wiatr i polara w postaci do serializacji
+
+    Zadania zawierają wyłącznie proste typy i tablice numpy (przeszkody jako WKB),
+    więc serializacja między procesami jest tania.
+    """
+    obstacles_wkb: List[bytes]
+    weather_arrays: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+    weather_timestamp: Optional[datetime]
+    polar_speeds: np.ndarray
+    polar_steps: Tuple[float, float]
+    deadline: Optional[float]
+
+    @staticmethod
+    def encode_inputs(obstacle_index: ObstacleIndex, weather_data: WeatherData, polar: SailingPolar) -> dict:
+        """Pola zadania z obiektów używanych w serwisie"""
+        polar_speeds, polar_steps = _ComputeJob.encode_polar(polar)
+        return dict(
+            obstacles_wkb=shapely.to_wkb(obstacle_index.geometries).tolist(),
+            weather_arrays=weather_data.to_arrays(),
+            weather_timestamp=weather_data.timestamp,
+            polar_speeds=polar_speeds,
+            polar_steps=polar_steps
+        )
+
+    @staticmethod
+    def encode_polar(polar: SailingPolar) -> Tuple[np.ndarray, Tuple[float, float]]:
+        """Polara jako tablica prędkości i kroki (TWA, TWS)"""
+        return polar.table.speeds, (polar.table.twa_step, polar.table.tws_step)
+
+    @staticmethod
+    def decode_polar(speeds: np.ndarray, steps: Tuple[float, float]) -> SailingPolar:
+        return SailingPolar([], table=PolarTable(speeds, *steps))
+
+    def decode_inputs(self) -> Tuple[ObstacleIndex, WeatherData, SailingPolar]:
+        """Odtwarza przeszkody, dane pogodowe i polarę w procesie obliczeniowym"""
+        obstacle_index = ObstacleIndex(shapely.from_wkb(self.obstacles_wkb).tolist())
+        weather_data = WeatherData.from_arrays(*self.weather_arrays, timestamp=self.weather_timestamp)
+        return obstacle_index, weather_data, self.decode_polar(self.polar_speeds, self.polar_steps)
+
+    def decode_forecast(self) -> WeatherForecast:
+        """Odtwarza prognozę wiatru (zadania z forecast_arrays) w procesie obliczeniowym"""
+        return WeatherForecast.from_arrays(*self.forecast_arrays, start_time=self.forecast_start)
+
+    def remaining_time(self) -> float:
+        """Czas pozostały do terminu (inf bez terminu)"""
+        return float("inf") if self.deadline is None else self.deadline - time.time()
+
+    def check_deadline(self):
+        """Przerywa obliczenie, jeśli minął przydzielony czas"""
+        if self.deadline is not None and time.time() > self.deadline:
+            raise CalculationTimeoutError("Obliczenie trasy przekroczyło limit czasu")
+
+
+@dataclass
+class RouteJob(_ComputeJob):
+    """Dane wejściowe obliczenia trasy przekazywane do procesu obliczeniowego"""
+    start: Tuple[float, float]  # (lon, lat)
+    end: Tuple[float, float]
+    grid_config: GridConfig
+    obstacles_wkb: List[bytes]
+    weather_arrays: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]  # lons, lats, prędkości, kierunki
+    weather_timestamp: Optional[datetime]
+    polar_speeds: np.ndarray
+    polar_steps: Tuple[float, float]  # (krok TWA, krok TWS)
+    graph_backend: str = "networkx"
+    search_mode: str = "eager"
+    heuristic: str = "polar"
+    use_weather_grid: bool = True  # Czy siatka może być zagęszczana według wiatru
+    deadline: Optional[float] = None  # Czas (time.time()), po którym obliczenie jest przerywane
+    refinement_levels: int = 1  # Liczba poziomów siatki od zgrubnej do żądanej rozdzielczości
+    alternatives: int = 0  # Liczba tras alternatywnych
+    routing_mode: str = "static"  # "static" lub "time_dependent" (wiatr z prognozy)
+    forecast_arrays: Optional[tuple] = None  # WeatherForecast.to_arrays() dla trybu time_dependent
+    forecast_start: Optional[datetime] = None
+    departure_hours: float = 0.0  # Chwila wypłynięcia (godziny od początku prognozy)
+    isochrone_sector_deg: Optional[float] = None  # Sektor odrzucania punktów izochron (None - z ustawień)
+    region_bounds: Optional[dict] = None  # Granice grafu regionalnego (siatka regional)
+    keep_search_state: bool = False  # Czy zwrócić stan wyszukiwania do przeliczania trasy (RerouteSession)
+
+    @classmethod
+    def create(cls, start: Point, end: Point, grid_config: GridConfig, obstacle_index: ObstacleIndex,
+               weather_data: WeatherData, polar: SailingPolar, **options) -> "RouteJob":
+        """Buduje zadanie z obiektów używanych w serwisie"""
+        return cls(
+            start=(start.x, start.y),
+            end=(end.x, end.y),
+            grid_config=grid_config,
+            **cls.encode_inputs(obstacle_index, weather_data, polar),
+            **options
+        )
+
+
+@dataclass
+class RouteJobResult:
+    """Wynik obliczenia trasy zwracany z procesu obliczeniowego"""
+    route: np.ndarray  # (n, 2) lon/lat punktów trasy
+    total_time: float
+    statistics: Optional[SearchStatistics] = None
+    grid_resolution_nm: Optional[float] = None  # Rozdzielczość siatki, na której znaleziono trasę
+    refinement_level: int = 0  # Poziom siatki, na którym znaleziono trasę (0 - najgrubszy)
+    refinement_levels: int = 1  # Liczba zaplanowanych poziomów
+    alternatives: List[Tuple[np.ndarray, float]] = field(default_factory=list)  # (punkty trasy, czas)
+    reroute_session: Optional[RerouteSession] = None  # Stan wyszukiwania (zadania z keep_search_state)
+
+    @property
+    def path_found(self) -> bool:
+        return self.statistics is None or self.statistics.path_found
+
+    @property
+    def route_points(self) -> List[Point]:
+        return [Point(lon, lat) for lon, lat in self.route.tolist()]
+
+    @property
+    def alternative_routes(self) -> List[Tuple[List[Point], float]]:
+        return [([Point(lon, lat) for lon, lat in route.tolist()], total_time)
+                for route, total_time in self.alternatives]
+
+
+def refinement_resolutions(resolution_nm: float, levels: int) -> List[float]:
+    """Rozdzielczości kolejnych poziomów siatki: od najgrubszej do żądanej
+
+    Każdy poziom jest dwukrotnie gęstszy od poprzedniego. Poziomy rzadsze niż
+    połowa zasięgu połączenia węzłów są pomijane - graf byłby niespójny.
+    """
+    max_coarse_nm = RouteOptimizer.MAX_CONNECTION_DISTANCE_NM / 2
+    coarse = [resolution_nm * 2 ** k for k in range(max(levels, 1) - 1, 0, -1)]
+    return [r for r in coarse if r <= max_coarse_nm] + [resolution_nm]
+
+
+def run_route_job(job: RouteJob) -> RouteJobResult:
+    """Wykonuje obliczeniową część wyznaczania trasy: siatka, graf i wyszukiwanie
+
+    Funkcja jest samodzielna (bez bazy danych i sieci), więc może działać
+    w osobnym procesie. Trasa liczona jest w trybie "anytime": najpierw na
+    siatce zgrubnej, potem na coraz gęstszych, dopóki kolejny poziom mieści się
+    w terminie job.deadline. Termin sprawdzany jest też w trakcie budowy grafu
+    i wyszukiwania, więc poziom, który go przekroczy, jest przerywany i zwracana
+    jest najlepsza trasa znaleziona do tej pory; przekroczenie terminu przed
+    ukończeniem pierwszego poziomu kończy się CalculationTimeoutError.
+    Z siatką regional trasa liczona jest na grafie regionalnym, bez poziomów
+    siatki. Przy keep_search_state na siatce
+    najlepszej trasy budowany jest też stan D* Lite do przeliczania trasy,
+    jeśli zmieści się w terminie.
+    """
+    start, end = Point(*job.start), Point(*job.end)
+    obstacle_index, weather_data, polar = job.decode_inputs()
+    job.check_deadline()
+
+    if job.grid_config.grid_mode == "regional":
+        return _solve_regional(job, start, end, obstacle_index, weather_data, polar)
+
+    resolutions = refinement_resolutions(job.grid_config.min_distance_nm, job.refinement_levels)
+    best: Optional[RouteJobResult] = None
+    elapsed: List[float] = []
+
+    for level, resolution in enumerate(resolutions):
+        if best is not None and elapsed[-1] * _refinement_growth(elapsed) > job.remaining_time():
+            break
+
+        t0 = time.time()
+        try:
+            result = _solve_level(job, replace(job.grid_config, min_distance_nm=resolution),
+                                  start, end, obstacle_index, weather_data, polar)
+        except CalculationTimeoutError:
+            if best is None:
+                raise
+            break
+        elapsed.append(time.time() - t0)
+
+        result.refinement_level = level
+        result.refinement_levels = len(resolutions)
+        if best is None or _is_better(result, best):
+            best = result
+
+    # Pierwsze wyszukiwanie D* Lite kosztuje mniej więcej tyle co poziom siatki
+    if job.keep_search_state and elapsed and elapsed[-1] <= job.remaining_time():
+        config = replace(job.grid_config, min_distance_nm=best.grid_resolution_nm)
+        grid_points, _ = _route_grid(job, config, start, end, obstacle_index, weather_data)
+        best.reroute_session = RerouteSession.create(start, end, grid_points, obstacle_index, weather_data, polar)
+
+    return best
+
+
+def _solve_level(job: RouteJob, config: GridConfig, start: Point, end: Point,
+                 obstacle_index: ObstacleIndex, weather_data: WeatherData,
+                 polar: SailingPolar) -> RouteJobResult:
+    """Liczy trasę na siatce o jednej rozdzielczości"""
+    grid_points, lattice = _route_grid(job, config, start, end, obstacle_index, weather_data)
+    job.check_deadline()
+
+    # Graf i wyszukiwanie trasy
+    optimizer = RouteOptimizer(polar, backend=job.graph_backend, search_mode=job.search_mode,
+                               heuristic=job.heuristic, check_deadline=job.check_deadline)
+    if job.routing_mode == "time_dependent":
+        # Wiatr zmienny w czasie - bez tras alternatywnych
+        route_points, total_time = optimizer.find_time_dependent_route(
+            start, end, grid_points, obstacle_index, job.decode_forecast(), job.departure_hours,
+            job.isochrone_sector_deg
+        )
+    else:
+        route_points, total_time = optimizer.find_optimal_route(
+            start, end, grid_points, obstacle_index, weather_data, lattice, job.alternatives
+        )
+
+    return RouteJobResult(
+        route=_to_array(route_points),
+        total_time=total_time,
+        statistics=optimizer.last_statistics,
+        grid_resolution_nm=config.min_distance_nm,
+        alternatives=[(_to_array(points), alt_time) for points, alt_time in optimizer.last_alternatives]
+    )
+
+
+def _route_grid(job: RouteJob, config: GridConfig, start: Point, end: Point, obstacle_index: ObstacleIndex,
+                weather_data: WeatherData) -> Tuple[List[Point], Optional[GridLattice]]:
+    """Siatka punktów trasy (i sieć komórek dla siatki hex)"""
+    if config.grid_mode != "hex":
+        grid_points = grid_cache.get_route_grid(
+            start, end, config, obstacle_index, weather_data if job.use_weather_grid else None
+        )
+        return grid_points, None
+    # Siatka regularna generowana jest natychmiast - bez pamięci podręcznej
+    generator = create_grid_generator(config)
+    return generator.generate_route_grid(start, end, obstacle_index), generator.lattice
+
+
+def _solve_regional(job: RouteJob, start: Point, end: Point, obstacle_index: ObstacleIndex,
+                    weather_data: WeatherData, polar: SailingPolar) -> RouteJobResult:
+    """Liczy trasę Dijkstrą na całym wspólnym grafie regionalnym"""
+    graph = regional_graphs.get_graph(job.region_bounds, obstacle_index)
+    job.check_deadline()
+    route_points, total_time, statistics = graph.find_route(start, end, weather_data, polar)
+    return RouteJobResult(
+        route=_to_array(route_points),
+        total_time=total_time,
+        statistics=statistics,
+        grid_resolution_nm=graph.key.resolution_nm
+    )
+
+
+def _to_array(points: List[Point]) -> np.ndarray:
+    return np.array([(p.x, p.y) for p in points], dtype=float).reshape(-1, 2)
+
+
+def _refinement_growth(elapsed: List[float]) -> float:
+    """Szacowany mnożnik czasu obliczenia następnego poziomu"""
+    if len(elapsed) >= 2 and elapsed[-2] > 0:
+        return max(elapsed[-1] / elapsed[-2], REFINEMENT_MIN_GROWTH)
+    return REFINEMENT_MIN_GROWTH
+
+
+def _is_better(result: RouteJobResult, best: RouteJobResult) -> bool:
+    """Trasa znaleziona w grafie wygrywa z linią zastępczą, potem decyduje czas przejścia"""
+    if result.path_found != best.path_found:
+        return result.path_found
+    return result.total_time <= best.total_time
+
+
+@dataclass
+class BatchRouteJob(_ComputeJob):
+    """Dane wejściowe obliczenia wielu tras na jednym grafie obszaru"""
+    points: List[Tuple[float, float]]  # Różne punkty startu i mety (lon, lat)
+    pairs: List[Tuple[int, int]]  # (indeks startu, indeks mety) w points
+    grid_config: GridConfig
+    obstacles_wkb: List[bytes]
+    weather_arrays: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+    weather_timestamp: Optional[datetime]
+    polar_speeds: np.ndarray
+    polar_steps: Tuple[float, float]
+    deadline: Optional[float] = None
+
+    @classmethod
+    def create(cls, points: List[Point], pairs: List[Tuple[int, int]], grid_config: GridConfig,
+               obstacle_index: ObstacleIndex, weather_data: WeatherData, polar: SailingPolar,
+               **options) -> "BatchRouteJob":
+        """Buduje zadanie z obiektów używanych w serwisie"""
+        return cls(
+            points=[(p.x, p.y) for p in points],
+            pairs=list(pairs),
+            grid_config=grid_config,
+            **cls.encode_inputs(obstacle_index, weather_data, polar),
+            **options
+        )
+
+
+@dataclass
+class BatchRouteJobResult:
+    """Wyniki obliczenia wielu tras na wspólnym grafie (None - brak trasy)"""
+    routes: List[Optional[Tuple[np.ndarray, float]]]  # (punkty trasy, czas) w kolejności par lub łodzi
+    statistics: Optional[SearchStatistics] = None
+    num_nodes: int = 0
+
+    def route_points(self, number: int) -> Optional[Tuple[List[Point], float]]:
+        if self.routes[number] is None:
+            return None
+        route, total_time = self.routes[number]
+        return [Point(lon, lat) for lon, lat in route.tolist()], total_time
+
+
+def run_batch_route_job(job: BatchRouteJob) -> BatchRouteJobResult:
+    """Wyznacza trasy dla wszystkich par na jednej siatce i jednym grafie obszaru
+
+    Siatka obejmuje wszystkie punkty startu i mety (są jej węzłami), graf
+    budowany jest raz z osobnymi czasami krawędzi w obu kierunkach, a z każdego
+    punktu startu wykonywane jest jedno przeszukiwanie do wszystkich jego met.
+    """
+    points = [Point(lon, lat) for lon, lat in job.points]
+    obstacle_index, weather_data, polar = job.decode_inputs()
+    job.check_deadline()
+
+    # Punkty startu i mety są pierwszymi węzłami grafu, za nimi siatka obszaru
+    grid_points = AdaptiveGridGenerator(job.grid_config).generate_region_grid(points, obstacle_index)
+    nodes = points + grid_points
+    job.check_deadline()
+
+    # Graf skierowany - pary mogą prowadzić w dowolnych kierunkach (także A -> B i B -> A)
+    optimizer = RouteOptimizer(polar, backend="csr")
+    routes = optimizer.find_routes(nodes, job.pairs, obstacle_index, weather_data, directed=True)
+    return BatchRouteJobResult(
+        routes=[None if route is None else (_to_array(route[0]), route[1]) for route in routes],
+        statistics=optimizer.last_statistics,
+        num_nodes=len(nodes)
+    )
+
+
+@dataclass
+class FleetRouteJob(_ComputeJob):
+    """Dane wejściowe porównania kilku łodzi na tym samym odcinku"""
+    start: Tuple[float, float]  # (lon, lat)
+    end: Tuple[float, float]
+    grid_config: GridConfig
+    obstacles_wkb: List[bytes]
+    weather_arrays: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+    weather_timestamp: Optional[datetime]
+    polar_speeds: np.ndarray  # Polara pierwszej łodzi
+    polar_steps: Tuple[float, float]
+    fleet_polars: List[Tuple[np.ndarray, Tuple[float, float]]]  # (prędkości, kroki) polar kolejnych łodzi
+    use_weather_grid: bool = True
+    deadline: Optional[float] = None
+
+    @classmethod
+    def create(cls, start: Point, end: Point, grid_config: GridConfig, obstacle_index: ObstacleIndex,
+               weather_data: WeatherData, polars: List[SailingPolar], **options) -> "FleetRouteJob":
+        """Buduje zadanie z obiektów używanych w serwisie"""
+        return cls(
+            start=(start.x, start.y),
+            end=(end.x, end.y),
+            grid_config=grid_config,
+            **cls.encode_inputs(obstacle_index, weather_data, polars[0]),
+            fleet_polars=[cls.encode_polar(polar) for polar in polars],
+            **options
+        )
+
+
+def run_fleet_route_job(job: FleetRouteJob) -> BatchRouteJobResult:
+    """Wyznacza trasy odcinka dla wszystkich łodzi na jednej siatce i jednej topologii grafu
+
+    Łodzie różnią się tylko czasami przejścia krawędzi, więc siatka, sąsiedztwo
+    i kolizje z przeszkodami liczone są raz (RouteOptimizer.find_fleet_routes).
+    """
+    start, end = Point(*job.start), Point(*job.end)
+    obstacle_index, weather_data, _ = job.decode_inputs()
+    polars = [job.decode_polar(speeds, steps) for speeds, steps in job.fleet_polars]
+    job.check_deadline()
+
+    grid_points = grid_cache.get_route_grid(
+        start, end, job.grid_config, obstacle_index, weather_data if job.use_weather_grid else None
+    )
+    job.check_deadline()
+
+    optimizer = RouteOptimizer(polars[0], backend="csr")
+    routes = optimizer.find_fleet_routes(start, end, grid_points, obstacle_index, weather_data, polars)
+    return BatchRouteJobResult(
+        routes=[None if route is None else (_to_array(route[0]), route[1]) for route in routes],
+        statistics=optimizer.last_statistics,
+        num_nodes=len(grid_points)
+    )
+
+
+@dataclass
+class CourseRouteJob(_ComputeJob):
+    """Dane wejściowe obliczenia trasy regatowej (kolejne znaki kursu)"""
+    marks: List[Tuple[float, float, Optional[str]]]  # (lon, lat, strona opływania)
+    grid_config: GridConfig
+    obstacles_wkb: List[bytes]
+    weather_arrays: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+    weather_timestamp: Optional[datetime]
+    polar_speeds: np.ndarray
+    polar_steps: Tuple[float, float]
+    rounding_radius_nm: float = 0.1  # Odległość punktów opływania od znaku
+    deadline: Optional[float] = None
+
+    @classmethod
+    def create(cls, marks: List[CourseMark], grid_config: GridConfig, obstacle_index: ObstacleIndex,
+               weather_data: WeatherData, polar: SailingPolar, **options) -> "CourseRouteJob":
+        """Buduje zadanie z obiektów używanych w serwisie"""
+        return cls(
+            marks=[(mark.lon, mark.lat, mark.rounding) for mark in marks],
+            grid_config=grid_config,
+            **cls.encode_inputs(obstacle_index, weather_data, polar),
+            **options
+        )
+
+
+@dataclass
+class CourseLegResult:
+    """Wynik jednego odcinka kursu (od znaku do znaku, z opłynięciem znaku docelowego)"""
+    route: np.ndarray  # (n, 2) lon/lat punktów odcinka
+    total_time: float
+    path_found: bool = True  # False - odcinek zastąpiony linią prostą
+
+    @property
+    def route_points(self) -> List[Point]:
+        return [Point(lon, lat) for lon, lat in self.route.tolist()]
+
+
+@dataclass
+class CourseRouteJobResult:
+    """Wynik obliczenia trasy regatowej"""
+    legs: List[CourseLegResult]
+    statistics: Optional[SearchStatistics] = None
+    num_nodes: int = 0
+
+    @property
+    def path_found(self) -> bool:
+        return all(leg.path_found for leg in self.legs)
+
+    @property
+    def total_time(self) -> float:
+        return sum(leg.total_time for leg in self.legs)
+
+    @property
+    def route_points(self) -> List[Point]:
+        """Cała trasa - odcinki połączone w punktach opłynięcia znaków"""
+        points = self.legs[0].route_points[:1]
+        for leg in self.legs:
+            points.extend(leg.route_points[1:])
+        return points
+
+
+def run_course_route_job(job: CourseRouteJob) -> CourseRouteJobResult:
+    """Wyznacza trasę regatową: wszystkie odcinki kursu na jednej siatce i jednym grafie
+
+    Siatka obejmuje wszystkie znaki, a graf ma osobne czasy krawędzi w obu
+    kierunkach (odcinki na wiatr i z wiatrem). Odcinki są niezależne - każdy
+    zaczyna się w punkcie wyjścia z opłynięcia znaku - więc wszystkie
+    rozwiązywane są razem jednym przeszukiwaniem wielu źródeł.
+    """
+    marks = [CourseMark(lon, lat, rounding) for lon, lat, rounding in job.marks]
+    obstacle_index, weather_data, polar = job.decode_inputs()
+    passages = mark_passages(marks, job.rounding_radius_nm)
+    obstacle_index = ObstacleIndex(
+        obstacle_index.geometries.tolist() + mark_obstacles(marks, job.rounding_radius_nm / 2)
+    )
+    job.check_deadline()
+
+    # Punkty opłynięcia znaków są pierwszymi węzłami grafu, za nimi siatka obszaru
+    waypoints = [Point(lon, lat) for passage in passages for lon, lat in passage]
+    grid_points = AdaptiveGridGenerator(job.grid_config).generate_region_grid(waypoints, obstacle_index)
+    nodes = waypoints + grid_points
+    job.check_deadline()
+
+    first_node = np.cumsum([0] + [len(passage) for passage in passages])
+    pairs = [(int(first_node[k + 1]) - 1, int(first_node[k + 1])) for k in range(len(marks) - 1)]
+    optimizer = RouteOptimizer(polar, backend="csr")
+    routes = optimizer.find_routes(nodes, pairs, obstacle_index, weather_data, directed=True)
+
+    legs = []
+    for k, ((source, target), route) in enumerate(zip(pairs, routes)):
+        # Do odcinka należy opłynięcie znaku docelowego (łuk od punktu wejścia)
+        arc = nodes[first_node[k + 1]:first_node[k + 2]]
+        if route is None:
+            # Brak ścieżki w grafie - linia prosta, jak w find_optimal_route
+            points = [nodes[source]] + arc
+            leg_time = _polyline_time(points, weather_data, polar, optimizer.wind_samples)
+        else:
+            points = route[0][:-1] + arc
+            leg_time = route[1] + _polyline_time(arc, weather_data, polar, optimizer.wind_samples)
+        legs.append(CourseLegResult(route=_to_array(points), total_time=leg_time, path_found=route is not None))
+
+    return CourseRouteJobResult(legs=legs, statistics=optimizer.last_statistics, num_nodes=len(nodes))
+
+
+def _polyline_time(points: List[Point], weather_data: WeatherData, polar: SailingPolar, wind_samples: int) -> float:
+    """Czas przejścia łamanej poza grafem (opłynięcie znaku, linia zastępcza)"""
+    coords = _to_array(points)
+    if len(coords) < 2:
+        return 0.0
+    return float(calculate_travel_times(
+        coords[:-1, 0], coords[:-1, 1], coords[1:, 0], coords[1:, 1],
+        weather_data, polar, wind_samples=wind_samples
+    ).sum())
+
+
+@dataclass
+class DepartureSweepJob(_ComputeJob):
+    """Dane wejściowe budowy grafu wspólnego dla wielu chwil wypłynięcia"""
+    start: Tuple[float, float]  # (lon, lat)
+    end: Tuple[float, float]
+    grid_config: GridConfig
+    obstacles_wkb: List[bytes]
+    weather_arrays: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]  # Wiatr na początku okna (siatka)
+    weather_timestamp: Optional[datetime]
+    polar_speeds: np.ndarray
+    polar_steps: Tuple[float, float]
+    use_weather_grid: bool = True
+    deadline: Optional[float] = None
+
+    @classmethod
+    def create(cls, start: Point, end: Point, grid_config: GridConfig, obstacle_index: ObstacleIndex,
+               weather_data: WeatherData, polar: SailingPolar, **options) -> "DepartureSweepJob":
+        """Buduje zadanie z obiektów używanych w serwisie"""
+        return cls(
+            start=(start.x, start.y),
+            end=(end.x, end.y),
+            grid_config=grid_config,
+            **cls.encode_inputs(obstacle_index, weather_data, polar),
+            **options
+        )
+
+
+@dataclass
+class DepartureGraph:
+    """Graf odcinka bez czasów przejścia - wspólny dla wszystkich chwil wypłynięcia"""
+    graph: CSRGraph
+    start_node: int
+    end_node: int
+    statistics: SearchStatistics  # Statystyki budowy grafu (edges_possible)
+
+
+def run_departure_graph_job(job: DepartureSweepJob) -> DepartureGraph:
+    """Buduje siatkę i graf sąsiedztwa odcinka raz dla całego okna wypłynięcia"""
+    start, end = Point(*job.start), Point(*job.end)
+    obstacle_index, weather_data, polar = job.decode_inputs()
+    job.check_deadline()
+
+    grid_points = grid_cache.get_route_grid(
+        start, end, job.grid_config, obstacle_index, weather_data if job.use_weather_grid else None
+    )
+    job.check_deadline()
+
+    optimizer = RouteOptimizer(polar, backend="csr")
+    graph, start_node, end_node = optimizer.build_time_dependent_graph(start, end, grid_points, obstacle_index)
+    return DepartureGraph(graph, start_node, end_node, optimizer.last_statistics)
+
+
+@dataclass
+class DepartureChunkJob(_ComputeJob):
+    """Część chwil wypłynięcia liczona w jednym procesie na wspólnym grafie"""
+    departure_graph: DepartureGraph
+    forecast_arrays: tuple  # WeatherForecast.to_arrays()
+    forecast_start: Optional[datetime]
+    polar_speeds: np.ndarray
+    polar_steps: Tuple[float, float]
+    departure_hours: List[float]  # Chwile wypłynięcia (godziny od początku prognozy)
+    isochrone_sector_deg: Optional[float] = None  # Sektor odrzucania punktów izochron (None - z ustawień)
+    deadline: Optional[float] = None
+
+
+@dataclass
+class DepartureChunkResult:
+    """Czasy przejścia dla chwil wypłynięcia z DepartureChunkJob i najlepsza trasa części"""
+    times: List[Optional[float]]  # None - brak ścieżki w grafie
+    best: Optional[int] = None  # Indeks najlepszej chwili wypłynięcia w części
+    route: Optional[np.ndarray] = None  # (n, 2) lon/lat najlepszej trasy
+    statistics: Optional[SearchStatistics] = None  # Sumy dla wszystkich wyszukiwań części
+
+
+def run_departure_chunk_job(job: DepartureChunkJob) -> DepartureChunkResult:
+    """Wyznacza trasy zależne od czasu dla kolejnych chwil wypłynięcia
+
+    Geometria łuków grafu i punkty prognozy (TimeDependentEdgeCosts) liczone są
+    raz - między wyszukiwaniami zmienia się tylko chwila wypłynięcia.
+    """
+    departure = job.departure_graph
+    polar = job.decode_polar(job.polar_speeds, job.polar_steps)
+    optimizer = RouteOptimizer(polar, backend="csr")
+    costs = TimeDependentEdgeCosts(departure.graph, job.decode_forecast(), polar, optimizer.wind_samples)
+    statistics = replace(departure.statistics, search_mode="time_dependent", nodes_expanded=0,
+                         edges_evaluated=0, heuristic="polar")
+
+    result = DepartureChunkResult(times=[], statistics=statistics)
+    for number, hours in enumerate(job.departure_hours):
+        job.check_deadline()
+        costs.departure_hours = hours
+        optimizer.last_statistics = departure.statistics
+        route_points, total_time = optimizer.search_time_dependent(
+            departure.graph, departure.start_node, departure.end_node, costs, job.isochrone_sector_deg
+        )
+        searched = optimizer.last_statistics
+        statistics.nodes_expanded += searched.nodes_expanded or 0
+        statistics.edges_evaluated += searched.edges_evaluated
+        statistics.nodes_pruned += searched.nodes_pruned
+        statistics.may_be_suboptimal |= searched.may_be_suboptimal
+
+        if not searched.path_found:
+            result.times.append(None)
+            continue
+        result.times.append(total_time)
+        if result.best is None or total_time < result.times[result.best]:
+            result.best, result.route = number, _to_array(route_points)
+    return result
+
+
+@dataclass
+class RerouteJob(_ComputeJob):
+    """Przeliczenie aktywnej trasy: stan wyszukiwania oraz nowa pozycja łodzi i/lub nowy wiatr"""
+    session: RerouteSession
+    position: Optional[Tuple[float, float]] = None  # (lon, lat) bieżącej pozycji łodzi
+    weather_arrays: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None  # Nowy wiatr
+    weather_timestamp: Optional[datetime] = None
+    deadline: Optional[float] = None
+
+
+@dataclass
+class RerouteJobResult:
+    """Wynik przeliczenia trasy z poprawionym stanem wyszukiwania"""
+    session: RerouteSession
+    route: np.ndarray  # (n, 2) lon/lat punktów trasy od pozycji łodzi
+    total_time: float
+    statistics: SearchStatistics
+    changed_edges: int = 0  # Krawędzie, których czas przejścia zmienił nowy wiatr
+    full_search: bool = False  # Czy zamiast naprawy wyszukiwano od nowa
+
+    @property
+    def route_points(self) -> List[Point]:
+        return [Point(lon, lat) for lon, lat in self.route.tolist()]
+
+
+def run_reroute_job(job: RerouteJob) -> RerouteJobResult:
+    """Poprawia trasę po zmianie pozycji łodzi lub wiatru (D* Lite)
+
+    Naprawiana jest kopia sesji zwracana w wyniku, także gdy zadanie wykonuje
+    wątek serwera (pula bez procesów) - przerwane obliczenie (termin
+    job.deadline) nie zmienia stanu zapamiętanego w serwisie.
+    """
+    job.check_deadline()
+    session = job.session.copy()
+    weather_data = None
+    if job.weather_arrays is not None:
+        weather_data = WeatherData.from_arrays(*job.weather_arrays, timestamp=job.weather_timestamp)
+    position = Point(*job.position) if job.position is not None else None
+
+    statistics, changed_edges, full_search = session.repair(position, weather_data, job.check_deadline)
+    route_points, total_time, path_found = session.route()
+    statistics.path_found = path_found
+    return RerouteJobResult(
+        session=session,
+        route=_to_array(route_points),
+        total_time=total_time,
+        statistics=statistics,
+        changed_edges=changed_edges,
+        full_search=full_search
+    )
@@ -1,13 +1,37 @@
 import numpy as np
 import networkx as nx
-from typing import List, Tuple, Optional, Dict
-from shapely.geometry import Point, LineString
-from geopy.distance import geodesic
-import math
+from typing import Callable, List, Tuple, Optional, Dict, Union
+from shapely.geometry import Point
 from dataclasses import dataclass
 
-from app.core.weather import WeatherData
-from app.utils.calculations import calculate_bearing, calculate_distance
+from app.core.graph import (
+    DEADLINE_CHECK_INTERVAL, CSRGraph, NoPathError, SearchResult, astar, bidirectional_astar, lazy_astar,
+    penalty_alternatives, reconstruct_path, shortest_path_trees, time_dependent_astar
+)
+from app.core.obstacles import ObstacleIndex
+from app.core.polar import PolarTable
+from app.core.config import settings
+from app.core.spatial import GridLattice, LatticeIndex, PointIndex
+from app.core.time_dependent import IsochronePruning, TimeDependentEdgeCosts
+from app.core.travel_time import calculate_fleet_travel_times, calculate_travel_times
+from app.core.weather import WeatherData, WeatherForecast
+from app.utils.geodesy import haversine_nm
+
+# Dostępne silniki grafu dla wyszukiwania trasy
+GRAPH_BACKENDS = ("networkx", "csr")
+# Tryby wyszukiwania: pełny graf budowany z góry, leniwe rozwijanie krawędzi
+# lub dwukierunkowe przeszukiwanie pełnego grafu
+SEARCH_MODES = ("eager", "lazy", "bidirectional")
+# Tryby routingu: wiatr z jednej chwili lub z prognozy w chwili dotarcia do węzła
+ROUTING_MODES = ("static", "time_dependent")
+# Heurystyki A*: odległość / maksymalna prędkość z polary (ALT - tylko w bench_heuristic)
+HEURISTICS = ("polar",)
+# Źródło sąsiedztwa węzłów: indeks przestrzenny lub niejawne sąsiedztwo sieci
+NeighbourIndex = Union[PointIndex, LatticeIndex]
+
+
+class CalculationTimeoutError(Exception):
+    """Obliczenie trasy przekroczyło przydzielony czas"""
 
 
 @dataclass
@@ -18,190 +42,639 @@ class PolarSpeed:
 
 
 class SailingPolar:
-    """Klasa reprezentująca charakterystykę prędkościową łodzi"""
+    """Klasa reprezentująca charakterystykę prędkościową łodzi
 
-    def __init__(self, polar_data: List[PolarSpeed]):
+    Dane polarne są kompilowane do gęstej tablicy TWA × TWS (PolarTable),
+    z której prędkości pobierane są pojedynczo (get_speed) lub hurtowo
+    dla tablic numpy (get_speeds).
+    """
+
+    def __init__(self, polar_data: List[PolarSpeed], table: Optional[PolarTable] = None):
         self.polar_data = sorted(polar_data, key=lambda x: x.twa)
         self.twa_values = [p.twa for p in self.polar_data]
         self.speed_values = [p.speed for p in self.polar_data]
+        self.table = table or PolarTable.from_twa_curve(self.twa_values, self.speed_values)
+
+    @classmethod
+    def from_profile_data(cls, polar_data) -> "SailingPolar":
+        """Tworzy polarę z danych profilu łodzi (BoatProfile.polar_data)"""
+        return cls([], table=PolarTable.from_profile_data(polar_data))
 
     def get_speed(self, twa: float, wind_speed: float) -> float:
         """Oblicza prędkość łodzi dla danego kąta względem wiatru"""
-        # Normalizacja kąta do zakresu 0-180
-        twa = abs(twa) % 360
-        if twa > 180:
-            twa = 360 - twa
+        return self.table.get_speed(twa, wind_speed)
 
-        # Interpolacja prędkości z tabeli polarnej
-        if twa <= self.twa_values[0]:
-            base_speed = self.speed_values[0]
-        elif twa >= self.twa_values[-1]:
-            base_speed = self.speed_values[-1]
-        else:
-            base_speed = np.interp(twa, self.twa_values, self.speed_values)
+    def get_speeds(self, twa: np.ndarray, wind_speed: np.ndarray) -> np.ndarray:
+        """Oblicza prędkości łodzi dla tablic kątów i prędkości wiatru (m/s)"""
+        return self.table.get_speeds(twa, wind_speed)
 
-        # Skalowanie względem prędkości wiatru
-        wind_factor = min(wind_speed / 10.0, 1.5)  # Maksymalny współczynnik 1.5
 
-        return base_speed * wind_factor
+@dataclass
+class SearchStatistics:
+    """Statystyki ostatniego wyszukiwania trasy"""
+    search_mode: str
+    nodes_expanded: Optional[int] = None  # Liczba rozwiniętych węzłów (jeśli znana)
+    edges_evaluated: int = 0  # Krawędzie, dla których policzono czas przejścia
+    edges_possible: int = 0  # Wszystkie pary węzłów w promieniu połączenia
+    path_found: bool = True  # False, jeśli zwrócono linię prostą z braku ścieżki w grafie
+    heuristic: str = "polar"  # Użyta heurystyka A*
+    nodes_pruned: int = 0  # Węzły pominięte jako zdominowane punkty izochron (tryb zależny od czasu)
+    may_be_suboptimal: bool = False  # True, jeśli odrzucanie punktów izochron mogło pominąć trasę optymalną
 
 
 class RouteOptimizer:
-    """Klasa do optymalizacji tras żeglarskich"""
-
-    def __init__(self, sailing_polar: SailingPolar):
+    """Klasa do optymalizacji tras żeglarskich
+
+    check_deadline wywoływane jest w trakcie budowy grafu i wyszukiwania;
+    zgłoszony z niego CalculationTimeoutError przerywa obliczenie (bez
+    zastępczej linii prostej).
+    """
+
+    # Maksymalna odległość połączenia między węzłami grafu w NM
+    MAX_CONNECTION_DISTANCE_NM = 5.0
+
+    def __init__(self, sailing_polar: SailingPolar, backend: str = "networkx",
+                 search_mode: str = "eager", wind_samples: Optional[int] = None,
+                 heuristic: str = "polar", check_deadline: Optional[Callable[[], None]] = None):
+        if backend not in GRAPH_BACKENDS:
+            raise ValueError(f"Nieznany silnik grafu: {backend}")
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(f"Nieznany tryb wyszukiwania: {search_mode}")
+        if search_mode == "bidirectional" and backend != "csr":
+            raise ValueError("Tryb bidirectional wymaga silnika grafu csr")
+        if heuristic not in HEURISTICS:
+            raise ValueError(f"Nieznana heurystyka: {heuristic}")
         self.sailing_polar = sailing_polar
+        self.backend = backend
+        self.search_mode = search_mode
+        self.heuristic = heuristic
+        self.wind_samples = wind_samples or settings.WIND_SAMPLES_PER_EDGE
+        self.check_deadline = check_deadline
         self.graph = nx.Graph()
+        self.last_statistics: Optional[SearchStatistics] = None
+        self.last_alternatives: List[Tuple[List[Point], float]] = []
+        # Graf ostatniego wyszukiwania: (liczba węzłów, heurystyka, expand(node) -> sąsiedzi, koszty)
+        self._search_space: Optional[Tuple[int, np.ndarray, Callable]] = None
 
     def build_graph(self, grid_points: List[Point], obstacles: List,
-                    weather_data: WeatherData) -> nx.Graph:
+                    weather_data: WeatherData, index: Optional[NeighbourIndex] = None) -> nx.Graph:
         """Buduje graf na podstawie punktów siatki i przeszkód"""
+        return self._graph_from_edges(grid_points, self._build_edges(grid_points, obstacles, weather_data, index))
+
+    def _graph_from_edges(self, grid_points: List[Point], edges: Tuple) -> nx.Graph:
+        """Wypełnia self.graph węzłami siatki i krawędziami z _build_edges"""
         self.graph.clear()
 
         # Dodaj węzły do grafu
         for i, point in enumerate(grid_points):
             self.graph.add_node(i, pos=(point.x, point.y), point=point)
 
-        # Dodaj krawędzie między sąsiadującymi punktami
-        max_connection_distance = 5.0  # Maksymalna odległość połączenia w NM
-        
-        for i, point1 in enumerate(grid_points):
-            for j, point2 in enumerate(grid_points[i + 1:], i + 1):
-                distance = calculate_distance(point1, point2)
-                
-                # Sprawdź czy punkty są wystarczająco blisko
-                if distance <= max_connection_distance and self._can_connect(point1, point2, obstacles):
-                    travel_time = self._calculate_travel_time(point1, point2, weather_data)
-
-                    self.graph.add_edge(i, j,
-                                        distance=distance,
-                                        time=travel_time,
-                                        weight=travel_time)
+        _, _, pairs_i, pairs_j, distances, times = edges
+        for i, j, distance, travel_time in zip(pairs_i.tolist(), pairs_j.tolist(),
+                                               distances.tolist(), times.tolist()):
+            self.graph.add_edge(i, j,
+                                distance=distance,
+                                time=travel_time,
+                                weight=travel_time)
 
         return self.graph
 
-    def _can_connect(self, point1: Point, point2: Point, obstacles: List) -> bool:
-        """Sprawdza czy można połączyć dwa punkty bez kolizji z przeszkodami"""
-        line = LineString([point1, point2])
+    def build_csr_graph(self, grid_points: List[Point], obstacles: List,
+                        weather_data: WeatherData, index: Optional[NeighbourIndex] = None,
+                        directed: bool = False) -> CSRGraph:
+        """Buduje tablicowy graf CSR (ten sam zbiór krawędzi co build_graph)
+
+        Przy directed=True czas przejścia liczony jest osobno dla każdego kierunku
+        krawędzi, więc graf nie zależy od kolejności węzłów (np. trasy w przeciwnych
+        kierunkach na jednym grafie).
+        """
+        edges = self._build_edges(grid_points, obstacles, weather_data, index)
+        reverse_times = None
+        if directed:
+            lons, lats, pairs_i, pairs_j, _, _ = edges
+            reverse_times = self._calculate_travel_times(
+                lons[pairs_j], lats[pairs_j], lons[pairs_i], lats[pairs_i], weather_data
+            )
+            self.last_statistics.edges_evaluated += len(reverse_times)
+        return CSRGraph.from_edges(*edges, reverse_times=reverse_times)
+
+    def _build_edges(self, grid_points: List[Point], obstacles: List, weather_data: WeatherData,
+                     index: Optional[NeighbourIndex] = None
+                     ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Wyznacza krawędzie grafu: (lons, lats, i, j, odległości, czasy)"""
+        lons, lats, pairs_i, pairs_j, distances = self._build_topology(grid_points, obstacles, index)
+        times = self._calculate_travel_times(lons[pairs_i], lats[pairs_i], lons[pairs_j], lats[pairs_j], weather_data)
+        return lons, lats, pairs_i, pairs_j, distances, times
+
+    def _build_topology(self, grid_points: List[Point], obstacles: List, index: Optional[NeighbourIndex] = None
+                        ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Krawędzie grafu bez czasów przejścia: (lons, lats, i, j, odległości)
+
+        Topologia zależy tylko od siatki i przeszkód - ta sama dla każdej polary.
+        """
+        # Kandydaci na krawędzie z indeksu przestrzennego (zamiast pętli po wszystkich parach)
+        if index is None:
+            index = PointIndex.from_points(grid_points)
+        pairs_i, pairs_j, distances = index.pairs_within(self.MAX_CONNECTION_DISTANCE_NM)
+        if self.check_deadline is not None:
+            self.check_deadline()
+
+        # Odrzuć krawędzie kolidujące z przeszkodami - jedno hurtowe zapytanie
+        obstacle_index = ObstacleIndex.ensure(obstacles)
+        blocked = obstacle_index.segments_blocked(
+            index.lons[pairs_i], index.lats[pairs_i],
+            index.lons[pairs_j], index.lats[pairs_j]
+        )
+        edges_possible = len(pairs_i)
+        pairs_i, pairs_j, distances = pairs_i[~blocked], pairs_j[~blocked], distances[~blocked]
+
+        self.last_statistics = SearchStatistics(
+            search_mode=self.search_mode,
+            edges_evaluated=len(pairs_i),
+            edges_possible=edges_possible,
+            heuristic=self.heuristic
+        )
 
-        for obstacle in obstacles:
-            try:
-                if hasattr(obstacle, 'geom') and obstacle.geom:
-                    # Konwertuj geometrię z PostGIS
-                    from shapely import wkb
-                    if hasattr(obstacle.geom, 'data'):
-                        geom = wkb.loads(bytes(obstacle.geom.data))
-                    else:
-                        geom = obstacle.geom
-                    
-                    if line.intersects(geom):
-                        return False
-            except Exception:
-                # Jeśli konwersja się nie powiedzie, pomiń przeszkodę
-                continue
+        return index.lons, index.lats, pairs_i, pairs_j, distances
 
-        return True
+    def _can_connect(self, point1: Point, point2: Point, obstacles) -> bool:
+        """Sprawdza czy można połączyć dwa punkty bez kolizji z przeszkodami"""
+        return ObstacleIndex.ensure(obstacles).can_connect(point1, point2)
 
     def _calculate_travel_time(self, start: Point, end: Point,
                                weather_data: WeatherData) -> float:
         """Oblicza czas podróży między dwoma punktami"""
-        # Pobierz dane pogodowe dla punktu startowego
-        wind_data = weather_data.get_wind_at_point(start)
-
-        # Oblicz kurs i odległość
-        bearing = calculate_bearing(start, end)
-        distance_nm = calculate_distance(start, end)
-
-        # Oblicz kąt względem wiatru
-        twa = abs(bearing - wind_data.direction)
-
-        # Pobierz prędkość łodzi
-        boat_speed = self.sailing_polar.get_speed(twa, wind_data.speed)
-
-        # Oblicz czas podróży (w godzinach)
-        if boat_speed > 0:
-            travel_time = distance_nm / boat_speed
-        else:
-            travel_time = float('inf')  # Nie można płynąć pod tym kątem
-
-        return travel_time
+        times = self._calculate_travel_times(
+            np.array([start.x]), np.array([start.y]),
+            np.array([end.x]), np.array([end.y]),
+            weather_data
+        )
+        return float(times[0])
+
+    def _calculate_travel_times(self, lons1: np.ndarray, lats1: np.ndarray,
+                                lons2: np.ndarray, lats2: np.ndarray,
+                                weather_data: WeatherData) -> np.ndarray:
+        """Oblicza czasy podróży (godziny) dla tablic krawędzi jednym wywołaniem"""
+        return calculate_travel_times(
+            lons1, lats1, lons2, lats2, weather_data, self.sailing_polar,
+            wind_samples=self.wind_samples, check_deadline=self.check_deadline
+        )
 
     def find_optimal_route(self, start: Point, end: Point,
                            grid_points: List[Point], obstacles: List,
-                           weather_data: WeatherData) -> Tuple[List[Point], float]:
-        """Znajduje optymalną trasę używając algorytmu A*"""
+                           weather_data: WeatherData,
+                           lattice: Optional[GridLattice] = None,
+                           alternatives: int = 0) -> Tuple[List[Point], float]:
+        """Znajduje optymalną trasę używając algorytmu A*
+
+        Jeśli podano lattice (siatka z HexLatticeGenerator), sąsiedztwo węzłów
+        wynika z indeksów komórek i graf budowany jest bez wyszukiwania przestrzennego.
+        Przy alternatives > 0 w last_alternatives zapisywane są do tylu tras
+        alternatywnych, wyznaczonych metodą kar na tym samym grafie.
+        """
+
+        self.last_statistics = None
+        self.last_alternatives = []
+        self._search_space = None
 
         # Dodaj punkty startowy i końcowy do siatki jeśli ich tam nie ma
-        extended_grid = list(grid_points)
-        
-        # Sprawdź czy punkty startowy i końcowy są już w siatce
-        start_in_grid = any(
-            calculate_distance(start, point) < 0.1 for point in grid_points
-        )
-        end_in_grid = any(
-            calculate_distance(end, point) < 0.1 for point in grid_points
-        )
-        
-        if not start_in_grid:
-            extended_grid.insert(0, start)
-        if not end_in_grid:
-            extended_grid.append(end)
+        extended_grid, start_in_grid = self._extend_grid(start, end, grid_points)
 
-        # Buduj graf
-        graph = self.build_graph(extended_grid, obstacles, weather_data)
+        # Zdekoduj przeszkody jednokrotnie dla całego wyszukiwania
+        obstacle_index = ObstacleIndex.ensure(obstacles)
 
         # Znajdź indeksy punktów start i end
         start_node = self._find_nearest_node(start, extended_grid)
         end_node = self._find_nearest_node(end, extended_grid)
 
+        index = None
+        if lattice is not None:
+            lons, lats = self._grid_coordinates(extended_grid)
+            lattice_nodes = np.arange(len(grid_points)) + (0 if start_in_grid else 1)
+            index = LatticeIndex(lons, lats, lattice, lattice_nodes)
+
         # Użyj algorytmu A* do znalezienia optymalnej trasy
         try:
-            path_nodes = nx.astar_path(
-                graph, start_node, end_node,
-                heuristic=lambda n1, n2: self._heuristic_function(n1, n2, extended_grid),
-                weight='time'
-            )
+            if self.search_mode == "lazy":
+                path_nodes, total_time = self._search_lazy(
+                    extended_grid, obstacle_index, weather_data, start_node, end_node, index
+                )
+            elif self.search_mode == "bidirectional":
+                path_nodes, total_time = self._search_bidirectional(
+                    extended_grid, obstacle_index, weather_data, start_node, end_node, index
+                )
+            elif self.backend == "csr":
+                path_nodes, total_time = self._search_csr(
+                    extended_grid, obstacle_index, weather_data, start_node, end_node, index
+                )
+            else:
+                path_nodes, total_time = self._search_networkx(
+                    extended_grid, obstacle_index, weather_data, start_node, end_node, index
+                )
 
             # Konwertuj węzły na punkty
             route_points = [extended_grid[node] for node in path_nodes]
 
-            # Oblicz całkowity czas podróży
-            total_time = 0.0
-            if len(path_nodes) > 1:
-                for i in range(len(path_nodes) - 1):
-                    if graph.has_edge(path_nodes[i], path_nodes[i + 1]):
-                        total_time += graph[path_nodes[i]][path_nodes[i + 1]]['time']
+            if alternatives > 0:
+                self.last_alternatives = [
+                    ([extended_grid[node] for node in result.path], result.cost)
+                    for result in self._find_alternatives(
+                        start_node, end_node, SearchResult(path=path_nodes, cost=total_time), alternatives
+                    )
+                ]
 
             return route_points, total_time
 
-        except nx.NetworkXNoPath:
+        except CalculationTimeoutError:
+            raise
+        except (nx.NetworkXNoPath, NoPathError):
             # Jeśli nie ma ścieżki, zwróć prostą linię
+            self._mark_path_not_found()
             return [start, end], self._calculate_travel_time(start, end, weather_data)
         except Exception as e:
             print(f"Błąd w znajdowaniu trasy: {e}")
+            self._mark_path_not_found()
             return [start, end], self._calculate_travel_time(start, end, weather_data)
 
+    def find_time_dependent_route(self, start: Point, end: Point, grid_points: List[Point], obstacles: List,
+                                  forecast: WeatherForecast, departure_hours: float = 0.0,
+                                  sector_deg: Optional[float] = None) -> Tuple[List[Point], float]:
+        """Znajduje najszybszą trasę przy wietrze zmiennym w czasie (prognoza)
+
+        Sąsiedztwo węzłów i kolizje z przeszkodami wyznaczane są raz, a czas
+        przejścia krawędzi liczony jest przy rozwinięciu węzła, z wiatrem
+        prognozy w chwili dotarcia do niego (departure_hours od początku
+        prognozy + czas od startu). Przy sector_deg > 0 (domyślnie
+        ISOCHRONE_SECTOR_DEG) zdominowane punkty izochron nie są rozwijane -
+        szybciej, ale trasa może nie być optymalna. Bez ścieżki w grafie - linia prosta.
+        """
+        self.last_alternatives = []
+        self._search_space = None
+
+        graph, start_node, end_node = self.build_time_dependent_graph(start, end, grid_points, obstacles)
+        costs = TimeDependentEdgeCosts(graph, forecast, self.sailing_polar, self.wind_samples, departure_hours)
+        return self.search_time_dependent(graph, start_node, end_node, costs, sector_deg)
+
+    def build_time_dependent_graph(self, start: Point, end: Point, grid_points: List[Point], obstacles: List
+                                   ) -> Tuple[CSRGraph, int, int]:
+        """Graf sąsiedztwa bez czasów przejścia oraz węzły startu i mety (trasy zależne od czasu)
+
+        Czasy krawędzi zależą od chwili wypłynięcia - liczy je TimeDependentEdgeCosts,
+        więc jeden graf służy wyszukiwaniom dla dowolnych chwil wypłynięcia.
+        """
+        self.last_statistics = None
+        extended_grid, _ = self._extend_grid(start, end, grid_points)
+        start_node = self._find_nearest_node(start, extended_grid)
+        end_node = self._find_nearest_node(end, extended_grid)
+
+        lons, lats, pairs_i, pairs_j, distances = self._build_topology(
+            extended_grid, ObstacleIndex.ensure(obstacles)
+        )
+        graph = CSRGraph.from_edges(lons, lats, pairs_i, pairs_j, distances, np.zeros(len(distances)))
+        return graph, start_node, end_node
+
+    def search_time_dependent(self, graph: CSRGraph, start_node: int, end_node: int,
+                              costs: TimeDependentEdgeCosts, sector_deg: Optional[float] = None
+                              ) -> Tuple[List[Point], float]:
+        """A* zależne od czasu na grafie z build_time_dependent_graph
+
+        Chwila wypłynięcia to costs.departure_hours - wyszukiwanie można powtarzać
+        na tym samym grafie i kosztach dla kolejnych chwil wypłynięcia.
+        sector_deg to sektor odrzucania punktów izochron (None - ISOCHRONE_SECTOR_DEG,
+        0 - wyszukiwanie dokładne).
+        """
+        if sector_deg is None:
+            sector_deg = settings.ISOCHRONE_SECTOR_DEG
+        pruning = None
+        if sector_deg > 0:
+            pruning = IsochronePruning(graph.lons, graph.lats, start_node, settings.ISOCHRONE_STEP_HOURS,
+                                       sector_deg)
+
+        statistics = SearchStatistics(
+            search_mode="time_dependent",
+            edges_possible=self.last_statistics.edges_possible if self.last_statistics else graph.num_edges,
+            heuristic="polar"
+        )
+        self.last_statistics = statistics
+        edges_before = costs.edges_evaluated
+        try:
+            result = time_dependent_astar(
+                graph.num_nodes, start_node, end_node,
+                self._heuristic_array(graph.lons, graph.lats, end_node, costs.forecast),
+                costs.expand, pruning.dominated if pruning is not None else None, self.check_deadline
+            )
+            route_points = [Point(graph.lons[node], graph.lats[node]) for node in result.path]
+            total_time = result.cost
+            statistics.nodes_expanded = result.nodes_expanded
+        except NoPathError:
+            self._mark_path_not_found()
+            route_points = [Point(graph.lons[start_node], graph.lats[start_node]),
+                            Point(graph.lons[end_node], graph.lats[end_node])]
+            total_time = self._calculate_travel_time(
+                route_points[0], route_points[1], costs.forecast.snapshot(costs.departure_hours)
+            )
+
+        statistics.edges_evaluated = costs.edges_evaluated - edges_before
+        statistics.nodes_pruned = pruning.nodes_pruned if pruning is not None else 0
+        statistics.may_be_suboptimal = statistics.nodes_pruned > 0
+        return route_points, total_time
+
+    def find_fleet_routes(self, start: Point, end: Point, grid_points: List[Point], obstacles: List,
+                          weather_data: WeatherData, polars: List[SailingPolar]
+                          ) -> List[Optional[Tuple[List[Point], float]]]:
+        """Trasy tego samego odcinka dla kilku łodzi (polar) na jednej topologii grafu
+
+        Siatka, sąsiedztwo węzłów i kolizje z przeszkodami wyznaczane są raz,
+        a czasy przejścia wszystkich krawędzi dla wszystkich polar - jednym
+        przebiegiem (calculate_fleet_travel_times). Dla każdej łodzi wykonywane
+        jest osobne A* z heurystyką z jej polary. Graf ma osobne czasy dla obu
+        kierunków krawędzi. Łódź bez ścieżki daje None.
+        """
+        self.last_statistics = None
+        extended_grid, _ = self._extend_grid(start, end, grid_points)
+        start_node = self._find_nearest_node(start, extended_grid)
+        end_node = self._find_nearest_node(end, extended_grid)
+
+        lons, lats, pairs_i, pairs_j, distances = self._build_topology(
+            extended_grid, ObstacleIndex.ensure(obstacles)
+        )
+        fleet_times = calculate_fleet_travel_times(
+            np.concatenate((lons[pairs_i], lons[pairs_j])), np.concatenate((lats[pairs_i], lats[pairs_j])),
+            np.concatenate((lons[pairs_j], lons[pairs_i])), np.concatenate((lats[pairs_j], lats[pairs_i])),
+            weather_data, polars, wind_samples=self.wind_samples
+        )
+        self.last_statistics.edges_evaluated = int(fleet_times.size)
+        self.last_statistics.nodes_expanded = 0
+        distance_to_end = haversine_nm(lons, lats, lons[end_node], lats[end_node])
+
+        routes = []
+        for polar, times in zip(polars, fleet_times):
+            forward, reverse = np.split(times, 2)
+            graph = CSRGraph.from_edges(lons, lats, pairs_i, pairs_j, distances, forward, reverse_times=reverse)
+            speed = self.heuristic_speed(weather_data, polar)
+            heuristic = distance_to_end / speed if speed > 0 else np.zeros(len(lons))
+            try:
+                result = astar(graph, start_node, end_node, heuristic, self.check_deadline)
+            except NoPathError:
+                routes.append(None)
+                continue
+            self.last_statistics.nodes_expanded += result.nodes_expanded
+            routes.append(([extended_grid[node] for node in result.path], result.cost))
+        return routes
+
+    def find_routes(self, nodes: List[Point], pairs: List[Tuple[int, int]], obstacles: List,
+                    weather_data: WeatherData, directed: bool = False) -> List[Optional[Tuple[List[Point], float]]]:
+        """Trasy dla wielu par (źródło, cel) na jednym wspólnym grafie
+
+        nodes to siatka obszaru (np. z AdaptiveGridGenerator.generate_region_grid),
+        a pary zawierają indeksy węzłów. Graf budowany jest raz, a z każdego
+        różnego źródła wykonywana jest jedna Dijkstra do wszystkich celów naraz
+        (jeden-do-wielu, wiele-do-wielu jako kilka drzew). Para bez ścieżki daje None.
+        Przy directed=True graf ma osobne czasy dla obu kierunków krawędzi.
+        """
+        self.last_statistics = None
+        graph = self.build_csr_graph(nodes, ObstacleIndex.ensure(obstacles), weather_data, directed=directed)
+        sources = sorted({source for source, _ in pairs})
+        costs, predecessors = shortest_path_trees(graph, sources)
+        rows = {source: row for row, source in enumerate(sources)}
+        self.last_statistics.nodes_expanded = int(np.isfinite(costs).sum())
+
+        routes = []
+        for source, target in pairs:
+            row = rows[source]
+            if not np.isfinite(costs[row, target]):
+                routes.append(None)
+                continue
+            path = reconstruct_path(predecessors[row], source, target)
+            routes.append(([nodes[node] for node in path], float(costs[row, target])))
+        return routes
+
+    def _find_alternatives(self, start_node: int, end_node: int, primary: SearchResult,
+                           count: int) -> List[SearchResult]:
+        """Trasy alternatywne na grafie ostatniego wyszukiwania (bez ponownego budowania grafu)"""
+        num_nodes, heuristic, expand = self._search_space
+        alternatives = penalty_alternatives(
+            num_nodes, start_node, end_node, heuristic, expand, primary, count,
+            penalty=settings.ALTERNATIVE_PENALTY,
+            max_overlap=settings.ALTERNATIVE_MAX_OVERLAP,
+            max_stretch=settings.ALTERNATIVE_MAX_STRETCH
+        )
+        if self.last_statistics is not None and self.last_statistics.nodes_expanded is not None:
+            self.last_statistics.nodes_expanded += sum(a.nodes_expanded for a in alternatives)
+        return alternatives
+
+    def _mark_path_not_found(self):
+        """Oznacza w statystykach, że trasa jest linią prostą zastępczą"""
+        if self.last_statistics is None:
+            self.last_statistics = SearchStatistics(search_mode=self.search_mode, heuristic=self.heuristic)
+        self.last_statistics.path_found = False
+
+    def _search_networkx(self, grid_points: List[Point], obstacles, weather_data: WeatherData,
+                         start_node: int, end_node: int,
+                         index: Optional[NeighbourIndex] = None) -> Tuple[List[int], float]:
+        """A* z networkx na grafie nx.Graph"""
+        edges = self._build_edges(grid_points, obstacles, weather_data, index)
+        graph = self._graph_from_edges(grid_points, edges)
+
+        def expand(node: int) -> Tuple[np.ndarray, np.ndarray]:
+            neighbours = sorted(graph[node])
+            costs = [graph[node][n]['time'] for n in neighbours]
+            return np.array(neighbours, dtype=np.int64), np.array(costs, dtype=float)
+
+        lons, lats = edges[0], edges[1]
+        heuristic = self._heuristic_array(lons, lats, end_node, weather_data)
+        self._search_space = (len(grid_points), heuristic, expand)
+
+        # networkx nie podaje liczby rozwiniętych węzłów - liczymy węzły, z których relaksowano krawędzie
+        expanded = set()
+
+        def weight(u: int, v: int, data: dict) -> float:
+            if u not in expanded:
+                expanded.add(u)
+                if self.check_deadline is not None and len(expanded) % DEADLINE_CHECK_INTERVAL == 0:
+                    self.check_deadline()
+            return data['time']
+
+        path_nodes = nx.astar_path(
+            graph, start_node, end_node,
+            heuristic=lambda n1, n2: heuristic[n1],
+            weight=weight
+        )
+        self.last_statistics.nodes_expanded = len(expanded)
+
+        # Oblicz całkowity czas podróży
+        total_time = 0.0
+        if len(path_nodes) > 1:
+            for i in range(len(path_nodes) - 1):
+                if graph.has_edge(path_nodes[i], path_nodes[i + 1]):
+                    total_time += graph[path_nodes[i]][path_nodes[i + 1]]['time']
+
+        return path_nodes, total_time
+
+    def _search_csr(self, grid_points: List[Point], obstacles, weather_data: WeatherData,
+                    start_node: int, end_node: int,
+                    index: Optional[NeighbourIndex] = None) -> Tuple[List[int], float]:
+        """A* na tablicowym grafie CSR z heurystyką policzoną wektorowo"""
+        graph = self.build_csr_graph(grid_points, obstacles, weather_data, index)
+
+        heuristic = self._heuristic_array(graph.lons, graph.lats, end_node, weather_data)
+
+        def expand(node: int) -> Tuple[np.ndarray, np.ndarray]:
+            start, end = graph.indptr[node], graph.indptr[node + 1]
+            return graph.indices[start:end], graph.times[start:end]
+
+        self._search_space = (graph.num_nodes, heuristic, expand)
+        result = astar(graph, start_node, end_node, heuristic, self.check_deadline)
+        self.last_statistics.nodes_expanded = result.nodes_expanded
+        return result.path, result.cost
+
+    def _search_bidirectional(self, grid_points: List[Point], obstacles, weather_data: WeatherData,
+                              start_node: int, end_node: int,
+                              index: Optional[NeighbourIndex] = None) -> Tuple[List[int], float]:
+        """Dwukierunkowy A* z potencjałami uśrednionymi na grafie CSR"""
+        graph = self.build_csr_graph(grid_points, obstacles, weather_data, index)
+        to_target = self._heuristic_array(graph.lons, graph.lats, end_node, weather_data)
+        to_source = self._heuristic_array(graph.lons, graph.lats, start_node, weather_data)
+
+        def expand(node: int) -> Tuple[np.ndarray, np.ndarray]:
+            start, end = graph.indptr[node], graph.indptr[node + 1]
+            return graph.indices[start:end], graph.times[start:end]
+
+        self._search_space = (graph.num_nodes, to_target, expand)
+        result = bidirectional_astar(graph, start_node, end_node, to_target, to_source, self.check_deadline)
+        self.last_statistics.nodes_expanded = result.nodes_expanded
+        return result.path, result.cost
+
+    def _search_lazy(self, grid_points: List[Point], obstacles, weather_data: WeatherData,
+                     start_node: int, end_node: int,
+                     index: Optional[NeighbourIndex] = None) -> Tuple[List[int], float]:
+        """A* z leniwym rozwijaniem krawędzi - bez budowania pełnego grafu"""
+        expander = LazyEdgeExpander(self, grid_points, ObstacleIndex.ensure(obstacles), weather_data, index)
+        index = expander.index
+
+        heuristic = self._heuristic_array(index.lons, index.lats, end_node, weather_data)
+
+        self._search_space = (len(grid_points), heuristic, expander.expand)
+        result = None
+        try:
+            result = lazy_astar(len(grid_points), start_node, end_node, heuristic, expander.expand,
+                                self.check_deadline)
+        finally:
+            self.last_statistics = SearchStatistics(
+                search_mode=self.search_mode,
+                heuristic=self.heuristic,
+                nodes_expanded=result.nodes_expanded if result else None,
+                edges_evaluated=expander.edges_evaluated,
+                edges_possible=index.count_pairs_within(self.MAX_CONNECTION_DISTANCE_NM)
+            )
+
+        return result.path, result.cost
+
     def _find_nearest_node(self, point: Point, grid_points: List[Point]) -> int:
         """Znajduje najbliższy węzeł do danego punktu"""
-        min_distance = float('inf')
-        nearest_node = 0
+        grid_lons, grid_lats = self._grid_coordinates(grid_points)
+        if len(grid_lons) == 0:
+            return 0
+        return int(np.argmin(haversine_nm(point.x, point.y, grid_lons, grid_lats)))
+
+    def _extend_grid(self, start: Point, end: Point, grid_points: List[Point]) -> Tuple[List[Point], bool]:
+        """Siatka z dołączonym startem (na początku) i metą (na końcu), jeśli ich w niej nie ma
+
+        Zwraca też informację, czy start był już węzłem siatki.
+        """
+        extended_grid = list(grid_points)
 
-        for i, grid_point in enumerate(grid_points):
-            distance = calculate_distance(point, grid_point)
-            if distance < min_distance:
-                min_distance = distance
-                nearest_node = i
+        # Sprawdź czy punkty startowy i końcowy są już w siatce
+        grid_lons, grid_lats = self._grid_coordinates(grid_points)
+        start_in_grid = bool(np.any(haversine_nm(start.x, start.y, grid_lons, grid_lats) < 0.1))
+        end_in_grid = bool(np.any(haversine_nm(end.x, end.y, grid_lons, grid_lats) < 0.1))
 
-        return nearest_node
+        if not start_in_grid:
+            extended_grid.insert(0, start)
+        if not end_in_grid:
+            extended_grid.append(end)
+        return extended_grid, start_in_grid
+
+    @staticmethod
+    def _grid_coordinates(grid_points: List[Point]) -> Tuple[np.ndarray, np.ndarray]:
+        """Zwraca tablice długości i szerokości geograficznych punktów siatki"""
+        coords = np.array([(p.x, p.y) for p in grid_points], dtype=float).reshape(-1, 2)
+        return coords[:, 0], coords[:, 1]
+
+    def heuristic_speed(self, weather_data: WeatherData, polar: Optional[SailingPolar] = None) -> float:
+        """Górne ograniczenie prędkości łodzi (węzły) w polu wiatru zapytania
+
+        Wiatr na krawędziach pochodzi z punktów pogodowych, więc nie przekracza
+        ich maksymalnej prędkości, a łódź nie płynie szybciej niż maksimum polary
+        dla takiego wiatru. Odległość / ta prędkość nie przeszacowuje czasu przejścia.
+        Domyślnie używana jest polara optymalizatora.
+        """
+        return (polar or self.sailing_polar).table.max_speed(weather_data.max_wind_speed())
+
+    def _heuristic_array(self, lons: np.ndarray, lats: np.ndarray, end_node: int,
+                         weather_data: WeatherData) -> np.ndarray:
+        """Dopuszczalna heurystyka A* (godziny do celu) dla wszystkich węzłów"""
+        speed = self.heuristic_speed(weather_data)
+        if speed > 0:
+            return haversine_nm(lons, lats, lons[end_node], lats[end_node]) / speed
+        return np.zeros(len(lons))
+
+
+class LazyEdgeExpander:
+    """Generuje sąsiadów węzła i koszty krawędzi dopiero przy jego rozwinięciu
+
+    Koszty (również informacja o kolizji z przeszkodą) są zapamiętywane dla
+    par (i < j), więc żadna krawędź nie jest liczona dwa razy. Czas przejścia
+    liczony jest hurtowo dla nowych krawędzi węzła, w kierunku i -> j,
+    tak jak przy budowie pełnego grafu.
+    """
+
+    def __init__(self, optimizer: RouteOptimizer, grid_points: List[Point],
+                 obstacle_index: ObstacleIndex, weather_data: WeatherData,
+                 index: Optional[NeighbourIndex] = None):
+        self.optimizer = optimizer
+        self.grid_points = grid_points
+        self.obstacle_index = obstacle_index
+        self.weather_data = weather_data
+        self.index = index if index is not None else PointIndex.from_points(grid_points)
+        self.costs: Dict[Tuple[int, int], float] = {}  # NaN - krawędź zablokowana
+        self.edges_evaluated = 0
+
+    def expand(self, node: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Zwraca sąsiadów węzła i czasy przejścia krawędzi do nich"""
+        neighbours, _ = self.index.neighbours_of(node, self.optimizer.MAX_CONNECTION_DISTANCE_NM)
+        keys = [(min(node, n), max(node, n)) for n in neighbours.tolist()]
+
+        missing = [key for key in keys if key not in self.costs]
+        if missing:
+            self._evaluate(missing)
+
+        costs = np.array([self.costs[key] for key in keys], dtype=float)
+        passable = ~np.isnan(costs)
+        return neighbours[passable], costs[passable]
+
+    def _evaluate(self, keys: List[Tuple[int, int]]):
+        """Sprawdza kolizje (hurtowo) i liczy czasy przejścia dla nowych krawędzi"""
+        edges_i = np.array([i for i, _ in keys], dtype=np.int64)
+        edges_j = np.array([j for _, j in keys], dtype=np.int64)
+        blocked = self.obstacle_index.segments_blocked(
+            self.index.lons[edges_i], self.index.lats[edges_i],
+            self.index.lons[edges_j], self.index.lats[edges_j]
+        )
 
-    def _heuristic_function(self, node1: int, node2: int, grid_points: List[Point]) -> float:
-        """Funkcja heurystyczna dla algorytmu A*"""
-        point1 = grid_points[node1]
-        point2 = grid_points[node2]
+        edges_i, edges_j = edges_i[~blocked], edges_j[~blocked]
+        times = self.optimizer._calculate_travel_times(
+            self.index.lons[edges_i], self.index.lats[edges_i],
+            self.index.lons[edges_j], self.index.lats[edges_j],
+            self.weather_data
+        )
+        self.edges_evaluated += len(times)
 
-        # Użyj prostej odległości jako heurystyki podzielonej przez średnią prędkość
-        distance = calculate_distance(point1, point2)
-        return distance / 6.0  # Założona średnia prędkość 6 węzłów
+        for key, is_blocked in zip(keys, blocked.tolist()):
+            if is_blocked:
+                self.costs[key] = np.nan
+        for i, j, travel_time in zip(edges_i.tolist(), edges_j.tolist(), times.tolist()):
+            self.costs[(i, j)] = travel_time
 
 
 # Domyślna charakterystyka polarna dla jachtu regatowego
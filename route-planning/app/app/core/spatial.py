@@ -0,0 +1,247 @@
+import numpy as np
+from dataclasses import dataclass
+from scipy.spatial import cKDTree
+from shapely.geometry import Point
+from typing import List, Tuple
+
+from app.utils.geodesy import EARTH_RADIUS_NM, haversine_nm
+
+
+class PointIndex:
+    """Indeks przestrzenny (KD-tree) punktów siatki
+
+    Punkty są rzutowane na sferę jednostkową (współrzędne ECEF). Długość cięciwy
+    jest monotoniczną funkcją odległości ortodromicznej, więc zapytanie o promień
+    cięciwy zwraca dokładnie te pary, które mieszczą się w zadanym promieniu
+    haversine - bez przybliżeń związanych z rzutowaniem płaskim.
+    """
+
+    # Względny zapas promienia cięciwy (błędy zaokrągleń), odfiltrowywany haversine
+    _RADIUS_TOLERANCE = 1e-9
+
+    def __init__(self, lons: np.ndarray, lats: np.ndarray):
+        self.lons = np.asarray(lons, dtype=float)
+        self.lats = np.asarray(lats, dtype=float)
+        self.tree = cKDTree(self._to_unit_sphere(self.lons, self.lats))
+
+    @classmethod
+    def from_points(cls, points: List[Point]) -> "PointIndex":
+        """Tworzy indeks z listy punktów Shapely (x = lon, y = lat)"""
+        coords = np.array([(p.x, p.y) for p in points], dtype=float).reshape(-1, 2)
+        return cls(coords[:, 0], coords[:, 1])
+
+    def __len__(self) -> int:
+        return len(self.lons)
+
+    def pairs_within(self, max_distance_nm: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Zwraca wszystkie pary (i < j) w odległości <= max_distance_nm
+
+        Pary są posortowane leksykograficznie, czyli w tej samej kolejności,
+        w jakiej zwracała je pełna pętla po wszystkich parach punktów.
+        """
+        empty = np.empty(0, dtype=np.int64)
+        if len(self) < 2:
+            return empty, empty, np.empty(0, dtype=float)
+
+        pairs = self.tree.query_pairs(self._chord_radius(max_distance_nm), output_type='ndarray')
+        if len(pairs) == 0:
+            return empty, empty, np.empty(0, dtype=float)
+
+        order = np.lexsort((pairs[:, 1], pairs[:, 0]))
+        i = pairs[order, 0].astype(np.int64)
+        j = pairs[order, 1].astype(np.int64)
+
+        distances = haversine_nm(self.lons[i], self.lats[i], self.lons[j], self.lats[j])
+        mask = distances <= max_distance_nm
+        return i[mask], j[mask], distances[mask]
+
+    def count_pairs_within(self, max_distance_nm: float) -> int:
+        """Zlicza pary punktów w zadanym promieniu bez ich materializowania"""
+        if len(self) < 2:
+            return 0
+        ordered_pairs = self.tree.count_neighbors(self.tree, self._chord_radius(max_distance_nm))
+        return int(ordered_pairs - len(self)) // 2
+
+    def neighbours_of(self, idx: int, max_distance_nm: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Zwraca sąsiadów punktu idx (bez niego samego) w zadanym promieniu"""
+        candidates = np.asarray(
+            self.tree.query_ball_point(self.tree.data[idx], self._chord_radius(max_distance_nm)),
+            dtype=np.int64
+        )
+        candidates = np.sort(candidates[candidates != idx])
+
+        distances = haversine_nm(
+            self.lons[idx], self.lats[idx], self.lons[candidates], self.lats[candidates]
+        )
+        mask = distances <= max_distance_nm
+        return candidates[mask], distances[mask]
+
+    def within(self, lon: float, lat: float, max_distance_nm: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Zwraca punkty indeksu (rosnąco) w zadanym promieniu od (lon, lat) i ich odległości"""
+        candidates = np.asarray(
+            self.tree.query_ball_point(self._to_unit_sphere(np.array([lon]), np.array([lat]))[0],
+                                       self._chord_radius(max_distance_nm)),
+            dtype=np.int64
+        )
+        candidates = np.sort(candidates)
+
+        distances = haversine_nm(lon, lat, self.lons[candidates], self.lats[candidates])
+        mask = distances <= max_distance_nm
+        return candidates[mask], distances[mask]
+
+    def nearest(self, lons: np.ndarray, lats: np.ndarray, k: int = 1) -> np.ndarray:
+        """Zwraca indeksy najbliższych punktów indeksu dla tablic współrzędnych
+
+        Dla k > 1 wynik ma kształt (m, k) - sąsiedzi od najbliższego.
+        """
+        _, idx = self.tree.query(self._to_unit_sphere(np.asarray(lons), np.asarray(lats)), k=k)
+        return np.asarray(idx, dtype=np.int64)
+
+    def _chord_radius(self, distance_nm: float) -> float:
+        """Przelicza odległość ortodromiczną (NM) na długość cięciwy sfery jednostkowej"""
+        angle = min(distance_nm / EARTH_RADIUS_NM, np.pi)
+        return 2.0 * np.sin(angle / 2.0) * (1.0 + self._RADIUS_TOLERANCE)
+
+    @staticmethod
+    def _to_unit_sphere(lons: np.ndarray, lats: np.ndarray) -> np.ndarray:
+        """Konwertuje współrzędne geograficzne na punkty sfery jednostkowej"""
+        lon_rad = np.radians(lons)
+        lat_rad = np.radians(lats)
+        cos_lat = np.cos(lat_rad)
+        return np.column_stack((
+            cos_lat * np.cos(lon_rad),
+            cos_lat * np.sin(lon_rad),
+            np.sin(lat_rad)
+        ))
+
+
+@dataclass
+class GridLattice:
+    """Położenie punktów siatki na regularnej sieci
+
+    Punkt o komórce (a, b) leży w lokalnym odwzorowaniu w a * basis_nm[0] + b * basis_nm[1]
+    względem początku sieci, więc sąsiedzi punktu wynikają z samych indeksów komórek.
+    """
+    cells: np.ndarray  # (n, 2) int - komórki kolejnych punktów siatki
+    basis_nm: np.ndarray  # (2, 2) - wektory bazowe sieci w NM
+
+    def offsets_within(self, max_distance_nm: float) -> np.ndarray:
+        """Zwraca przesunięcia komórek (k, 2) o długości <= max_distance_nm (bez (0, 0))"""
+        basis = np.asarray(self.basis_nm, dtype=float)
+        # Zasięg indeksów: odwrotność bazy ogranicza |a| i |b| dla wektorów w kole o promieniu max
+        reach = int(np.ceil(max_distance_nm * np.abs(np.linalg.inv(basis)).sum(axis=0).max())) + 1
+        a, b = np.meshgrid(np.arange(-reach, reach + 1), np.arange(-reach, reach + 1), indexing='ij')
+        offsets = np.column_stack((a.ravel(), b.ravel()))
+        lengths = np.hypot(*(offsets @ basis).T)
+        return offsets[(lengths <= max_distance_nm) & (lengths > 0)]
+
+
+class LatticeIndex:
+    """Indeks sąsiedztwa węzłów leżących na regularnej sieci - bez wyszukiwania przestrzennego
+
+    Ma ten sam interfejs co PointIndex. Pary węzłów sieci wyznaczane są
+    arytmetycznie z przesunięć komórek. Węzły spoza sieci (np. dołączony start
+    lub meta) łączone są bezpośrednim porównaniem odległości do wszystkich węzłów.
+    Odległości są zawsze liczone haversine, więc wynik odpowiada PointIndex.
+    """
+
+    # Zapas na błąd lokalnego odwzorowania przy wyborze przesunięć komórek
+    _OFFSET_TOLERANCE = 0.01
+
+    def __init__(self, lons: np.ndarray, lats: np.ndarray, lattice: GridLattice,
+                 lattice_nodes: np.ndarray):
+        self.lons = np.asarray(lons, dtype=float)
+        self.lats = np.asarray(lats, dtype=float)
+        self.lattice = lattice
+        self.lattice_nodes = np.asarray(lattice_nodes, dtype=np.int64)
+
+        cells = np.asarray(lattice.cells, dtype=np.int64).reshape(-1, 2)
+        self._cell_origin = cells.min(axis=0) if len(cells) else np.zeros(2, dtype=np.int64)
+        self._cells = cells - self._cell_origin
+        shape = self._cells.max(axis=0) + 1 if len(cells) else np.zeros(2, dtype=np.int64)
+        self._lookup = np.full(shape, -1, dtype=np.int64)
+        self._lookup[self._cells[:, 0], self._cells[:, 1]] = self.lattice_nodes
+
+        on_lattice = np.zeros(len(self.lons), dtype=bool)
+        on_lattice[self.lattice_nodes] = True
+        self._node_cell = np.full((len(self.lons), 2), -1, dtype=np.int64)
+        self._node_cell[self.lattice_nodes] = self._cells
+        self.extra_nodes = np.flatnonzero(~on_lattice)
+        self._extra_cache = {}
+        self._offsets_cache = {}
+
+    def __len__(self) -> int:
+        return len(self.lons)
+
+    def pairs_within(self, max_distance_nm: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Zwraca wszystkie pary (i < j) w odległości <= max_distance_nm, posortowane leksykograficznie"""
+        offsets = self._offsets(max_distance_nm)
+        # Połowa przesunięć wystarcza - druga połowa daje te same pary odwrotnie
+        offsets = offsets[(offsets[:, 0] > 0) | ((offsets[:, 0] == 0) & (offsets[:, 1] > 0))]
+
+        found = self._lookup_cells(self._cells[:, None, :] + offsets[None, :, :])
+        rows, _ = np.nonzero(found >= 0)
+        sources = np.concatenate((self.lattice_nodes[rows], self._extra_pairs(max_distance_nm)[0]))
+        targets = np.concatenate((found[found >= 0], self._extra_pairs(max_distance_nm)[1]))
+
+        i, j = np.minimum(sources, targets), np.maximum(sources, targets)
+        order = np.lexsort((j, i))
+        i, j = i[order], j[order]
+
+        distances = haversine_nm(self.lons[i], self.lats[i], self.lons[j], self.lats[j])
+        mask = distances <= max_distance_nm
+        return i[mask], j[mask], distances[mask]
+
+    def count_pairs_within(self, max_distance_nm: float) -> int:
+        """Zlicza pary punktów w zadanym promieniu"""
+        return len(self.pairs_within(max_distance_nm)[0])
+
+    def neighbours_of(self, idx: int, max_distance_nm: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Zwraca sąsiadów punktu idx (bez niego samego) w zadanym promieniu"""
+        extra_sources, extra_targets = self._extra_pairs(max_distance_nm)
+        extra = np.concatenate((extra_targets[extra_sources == idx], extra_sources[extra_targets == idx]))
+        if self._node_cell[idx, 0] < 0:
+            candidates = extra
+        else:
+            found = self._lookup_cells(self._node_cell[idx] + self._offsets(max_distance_nm))
+            candidates = np.concatenate((found[found >= 0], extra))
+        candidates = np.unique(candidates)
+
+        distances = haversine_nm(
+            self.lons[idx], self.lats[idx], self.lons[candidates], self.lats[candidates]
+        )
+        mask = distances <= max_distance_nm
+        return candidates[mask], distances[mask]
+
+    def _extra_pairs(self, max_distance_nm: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Pary (węzeł spoza sieci, sąsiad) - każda para tylko raz, wynik zapamiętywany"""
+        if max_distance_nm not in self._extra_cache:
+            sources, targets = [], []
+            for node in self.extra_nodes.tolist():
+                distances = haversine_nm(self.lons[node], self.lats[node], self.lons, self.lats)
+                neighbours = np.flatnonzero(distances <= max_distance_nm)
+                # Pary dwóch węzłów spoza sieci zapisywane tylko od mniejszego indeksu
+                neighbours = neighbours[(neighbours != node) &
+                                        ((self._node_cell[neighbours, 0] >= 0) | (neighbours > node))]
+                sources.append(np.full(len(neighbours), node, dtype=np.int64))
+                targets.append(neighbours)
+            self._extra_cache[max_distance_nm] = (
+                np.concatenate(sources) if sources else np.empty(0, dtype=np.int64),
+                np.concatenate(targets) if targets else np.empty(0, dtype=np.int64)
+            )
+        return self._extra_cache[max_distance_nm]
+
+    def _offsets(self, max_distance_nm: float) -> np.ndarray:
+        """Przesunięcia komórek dla promienia (z zapasem), zapamiętywane"""
+        if max_distance_nm not in self._offsets_cache:
+            self._offsets_cache[max_distance_nm] = self.lattice.offsets_within(
+                max_distance_nm * (1.0 + self._OFFSET_TOLERANCE)
+            )
+        return self._offsets_cache[max_distance_nm]
+
+    def _lookup_cells(self, cells: np.ndarray) -> np.ndarray:
+        """Zwraca węzły w podanych komórkach (-1 dla komórek pustych lub poza siecią)"""
+        inside = np.all((cells >= 0) & (cells < self._lookup.shape), axis=-1)
+        found = np.full(cells.shape[:-1], -1, dtype=np.int64)
+        found[inside] = self._lookup[cells[inside][:, 0], cells[inside][:, 1]]
+        return found
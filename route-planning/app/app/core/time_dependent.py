@@ -0,0 +1,76 @@
+import numpy as np
+from typing import Dict, List, Tuple
+
+from app.core.graph import CSRGraph
+from app.core.travel_time import edge_sample_points, travel_times_from_wind
+from app.core.weather import WeatherForecast
+from app.utils.geodesy import haversine_nm, initial_bearing
+
+
+class TimeDependentEdgeCosts:
+    """Czasy przejścia krawędzi grafu zależne od chwili wypłynięcia (prognoza wiatru)
+
+    Geometria wszystkich łuków grafu - kursy, odległości i najbliższe punkty
+    prognozy w punktach próbkowania wiatru - liczona jest raz. Przy rozwinięciu
+    węzła odczytywany jest tylko wiatr prognozy w chwili dotarcia do węzła
+    (departure_hours + time od początku prognozy) i prędkości z polary.
+    """
+
+    def __init__(self, graph: CSRGraph, forecast: WeatherForecast, sailing_polar,
+                 wind_samples: int = 1, departure_hours: float = 0.0):
+        self.graph = graph
+        self.forecast = forecast
+        self.sailing_polar = sailing_polar
+        self.departure_hours = departure_hours
+        self.edges_evaluated = 0
+
+        sources = np.repeat(np.arange(graph.num_nodes), np.diff(graph.indptr))
+        lons1, lats1 = graph.lons[sources], graph.lats[sources]
+        lons2, lats2 = graph.lons[graph.indices], graph.lats[graph.indices]
+        self.bearings = initial_bearing(lons1, lats1, lons2, lats2)
+        self.distances = haversine_nm(lons1, lats1, lons2, lats2)
+        self.wind_points = forecast.nearest_points(*edge_sample_points(lons1, lats1, lons2, lats2, wind_samples))
+
+    def expand(self, node: int, time: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Sąsiedzi węzła i czasy przejścia przy wypłynięciu w chwili time (godziny od startu)"""
+        arcs = slice(self.graph.indptr[node], self.graph.indptr[node + 1])
+        wind_speeds, wind_directions = self.forecast.wind_at(self.wind_points[arcs], self.departure_hours + time)
+        self.edges_evaluated += arcs.stop - arcs.start
+        return self.graph.indices[arcs], travel_times_from_wind(
+            self.distances[arcs], self.bearings[arcs], wind_speeds, wind_directions, self.sailing_polar
+        )
+
+
+class IsochronePruning:
+    """Odrzucanie zdominowanych punktów izochron
+
+    Węzły dzielone są na sektory kierunku od startu (sector_deg) i izochrony -
+    przedziały czasu dotarcia o długości step_hours. Węzeł jest zdominowany,
+    jeśli w jego sektorze któryś rozwinięty węzeł z tej samej lub wcześniejszej
+    izochrony leży dalej od startu: węzeł jest za frontem izochrony i nie jest
+    rozwijany.
+    Tak jak w metodzie izochron przycinanie jest heurystyczne - trasa może być
+    nieco dłuższa od optymalnej w grafie.
+    """
+
+    def __init__(self, lons: np.ndarray, lats: np.ndarray, source: int,
+                 step_hours: float, sector_deg: float):
+        self.step_hours = step_hours
+        bearings = initial_bearing(lons[source], lats[source], lons, lats)
+        self.sectors = (bearings // sector_deg).astype(np.int64)
+        self.distances = haversine_nm(lons[source], lats[source], lons, lats)
+        self.fronts: Dict[int, List[float]] = {}  # sektor -> najdalszy węzeł każdej izochrony
+        self.nodes_pruned = 0
+
+    def dominated(self, node: int, time: float) -> bool:
+        isochrone = int(time // self.step_hours)
+        front = self.fronts.setdefault(int(self.sectors[node]), [])
+        if len(front) <= isochrone:
+            front.extend([-np.inf] * (isochrone + 1 - len(front)))
+
+        distance = float(self.distances[node])
+        if max(front[:isochrone + 1]) > distance:
+            self.nodes_pruned += 1
+            return True
+        front[isochrone] = max(front[isochrone], distance)
+        return False
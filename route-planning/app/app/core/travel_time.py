@@ -0,0 +1,94 @@
+import numpy as np
+from typing import Callable, Optional, Tuple
+
+from app.core.weather import WeatherData
+from app.utils.geodesy import haversine_nm, initial_bearing
+
+# Liczba krawędzi przetwarzanych w jednej partii (ogranicza zużycie pamięci)
+BATCH_SIZE = 250_000
+
+
+def calculate_travel_times(lons1: np.ndarray, lats1: np.ndarray,
+                           lons2: np.ndarray, lats2: np.ndarray,
+                           weather_data: WeatherData, sailing_polar,
+                           wind_samples: int = 1,
+                           geometry: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+                           check_deadline: Optional[Callable[[], None]] = None) -> np.ndarray:
+    """Oblicza czasy przejścia (godziny) dla tablic krawędzi (lon1, lat1) -> (lon2, lat2)
+
+    Każda krawędź dzielona jest na wind_samples równych odcinków. Wiatr
+    próbkowany jest na początku każdego odcinka, więc dla wind_samples=1
+    wynik odpowiada wiatrowi w punkcie startowym krawędzi. Czas przejścia
+    to suma czasów odcinków; kurs niemożliwy do pożeglowania (prędkość 0)
+    daje czas nieskończony. geometry to opcjonalnie policzone wcześniej
+    (odległości, kursy) krawędzi, np. z zapisanego grafu regionalnego.
+    check_deadline wywoływane jest przed każdą partią BATCH_SIZE krawędzi.
+    """
+    return calculate_fleet_travel_times(
+        lons1, lats1, lons2, lats2, weather_data, [sailing_polar], wind_samples, geometry, check_deadline
+    )[0]
+
+
+def calculate_fleet_travel_times(lons1: np.ndarray, lats1: np.ndarray,
+                                 lons2: np.ndarray, lats2: np.ndarray,
+                                 weather_data: WeatherData, sailing_polars: list,
+                                 wind_samples: int = 1,
+                                 geometry: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+                                 check_deadline: Optional[Callable[[], None]] = None) -> np.ndarray:
+    """Czasy przejścia tych samych krawędzi dla kilku polar - tablica (polary, krawędzie)
+
+    Kursy, odległości i wiatr wzdłuż krawędzi zależą tylko od geometrii, więc
+    liczone są raz; dla każdej polary odczytywane są jedynie prędkości łodzi.
+    check_deadline działa jak w calculate_travel_times.
+    """
+    lons1, lats1 = np.asarray(lons1, dtype=float), np.asarray(lats1, dtype=float)
+    lons2, lats2 = np.asarray(lons2, dtype=float), np.asarray(lats2, dtype=float)
+    wind_samples = max(int(wind_samples), 1)
+
+    times = np.empty((len(sailing_polars), len(lons1)), dtype=float)
+
+    for offset in range(0, len(lons1), BATCH_SIZE):
+        if check_deadline is not None:
+            check_deadline()
+        batch = slice(offset, offset + BATCH_SIZE)
+        x1, y1, x2, y2 = lons1[batch], lats1[batch], lons2[batch], lats2[batch]
+
+        if geometry is None:
+            bearings = initial_bearing(x1, y1, x2, y2)
+            distances = haversine_nm(x1, y1, x2, y2)
+        else:
+            distances, bearings = geometry[0][batch], geometry[1][batch]
+
+        # Punkty próbkowania wiatru wzdłuż krawędzi: kształt (krawędzie, próbki)
+        sample_lons, sample_lats = edge_sample_points(x1, y1, x2, y2, wind_samples)
+        wind_speeds, wind_directions = weather_data.get_wind_arrays(sample_lons, sample_lats)
+
+        for number, sailing_polar in enumerate(sailing_polars):
+            times[number, batch] = travel_times_from_wind(
+                distances, bearings, wind_speeds, wind_directions, sailing_polar
+            )
+
+    return times
+
+
+def edge_sample_points(lons1: np.ndarray, lats1: np.ndarray, lons2: np.ndarray, lats2: np.ndarray,
+                       wind_samples: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Punkty próbkowania wiatru - początki wind_samples równych odcinków krawędzi (krawędzie, próbki)"""
+    fractions = np.arange(max(int(wind_samples), 1), dtype=float) / max(int(wind_samples), 1)
+    sample_lons = lons1[:, None] + (lons2 - lons1)[:, None] * fractions
+    sample_lats = lats1[:, None] + (lats2 - lats1)[:, None] * fractions
+    return sample_lons, sample_lats
+
+
+def travel_times_from_wind(distances: np.ndarray, bearings: np.ndarray, wind_speeds: np.ndarray,
+                           wind_directions: np.ndarray, sailing_polar) -> np.ndarray:
+    """Czasy przejścia krawędzi z wiatru w punktach próbkowania (tablice (krawędzie, próbki))"""
+    twa = np.abs(bearings[:, None] - wind_directions)
+    boat_speeds = sailing_polar.get_speeds(twa, wind_speeds)
+
+    with np.errstate(divide='ignore'):
+        hours_per_nm = np.where(boat_speeds > 0, 1.0 / boat_speeds, np.inf)
+    with np.errstate(invalid='ignore'):
+        times = distances * hours_per_nm.mean(axis=1)
+    # 0 * inf (zerowa odległość pod kursem niemożliwym) - jak wcześniej, czas nieskończony
+    return np.where(np.isnan(times), np.inf, times)
@@ -1,14 +1,17 @@
 import aiohttp
 import asyncio
+import hashlib
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import json
 from shapely.geometry import Point
 import logging
 import numpy as np
 
 from app.core.config import settings
+from app.core.spatial import PointIndex
+from app.utils.geodesy import NM_PER_KM, haversine_nm
 
 logger = logging.getLogger(__name__)
 
@@ -39,50 +42,181 @@ class WeatherData:
     def __init__(self):
         self.weather_points: List[WeatherPoint] = []
         self.timestamp = datetime.utcnow()
+        self._index: Optional[PointIndex] = None
 
     def add_weather_point(self, weather_point: WeatherPoint):
         """Dodaje punkt pogodowy"""
         self.weather_points.append(weather_point)
+        self._index = None
 
     def get_wind_at_point(self, point: Point) -> WindData:
-        """Pobiera dane wiatru dla danego punktu (z interpolacją)"""
+        """Pobiera dane wiatru dla danego punktu (najbliższy punkt pogodowy)"""
         if not self.weather_points:
             # Domyślne dane wiatru
             return WindData(speed=5.0, direction=270.0, timestamp=datetime.utcnow())
 
-        # Znajdź najbliższy punkt pogodowy
-        min_distance = float('inf')
-        nearest_point = None
+        nearest = self._get_index().nearest(np.array([point.x]), np.array([point.y]))[0]
+        return self.weather_points[nearest].wind
 
-        for weather_point in self.weather_points:
-            distance = self._calculate_distance(
-                point.y, point.x,
-                weather_point.lat, weather_point.lon
-            )
-            if distance < min_distance:
-                min_distance = distance
-                nearest_point = weather_point
+    def get_wind_arrays(self, lons: np.ndarray, lats: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Zwraca prędkości (m/s) i kierunki wiatru dla tablic współrzędnych
 
-        return nearest_point.wind if nearest_point else WindData(5.0, 270.0)
+        Wartości pochodzą z najbliższego punktu pogodowego, tak jak w get_wind_at_point.
+        Wynikowe tablice mają kształt tablicy wejściowej.
+        """
+        lons = np.asarray(lons, dtype=float)
+        lats = np.asarray(lats, dtype=float)
+        if not self.weather_points:
+            return np.full(lons.shape, 5.0), np.full(lons.shape, 270.0)
+
+        index = self._get_index()
+        nearest = index.nearest(lons.ravel(), lats.ravel()).reshape(lons.shape)
+        return self._wind_speeds[nearest], self._wind_directions[nearest]
+
+    @classmethod
+    def from_arrays(cls, lons: np.ndarray, lats: np.ndarray, speeds: np.ndarray,
+                    directions: np.ndarray, timestamp: Optional[datetime] = None) -> "WeatherData":
+        """Odtwarza dane pogodowe z tablic (np. przekazanych do procesu obliczeniowego)"""
+        weather_data = cls()
+        if timestamp is not None:
+            weather_data.timestamp = timestamp
+        for lon, lat, speed, direction in zip(np.asarray(lons).tolist(), np.asarray(lats).tolist(),
+                                              np.asarray(speeds).tolist(), np.asarray(directions).tolist()):
+            weather_data.add_weather_point(WeatherPoint(lat=lat, lon=lon, wind=WindData(speed=speed, direction=direction)))
+        return weather_data
+
+    def to_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Zwraca tablice (lons, lats, prędkości wiatru, kierunki wiatru) punktów pogodowych"""
+        if not self.weather_points:
+            return tuple(np.empty(0, dtype=float) for _ in range(4))
+        index = self._get_index()
+        return index.lons, index.lats, self._wind_speeds, self._wind_directions
+
+    @property
+    def version(self) -> str:
+        """Skrót danych wiatru - zmienia się przy każdej zmianie punktów pogodowych"""
+        digest = hashlib.sha1()
+        if self.weather_points:
+            index = self._get_index()
+            for values in (index.lons, index.lats, self._wind_speeds, self._wind_directions):
+                digest.update(np.ascontiguousarray(values, dtype=float).tobytes())
+        return digest.hexdigest()
+
+    def max_wind_speed(self) -> float:
+        """Największa prędkość wiatru (m/s) w danych (bez punktów - domyślne 5 m/s, jak w get_wind_arrays)"""
+        if not self.weather_points:
+            return 5.0
+        self._get_index()
+        return float(self._wind_speeds.max())
+
+    def station_spacing_nm(self) -> Optional[float]:
+        """Typowa odległość między punktami pogodowymi (mediana odległości do najbliższego sąsiada)"""
+        if len(self.weather_points) < 2:
+            return None
+        index = self._get_index()
+        _, nearest = index.tree.query(index.tree.data, k=2)
+        distances = haversine_nm(index.lons, index.lats, index.lons[nearest[:, 1]], index.lats[nearest[:, 1]])
+        return float(np.median(distances))
+
+    def _get_index(self) -> PointIndex:
+        """Zwraca (budując w razie potrzeby) indeks przestrzenny punktów pogodowych"""
+        if self._index is None or len(self._index) != len(self.weather_points):
+            self._index = PointIndex(
+                np.array([wp.lon for wp in self.weather_points], dtype=float),
+                np.array([wp.lat for wp in self.weather_points], dtype=float)
+            )
+            self._wind_speeds = np.array([wp.wind.speed for wp in self.weather_points], dtype=float)
+            self._wind_directions = np.array([wp.wind.direction for wp in self.weather_points], dtype=float)
+        return self._index
 
     def _calculate_distance(self, lat1: float, lon1: float,
                             lat2: float, lon2: float) -> float:
-        """Oblicza odległość między dwoma punktami"""
-        try:
-            from geopy.distance import geodesic
-            return geodesic((lat1, lon1), (lat2, lon2)).kilometers
-        except ImportError:
-            # Fallback - uproszczona formuła haversine
-            R = 6371.0  # promień Ziemi w km
-            lat1_rad = np.radians(lat1)
-            lat2_rad = np.radians(lat2)
-            dlat = np.radians(lat2 - lat1)
-            dlon = np.radians(lon2 - lon1)
-            
-            a = (np.sin(dlat / 2) ** 2 +
-                 np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlon / 2) ** 2)
-            c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
-            return R * c
+        """Oblicza odległość między dwoma punktami (km)"""
+        return float(haversine_nm(lon1, lat1, lon2, lat2)) / NM_PER_KM
+
+
+class WeatherForecast:
+    """Prognoza wiatru: kolejne kroki czasowe dla tych samych punktów pogodowych
+
+    speeds i directions mają kształt (kroki, punkty), a step_hours to czasy
+    kroków w godzinach od start_time (rosnąco). Wiatr między krokami
+    interpolowany jest liniowo po składowych wektora, przed pierwszym i po
+    ostatnim kroku przyjmowane są wartości skrajne. W przestrzeni - najbliższy
+    punkt pogodowy, tak jak w WeatherData.
+    """
+
+    def __init__(self, lons: np.ndarray, lats: np.ndarray, step_hours: np.ndarray,
+                 speeds: np.ndarray, directions: np.ndarray, start_time: Optional[datetime] = None):
+        self.step_hours = np.asarray(step_hours, dtype=float).reshape(-1)
+        self.speeds = np.asarray(speeds, dtype=float).reshape(len(self.step_hours), -1)
+        self.directions = np.asarray(directions, dtype=float).reshape(self.speeds.shape)
+        self.start_time = start_time or datetime.utcnow()
+        self.index = PointIndex(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+
+        radians = np.radians(self.directions)
+        self._u = self.speeds * np.sin(radians)
+        self._v = self.speeds * np.cos(radians)
+
+    @classmethod
+    def from_snapshots(cls, snapshots: List[WeatherData], step_hours: List[float],
+                       start_time: Optional[datetime] = None) -> "WeatherForecast":
+        """Buduje prognozę z danych pogodowych kolejnych kroków (te same punkty w każdym kroku)"""
+        lons, lats, _, _ = snapshots[0].to_arrays()
+        arrays = [snapshot.to_arrays() for snapshot in snapshots]
+        return cls(lons, lats, step_hours, [a[2] for a in arrays], [a[3] for a in arrays],
+                   start_time or snapshots[0].timestamp)
+
+    @classmethod
+    def from_arrays(cls, lons: np.ndarray, lats: np.ndarray, step_hours: np.ndarray, speeds: np.ndarray,
+                    directions: np.ndarray, start_time: Optional[datetime] = None) -> "WeatherForecast":
+        """Odtwarza prognozę z tablic (np. przekazanych do procesu obliczeniowego)"""
+        return cls(lons, lats, step_hours, speeds, directions, start_time)
+
+    def to_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Zwraca tablice (lons, lats, czasy kroków, prędkości, kierunki)"""
+        return self.index.lons, self.index.lats, self.step_hours, self.speeds, self.directions
+
+    @property
+    def duration_hours(self) -> float:
+        return float(self.step_hours[-1] - self.step_hours[0])
+
+    def hours_since_start(self, moment: datetime) -> float:
+        """Czas od początku prognozy (godziny) dla podanej chwili"""
+        if moment.tzinfo is not None:
+            # Czasy prognozy są w UTC bez strefy
+            moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+        return (moment - self.start_time).total_seconds() / 3600.0
+
+    def max_wind_speed(self) -> float:
+        """Największa prędkość wiatru (m/s) w całej prognozie"""
+        return float(self.speeds.max()) if self.speeds.size else 5.0
+
+    def nearest_points(self, lons: np.ndarray, lats: np.ndarray) -> np.ndarray:
+        """Indeksy najbliższych punktów pogodowych (kształt tablicy wejściowej)"""
+        lons = np.asarray(lons, dtype=float)
+        lats = np.asarray(lats, dtype=float)
+        return self.index.nearest(lons.ravel(), lats.ravel()).reshape(lons.shape)
+
+    def wind_at(self, points: np.ndarray, hours: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Prędkości i kierunki wiatru w punktach pogodowych points w chwili hours"""
+        step = int(np.clip(np.searchsorted(self.step_hours, hours, side="right") - 1, 0, len(self.step_hours) - 1))
+        if step + 1 < len(self.step_hours) and hours > self.step_hours[step]:
+            weight = (hours - self.step_hours[step]) / (self.step_hours[step + 1] - self.step_hours[step])
+            u = (1 - weight) * self._u[step, points] + weight * self._u[step + 1, points]
+            v = (1 - weight) * self._v[step, points] + weight * self._v[step + 1, points]
+            return np.hypot(u, v), np.degrees(np.arctan2(u, v)) % 360
+        return self.speeds[step, points], self.directions[step, points]
+
+    def get_wind_arrays(self, lons: np.ndarray, lats: np.ndarray, hours: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        """Prędkości (m/s) i kierunki wiatru dla tablic współrzędnych w chwili hours"""
+        return self.wind_at(self.nearest_points(lons, lats), hours)
+
+    def snapshot(self, hours: float = 0.0) -> WeatherData:
+        """Dane pogodowe z chwili hours (dla obliczeń bez zależności od czasu)"""
+        points = np.arange(len(self.index))
+        speeds, directions = self.wind_at(points, hours)
+        return WeatherData.from_arrays(self.index.lons, self.index.lats, speeds, directions,
+                                       timestamp=self.start_time + timedelta(hours=hours))
 
 
 class WeatherService:
@@ -154,6 +288,84 @@ class WeatherService:
 
         return weather_data
 
+    async def get_weather_forecast(self, bounds: Dict[str, float], hours: int) -> WeatherForecast:
+        """Pobiera godzinową prognozę wiatru (One Call API) dla określonego obszaru
+
+        Bez klucza API lub przy błędzie pobierania zwracana jest prognoza
+        jednokrokowa z danych bieżących (wiatr stały w czasie).
+        """
+        if not self.api_key:
+            logger.warning("Brak klucza API OpenWeather. Używam stałej prognozy z danych bieżących.")
+            return await self._create_static_forecast(bounds)
+
+        try:
+            grid_points = self._create_weather_grid(bounds)
+            if not self.session:
+                async with aiohttp.ClientSession() as session:
+                    self.session = session
+                    results = await asyncio.gather(
+                        *[self._fetch_forecast_point(lat, lon, hours) for lat, lon in grid_points],
+                        return_exceptions=True
+                    )
+                self.session = None
+            else:
+                results = await asyncio.gather(
+                    *[self._fetch_forecast_point(lat, lon, hours) for lat, lon in grid_points],
+                    return_exceptions=True
+                )
+
+            series = []
+            for (lat, lon), result in zip(grid_points, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Błąd pobierania prognozy pogody: {result}")
+                elif result:
+                    series.append((lat, lon, result))
+            if not series:
+                logger.warning("Nie udało się pobrać prognozy pogody. Używam stałej prognozy.")
+                return await self._create_static_forecast(bounds)
+
+            # Wspólne kroki czasowe wszystkich punktów
+            steps = min(len(hourly) for _, _, hourly in series)
+            times = np.array([entry['dt'] for entry in series[0][2][:steps]], dtype=float)
+            return WeatherForecast(
+                lons=[lon for _, lon, _ in series],
+                lats=[lat for lat, _, _ in series],
+                step_hours=(times - times[0]) / 3600.0,
+                speeds=np.array([[entry.get('wind_speed', 5.0) for entry in hourly[:steps]]
+                                 for _, _, hourly in series]).T,
+                directions=np.array([[entry.get('wind_deg', 270.0) for entry in hourly[:steps]]
+                                     for _, _, hourly in series]).T,
+                start_time=datetime.utcfromtimestamp(times[0])
+            )
+
+        except Exception as e:
+            logger.error(f"Błąd pobierania prognozy pogody: {e}")
+            return await self._create_static_forecast(bounds)
+
+    async def _fetch_forecast_point(self, lat: float, lon: float, hours: int) -> List[Dict]:
+        """Pobiera prognozę godzinową dla jednego punktu (do hours + 1 kroków)"""
+        params = {
+            'lat': lat,
+            'lon': lon,
+            'appid': self.api_key,
+            'units': 'metric',
+            'exclude': 'current,minutely,daily,alerts'
+        }
+        try:
+            async with self.session.get(self.onecall_url, params=params, timeout=10) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise Exception(f"API error {response.status}: {error_text}")
+                data = await response.json()
+                return data.get('hourly', [])[:hours + 1]
+        except asyncio.TimeoutError:
+            raise Exception("Timeout podczas pobierania prognozy pogody")
+
+    async def _create_static_forecast(self, bounds: Dict[str, float]) -> WeatherForecast:
+        """Prognoza jednokrokowa z bieżących danych pogodowych"""
+        weather_data = await self.get_weather_data(bounds) if self.api_key else self._create_default_weather_data(bounds)
+        return WeatherForecast.from_snapshots([weather_data], [0.0])
+
     def _create_weather_grid(self, bounds: Dict[str, float]) -> List[Tuple[float, float]]:
         """Tworzy siatkę punktów do pobierania danych pogodowych"""
         grid_points = []
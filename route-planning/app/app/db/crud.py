@@ -3,7 +3,7 @@ from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from sqlalchemy import and_, or_, func
 from typing import List, Optional, Dict, Any
-from uuid import UUID
+from uuid import UUID, uuid4
 from datetime import datetime
 
 from app.db.models import Route, Waypoint, Obstacle, RouteAlternative, BoatProfile, WeatherSnapshot
@@ -24,6 +24,13 @@ class RouteCRUD:
         await self.db.refresh(db_route)
         return db_route
 
+    async def create_routes(self, routes_data: List[RouteCreate]) -> List[Route]:
+        """Tworzy wiele tras jednym zatwierdzeniem (ID nadawane przed zapisem)"""
+        db_routes = [Route(id=uuid4(), **route_data.dict()) for route_data in routes_data]
+        self.db.add_all(db_routes)
+        await self.db.commit()
+        return db_routes
+
     async def get_route(self, route_id: UUID) -> Optional[Route]:
         """Pobiera trasę po ID"""
         result = await self.db.execute(
@@ -92,6 +99,14 @@ class RouteCRUD:
 
         return waypoints
 
+    async def create_route_alternatives(self, route_id: UUID,
+                                        alternatives_data: List[Dict[str, Any]]) -> List[RouteAlternative]:
+        """Tworzy trasy alternatywne dla trasy (jednym zatwierdzeniem)"""
+        alternatives = [RouteAlternative(route_id=route_id, **data) for data in alternatives_data]
+        self.db.add_all(alternatives)
+        await self.db.commit()
+        return alternatives
+
     async def get_routes_in_area(self, north: float, south: float,
                                  east: float, west: float) -> List[Route]:
         """Pobiera trasy w określonym obszarze"""
@@ -10,6 +10,7 @@ from app.core.config import settings
 from app.db.session import engine
 from app.db.models import Base
 from app.api.routes import router as api_router
+from app.services.compute_pool import compute_pool
 
 # Konfiguracja logowania
 logging.basicConfig(level=logging.INFO)
@@ -47,10 +48,13 @@ async def lifespan(app: FastAPI):
         logger.error(f"Błąd inicjalizacji bazy danych: {e}")
         logger.warning("Aplikacja będzie działać bez połączenia z bazą danych")
         # Nie przerywamy startu aplikacji - pozwalamy działać bez bazy
+
+    compute_pool.start()
     
     yield
     
     # Shutdown
+    compute_pool.shutdown()
     try:
         await engine.dispose()
         logger.info("Zamknięto połączenia z bazą danych")
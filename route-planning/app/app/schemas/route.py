@@ -26,10 +26,37 @@ class RouteRequestSchema(BaseModel):
     # Parametry pogodowe
     use_weather_routing: bool = Field(True, description="Czy użyć routingu pogodowego")
     weather_timestamp: Optional[datetime] = Field(None, description="Timestamp danych pogodowych")
+    routing_mode: str = Field("static", pattern="^(static|time_dependent)$",
+                              description="Model wiatru: stały w czasie (static) lub zmienny według prognozy "
+                                          "(time_dependent, wiatr w chwili dotarcia do węzła)")
+    departure_time: Optional[datetime] = Field(None, description="Czas wypłynięcia (tryb time_dependent, domyślnie teraz)")
+    isochrone_sector_deg: Optional[float] = Field(None, ge=0, le=90,
+                                                  description="Sektor kursu (stopnie) odrzucania zdominowanych punktów "
+                                                              "izochron w trybie time_dependent - szybciej, ale trasa "
+                                                              "może nie być optymalna (0 - dokładnie; brak - ustawienie "
+                                                              "serwera, domyślnie 0)")
+    wind_gradient_threshold: Optional[float] = Field(None, gt=0, le=10.0,
+                                                     description="Gradient wiatru [(m/s)/NM], powyżej którego siatka "
+                                                                 "adaptive jest zagęszczana (np. 0.1; brak - bez "
+                                                                 "zagęszczania według wiatru)")
 
     # Opcje obliczenia
     max_calculation_time: int = Field(30, ge=5, le=120, description="Maksymalny czas obliczenia w sekundach")
     alternatives_count: int = Field(1, ge=1, le=5, description="Liczba alternatywnych tras")
+    graph_backend: str = Field("networkx", pattern="^(networkx|csr)$",
+                               description="Silnik grafu: networkx lub tablicowy CSR")
+    search_mode: str = Field("eager", pattern="^(eager|lazy)$",
+                             description="Tryb wyszukiwania: pełny graf (eager) lub leniwe rozwijanie krawędzi (lazy)")
+    heuristic: str = Field("polar", pattern="^polar$",
+                           description="Heurystyka A*: prędkość maksymalna z polary (polar)")
+    grid_mode: str = Field("poisson", pattern="^(poisson|adaptive|hex|regional)$",
+                           description="Rodzaj siatki: losowa Poisson disk, wielorozdzielcza (adaptive), "
+                                       "regularna heksagonalna (hex) lub zapisany graf całej Zatoki Gdańskiej "
+                                       "(regional, tryb eager; krótsze krawędzie grafu dają na krótkich "
+                                       "odcinkach trasy dłuższe nawet o ok. 5% niż siatka hex)")
+    keep_search_state: bool = Field(False, description="Czy zachować stan wyszukiwania do przeliczania trasy "
+                                                       "po zmianie wiatru lub pozycji łodzi "
+                                                       "(POST /routes/{id}/reroute, tylko wiatr stały w czasie)")
 
 
 class WaypointSchema(BaseModel):
@@ -53,6 +80,17 @@ class RouteAlternativeSchema(BaseModel):
     risk_score: Optional[float] = Field(None, description="Ocena ryzyka (0-100)")
 
 
+class SearchStatisticsSchema(BaseModel):
+    """Schema statystyk wyszukiwania trasy"""
+    search_mode: str = Field(..., description="Użyty tryb wyszukiwania")
+    nodes_expanded: Optional[int] = Field(None, description="Liczba rozwiniętych węzłów")
+    edges_evaluated: int = Field(..., description="Liczba krawędzi z policzonym czasem przejścia")
+    edges_possible: int = Field(..., description="Liczba możliwych krawędzi w promieniu połączenia")
+    heuristic: Optional[str] = Field(None, description="Użyta heurystyka A*")
+    nodes_pruned: Optional[int] = Field(None, description="Liczba odrzuconych zdominowanych punktów izochron")
+    may_be_suboptimal: bool = Field(False, description="Czy trasa może nie być optymalna (odrzucone punkty izochron)")
+
+
 class RouteResponseSchema(BaseModel):
     """Schema odpowiedzi z trasą"""
     id: UUID = Field(..., description="ID trasy")
@@ -76,9 +114,13 @@ class RouteResponseSchema(BaseModel):
     grid_resolution_nm: float = Field(..., description="Użyta rozdzielczość siatki")
     corridor_margin_nm: float = Field(..., description="Użyty margines korytarza")
     calculation_time_seconds: Optional[float] = Field(None, description="Czas obliczenia")
+    search_statistics: Optional[SearchStatisticsSchema] = Field(None, description="Statystyki wyszukiwania")
+    refinement_level: Optional[int] = Field(None, description="Poziom siatki, na którym znaleziono trasę (0 - najgrubszy)")
+    refinement_levels: Optional[int] = Field(None, description="Liczba zaplanowanych poziomów zagęszczania siatki")
 
     # Alternatywne trasy
     alternatives: List[RouteAlternativeSchema] = Field(default=[], description="Alternatywne trasy")
+    search_state_kept: bool = Field(False, description="Czy zachowano stan wyszukiwania do przeliczania trasy")
 
     # Metadane
     created_at: datetime = Field(..., description="Data utworzenia")
@@ -88,6 +130,194 @@ class RouteResponseSchema(BaseModel):
         from_attributes = True
 
 
+class RerouteRequestSchema(BaseModel):
+    """Schema żądania przeliczenia aktywnej trasy"""
+    position: Optional[PointSchema] = Field(None, description="Bieżąca pozycja łodzi (domyślnie poprzednia)")
+    refresh_weather: bool = Field(True, description="Czy pobrać aktualny wiatr")
+    max_calculation_time: int = Field(30, ge=5, le=120, description="Maksymalny czas obliczenia w sekundach")
+
+
+class RerouteResponseSchema(BaseModel):
+    """Schema odpowiedzi z przeliczoną trasą"""
+    id: UUID = Field(..., description="ID trasy")
+    found: bool = Field(True, description="Czy znaleziono trasę w grafie (inaczej linia prosta do mety)")
+    waypoints: List[WaypointSchema] = Field(..., description="Punkty trasy od bieżącej pozycji łodzi")
+    distance_nm: float = Field(..., description="Pozostała odległość (NM)")
+    estimated_time_hours: float = Field(..., description="Szacowany pozostały czas (h)")
+    changed_edges: int = Field(..., description="Liczba krawędzi, których czas przejścia zmienił nowy wiatr")
+    full_search: bool = Field(..., description="Czy zamiast naprawy trasy wyszukiwano od nowa")
+    search_statistics: Optional[SearchStatisticsSchema] = Field(None, description="Statystyki wyszukiwania")
+    calculation_time_seconds: float = Field(..., description="Czas obliczenia")
+    weather_timestamp: Optional[datetime] = Field(None, description="Timestamp danych pogodowych")
+
+
+class BatchRouteRequestSchema(BaseModel):
+    """Schema żądania obliczenia wielu tras na wspólnym grafie"""
+    starts: List[PointSchema] = Field(..., min_length=1, description="Punkty startowe")
+    ends: List[PointSchema] = Field(..., min_length=1, description="Punkty docelowe")
+    pairing: str = Field("all", pattern="^(pairs|all)$",
+                         description="Łączenie punktów: kolejne pary start-meta (pairs) "
+                                     "lub każdy start z każdą metą (all)")
+
+    # Parametry obliczenia
+    grid_resolution_nm: float = Field(0.5, ge=0.1, le=2.0, description="Rozdzielczość siatki w milach morskich")
+    corridor_margin_nm: float = Field(2.0, ge=0.5, le=10.0, description="Margines obszaru wokół punktów w milach morskich")
+    boat_profile_id: Optional[UUID] = Field(None, description="ID profilu łodzi")
+    max_calculation_time: int = Field(30, ge=5, le=120, description="Maksymalny czas obliczenia w sekundach")
+    save_routes: bool = Field(True, description="Czy zapisać trasy w bazie danych")
+
+
+class BatchRouteItemSchema(BaseModel):
+    """Schema jednej trasy z obliczenia zbiorczego"""
+    start_index: int = Field(..., description="Indeks punktu startowego w żądaniu")
+    end_index: int = Field(..., description="Indeks punktu docelowego w żądaniu")
+    id: Optional[UUID] = Field(None, description="ID zapisanej trasy")
+    found: bool = Field(..., description="Czy znaleziono trasę")
+    geometry: List[PointSchema] = Field(default=[], description="Geometria trasy")
+    distance_nm: Optional[float] = Field(None, description="Odległość trasy (NM)")
+    estimated_time_hours: Optional[float] = Field(None, description="Szacowany czas (h)")
+
+
+class BatchRouteResponseSchema(BaseModel):
+    """Schema odpowiedzi z wieloma trasami"""
+    routes: List[BatchRouteItemSchema] = Field(..., description="Trasy w kolejności par")
+    grid_nodes: int = Field(..., description="Liczba węzłów wspólnego grafu")
+    search_statistics: Optional[SearchStatisticsSchema] = Field(None, description="Statystyki wyszukiwania")
+    calculation_time_seconds: float = Field(..., description="Czas obliczenia")
+    weather_timestamp: Optional[datetime] = Field(None, description="Timestamp danych pogodowych")
+
+
+class FleetRouteRequestSchema(BaseModel):
+    """Schema żądania porównania kilku łodzi na tym samym odcinku"""
+    start: PointSchema = Field(..., description="Punkt startowy")
+    end: PointSchema = Field(..., description="Punkt docelowy")
+    boat_profile_ids: List[UUID] = Field(..., min_length=1, description="ID porównywanych profili łodzi")
+
+    # Parametry obliczenia
+    grid_resolution_nm: float = Field(0.5, ge=0.1, le=2.0, description="Rozdzielczość siatki w milach morskich")
+    corridor_margin_nm: float = Field(2.0, ge=0.5, le=10.0, description="Margines korytarza w milach morskich")
+    use_weather_routing: bool = Field(True, description="Czy użyć routingu pogodowego")
+    max_calculation_time: int = Field(30, ge=5, le=120, description="Maksymalny czas obliczenia w sekundach")
+    save_routes: bool = Field(True, description="Czy zapisać trasy w bazie danych")
+
+
+class FleetRouteItemSchema(BaseModel):
+    """Schema trasy jednej łodzi z porównania floty"""
+    boat_profile_id: UUID = Field(..., description="ID profilu łodzi")
+    id: Optional[UUID] = Field(None, description="ID zapisanej trasy")
+    found: bool = Field(..., description="Czy znaleziono trasę")
+    geometry: List[PointSchema] = Field(default=[], description="Geometria trasy")
+    distance_nm: Optional[float] = Field(None, description="Odległość trasy (NM)")
+    estimated_time_hours: Optional[float] = Field(None, description="Szacowany czas (h)")
+    time_behind_hours: Optional[float] = Field(None, description="Strata czasu do najszybszej łodzi (h)")
+
+
+class FleetRouteResponseSchema(BaseModel):
+    """Schema odpowiedzi z porównaniem floty"""
+    routes: List[FleetRouteItemSchema] = Field(..., description="Trasy w kolejności profili łodzi")
+    grid_nodes: int = Field(..., description="Liczba węzłów wspólnej siatki")
+    search_statistics: Optional[SearchStatisticsSchema] = Field(None, description="Statystyki wyszukiwania")
+    calculation_time_seconds: float = Field(..., description="Czas obliczenia")
+    weather_timestamp: Optional[datetime] = Field(None, description="Timestamp danych pogodowych")
+
+
+class DepartureSweepRequestSchema(BaseModel):
+    """Schema żądania wyboru chwili wypłynięcia w oknie czasowym"""
+    start: PointSchema = Field(..., description="Punkt startowy")
+    end: PointSchema = Field(..., description="Punkt docelowy")
+    window_start: Optional[datetime] = Field(None, description="Początek okna wypłynięcia (domyślnie teraz)")
+    window_hours: float = Field(12.0, gt=0, le=48.0, description="Długość okna wypłynięcia (h)")
+    step_minutes: int = Field(30, ge=10, le=360, description="Odstęp kolejnych chwil wypłynięcia (min)")
+    isochrone_sector_deg: Optional[float] = Field(None, ge=0, le=90,
+                                                  description="Sektor kursu (stopnie) odrzucania zdominowanych punktów "
+                                                              "izochron - szybciej, ale trasy mogą nie być optymalne "
+                                                              "(0 - dokładnie; brak - ustawienie serwera, domyślnie 0)")
+
+    # Parametry obliczenia
+    grid_resolution_nm: float = Field(0.5, ge=0.1, le=2.0, description="Rozdzielczość siatki w milach morskich")
+    corridor_margin_nm: float = Field(2.0, ge=0.5, le=10.0, description="Margines korytarza w milach morskich")
+    boat_profile_id: Optional[UUID] = Field(None, description="ID profilu łodzi")
+    use_weather_routing: bool = Field(True, description="Czy użyć routingu pogodowego")
+    max_calculation_time: int = Field(30, ge=5, le=120, description="Maksymalny czas obliczenia w sekundach")
+    save_route: bool = Field(True, description="Czy zapisać najlepszą trasę w bazie danych")
+
+
+class DepartureSweepItemSchema(BaseModel):
+    """Schema wyniku jednej chwili wypłynięcia"""
+    departure_time: datetime = Field(..., description="Czas wypłynięcia")
+    found: bool = Field(..., description="Czy znaleziono trasę")
+    estimated_time_hours: Optional[float] = Field(None, description="Szacowany czas (h)")
+    arrival_time: Optional[datetime] = Field(None, description="Szacowany czas dotarcia")
+
+
+class DepartureSweepRouteSchema(BaseModel):
+    """Schema trasy przy najlepszej chwili wypłynięcia"""
+    id: Optional[UUID] = Field(None, description="ID zapisanej trasy")
+    found: bool = Field(True, description="Czy znaleziono trasę")
+    departure_time: datetime = Field(..., description="Czas wypłynięcia")
+    geometry: List[PointSchema] = Field(..., description="Geometria trasy")
+    distance_nm: float = Field(..., description="Odległość trasy (NM)")
+    estimated_time_hours: float = Field(..., description="Szacowany czas (h)")
+
+
+class DepartureSweepResponseSchema(BaseModel):
+    """Schema odpowiedzi z czasami przejścia dla chwil wypłynięcia"""
+    departures: List[DepartureSweepItemSchema] = Field(..., description="Wyniki w kolejności chwil wypłynięcia")
+    best_route: Optional[DepartureSweepRouteSchema] = Field(None, description="Najszybsza trasa w oknie")
+    grid_nodes: int = Field(..., description="Liczba węzłów wspólnego grafu")
+    search_statistics: Optional[SearchStatisticsSchema] = Field(None, description="Statystyki wyszukiwania (sumy)")
+    calculation_time_seconds: float = Field(..., description="Czas obliczenia")
+    weather_timestamp: Optional[datetime] = Field(None, description="Początek prognozy pogody")
+
+
+class CourseMarkSchema(BaseModel):
+    """Schema znaku kursu regatowego"""
+    lat: float = Field(..., ge=-90, le=90, description="Szerokość geograficzna")
+    lon: float = Field(..., ge=-180, le=180, description="Długość geograficzna")
+    rounding: Optional[str] = Field(None, pattern="^(port|starboard)$",
+                                    description="Strona opływania: lewą (port) lub prawą (starboard) burtą; "
+                                                "brak - punkt zwrotny. Pomijana dla startu i mety")
+
+
+class CourseRequestSchema(BaseModel):
+    """Schema żądania obliczenia trasy regatowej (kolejne znaki kursu)"""
+    marks: List[CourseMarkSchema] = Field(..., min_length=2,
+                                          description="Znaki kursu w kolejności: start, znaki, meta")
+
+    # Parametry obliczenia
+    grid_resolution_nm: float = Field(0.5, ge=0.1, le=2.0, description="Rozdzielczość siatki w milach morskich")
+    corridor_margin_nm: float = Field(2.0, ge=0.5, le=10.0, description="Margines obszaru wokół znaków w milach morskich")
+    boat_profile_id: Optional[UUID] = Field(None, description="ID profilu łodzi")
+    max_calculation_time: int = Field(30, ge=5, le=120, description="Maksymalny czas obliczenia w sekundach")
+    save_route: bool = Field(True, description="Czy zapisać trasę w bazie danych")
+
+
+class CourseLegSchema(BaseModel):
+    """Schema odcinka trasy regatowej"""
+    leg_number: int = Field(..., description="Numer odcinka (od 1)")
+    from_mark: int = Field(..., description="Indeks znaku początkowego w żądaniu")
+    to_mark: int = Field(..., description="Indeks znaku docelowego w żądaniu")
+    found: bool = Field(..., description="Czy znaleziono trasę w grafie (inaczej linia prosta)")
+    geometry: List[PointSchema] = Field(..., description="Geometria odcinka (z opłynięciem znaku docelowego)")
+    distance_nm: float = Field(..., description="Odległość odcinka (NM)")
+    estimated_time_hours: float = Field(..., description="Szacowany czas odcinka (h)")
+    avg_boat_speed_kts: Optional[float] = Field(None, description="Średnia prędkość łodzi na odcinku (węzły)")
+
+
+class CourseResponseSchema(BaseModel):
+    """Schema odpowiedzi z trasą regatową"""
+    id: UUID = Field(..., description="ID trasy")
+    name: Optional[str] = Field(None, description="Nazwa trasy")
+    geometry: List[PointSchema] = Field(..., description="Geometria całej trasy")
+    legs: List[CourseLegSchema] = Field(..., description="Odcinki trasy")
+    distance_nm: float = Field(..., description="Całkowita odległość (NM)")
+    estimated_time_hours: float = Field(..., description="Szacowany czas (h)")
+    grid_nodes: int = Field(..., description="Liczba węzłów wspólnego grafu")
+    search_statistics: Optional[SearchStatisticsSchema] = Field(None, description="Statystyki wyszukiwania")
+    calculation_time_seconds: float = Field(..., description="Czas obliczenia")
+    weather_timestamp: Optional[datetime] = Field(None, description="Timestamp danych pogodowych")
+
+
 class RouteCreate(BaseModel):
     """Schema tworzenia trasy"""
     name: Optional[str] = None
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ComputePoolBusyError(Exception):
+    """Kolejka obliczeń jest pełna"""
+
+
+def _warm_up() -> bool:
+    """Importuje moduły obliczeniowe w procesie roboczym i mapuje zapisane grafy regionalne
+
+    Pierwsze zadanie nie płaci za import ani za otwarcie plików grafów.
+    """
+    import app.core.route_job  # noqa: F401
+    from app.core.regional_graph import regional_graphs
+    regional_graphs.load_stored()
+    return True
+
+
+class ComputePool:
+    """Pula procesów dla obliczeń CPU (siatka, graf, A*) poza pętlą zdarzeń
+
+    Liczba zadań oczekujących i wykonywanych jest ograniczona do max_pending -
+    nadmiarowe zgłoszenia są odrzucane od razu (ComputePoolBusyError) zamiast
+    czekać w nieograniczonej kolejce. Miejsce w kolejce zwalniane jest dopiero
+    po faktycznym zakończeniu zadania, także wtedy, gdy klient przestał czekać.
+    Przy workers=0 zadania wykonywane są w wątku bieżącego procesu.
+    """
+
+    def __init__(self, workers: int = settings.COMPUTE_POOL_WORKERS,
+                 max_pending: int = settings.COMPUTE_POOL_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max(max_pending, 1)
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Tworzy pulę i rozgrzewa procesy robocze"""
+        if self._executor is not None:
+            return
+        if self.workers > 0:
+            # "spawn" - procesy robocze nie dziedziczą wątków ani pętli zdarzeń serwera
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            for _ in range(self.workers):
+                self._executor.submit(_warm_up)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="route-compute")
+        logger.info(f"Uruchomiono pulę obliczeniową ({self.workers} procesów, kolejka {self.max_pending})")
+
+    def shutdown(self):
+        """Zamyka pulę, anulując zadania oczekujące"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None):
+        """Wykonuje fn(*args) w puli i czeka na wynik co najwyżej timeout sekund
+
+        Po przekroczeniu czasu zadanie jest anulowane (jeśli jeszcze czeka
+        w kolejce) i zgłaszany jest asyncio.TimeoutError. Zadanie już wykonywane
+        kończy się samo dzięki terminowi przekazanemu w jego danych wejściowych.
+        """
+        self.start()
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise ComputePoolBusyError("Kolejka obliczeń jest pełna")
+            self._pending += 1
+
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise
+
+    def _release(self, _future: Optional[Future]):
+        with self._lock:
+            self._pending -= 1
+
+
+# Wspólna pula obliczeniowa aplikacji
+compute_pool = ComputePool()
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.reroute import RerouteSession
+
+
+@dataclass
+class RerouteEntry:
+    """Stan przeliczania jednej trasy w serwisie"""
+    session: RerouteSession
+    bounds: dict  # Obszar, dla którego pobierany jest wiatr
+    nbytes: int
+    last_used: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)  # Jedno przeliczenie trasy naraz
+
+
+class RerouteStore:
+    """Stany wyszukiwania aktywnych tras z wyrzucaniem LRU, limitem pamięci i czasem wygaśnięcia
+
+    Stan trasy (graf siatki i stan D* Lite) przechowywany jest w procesie
+    serwera, a przeliczenia wykonuje pula obliczeniowa - sesja jest do niej
+    przekazywana i zastępowana poprawioną. Stan nieużywany dłużej niż
+    ttl_seconds albo wyrzucony przez limit pamięci trzeba odtworzyć,
+    obliczając trasę ponownie z keep_search_state.
+    """
+
+    def __init__(self, max_bytes: int = settings.REROUTE_STATE_MAX_BYTES,
+                 ttl_seconds: float = settings.REROUTE_STATE_TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[UUID, RerouteEntry]" = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, route_id: UUID) -> Optional[RerouteEntry]:
+        """Zwraca stan trasy (i oznacza go jako ostatnio używany) lub None"""
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(route_id)
+            if entry is None:
+                return None
+            self._entries.move_to_end(route_id)
+            entry.last_used = time.monotonic()
+            return entry
+
+    def put(self, route_id: UUID, session: RerouteSession, bounds: dict):
+        """Zapamiętuje stan nowej trasy"""
+        self._store(route_id, RerouteEntry(session=session, bounds=dict(bounds), nbytes=session.nbytes))
+
+    def update(self, route_id: UUID, entry: RerouteEntry, session: RerouteSession):
+        """Zastępuje stan trasy poprawionym (także gdy w międzyczasie został wyrzucony)"""
+        entry.session = session
+        entry.nbytes = session.nbytes
+        entry.last_used = time.monotonic()
+        self._store(route_id, entry)
+
+    def discard(self, route_id: UUID):
+        """Usuwa stan trasy (np. po usunięciu trasy)"""
+        with self._lock:
+            entry = self._entries.pop(route_id, None)
+            if entry is not None:
+                self._size_bytes -= entry.nbytes
+
+    def clear(self):
+        """Usuwa wszystkie stany"""
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _store(self, route_id: UUID, entry: RerouteEntry):
+        if entry.nbytes > self.max_bytes:
+            self.discard(route_id)
+            return
+        with self._lock:
+            previous = self._entries.pop(route_id, None)
+            if previous is not None:
+                self._size_bytes -= previous.nbytes
+            self._entries[route_id] = entry
+            self._size_bytes += entry.nbytes
+
+            while self._size_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size_bytes -= evicted.nbytes
+
+    def _expire(self):
+        """Usuwa stany nieużywane dłużej niż ttl_seconds (najdawniej używane są na początku)"""
+        deadline = time.monotonic() - self.ttl_seconds
+        while self._entries:
+            route_id, entry = next(iter(self._entries.items()))
+            if entry.last_used >= deadline:
+                break
+            del self._entries[route_id]
+            self._size_bytes -= entry.nbytes
+
+
+# Stany przeliczania tras procesu serwera
+reroute_store = RerouteStore()
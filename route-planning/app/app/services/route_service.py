@@ -1,20 +1,40 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from uuid import UUID, uuid4
-from datetime import datetime
+from datetime import datetime, timedelta
 from shapely.geometry import Point, LineString
+import asyncio
+import logging
 import time
 
 from app.db.crud import RouteCRUD, ObstacleCRUD, BoatProfileCRUD
+from app.core.config import settings
 from app.core.weather import WeatherService
 from app.core.grid import create_default_grid, GridConfig, AdaptiveGridGenerator
-from app.core.routing import RouteOptimizer, DEFAULT_POLAR
+from app.core.course import CourseMark
+from app.core.route_job import (
+    BatchRouteJob, CalculationTimeoutError, CourseRouteJob, DepartureChunkJob, DepartureSweepJob, FleetRouteJob,
+    RerouteJob, RouteJob, RouteJobResult, run_batch_route_job, run_course_route_job, run_departure_chunk_job,
+    run_departure_graph_job, run_fleet_route_job, run_reroute_job, run_route_job
+)
+from app.core.obstacles import ObstacleIndex
+from app.core.routing import SailingPolar, DEFAULT_POLAR
 from app.schemas.route import (
     RouteRequestSchema, RouteResponseSchema, RouteListSchema,
-    RouteStatisticsSchema, PointSchema, WaypointSchema, RouteCreate
+    RouteStatisticsSchema, PointSchema, WaypointSchema, RouteCreate,
+    SearchStatisticsSchema, RouteAlternativeSchema,
+    BatchRouteRequestSchema, BatchRouteResponseSchema, BatchRouteItemSchema,
+    CourseRequestSchema, CourseResponseSchema, CourseLegSchema,
+    FleetRouteRequestSchema, FleetRouteResponseSchema, FleetRouteItemSchema,
+    DepartureSweepRequestSchema, DepartureSweepResponseSchema, DepartureSweepItemSchema, DepartureSweepRouteSchema,
+    RerouteRequestSchema, RerouteResponseSchema
 )
+from app.services.compute_pool import ComputePoolBusyError, compute_pool
+from app.services.reroute_store import reroute_store
 from app.utils.calculations import calculate_distance, calculate_bearing
 from fastapi import HTTPException, status
 
+logger = logging.getLogger(__name__)
+
 
 class RouteService:
     def __init__(self, route_crud: RouteCRUD, obstacle_crud: ObstacleCRUD,
@@ -28,6 +48,26 @@ class RouteService:
         """Oblicza optymalną trasę żeglarską"""
         start_time = time.time()
         
+        if request.wind_gradient_threshold is not None and request.grid_mode != "adaptive":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Zagęszczanie według gradientu wiatru wymaga siatki adaptive"
+            )
+        regional_graph = request.grid_mode == "regional"
+        if regional_graph:
+            self._validate_regional_request(request)
+        if request.routing_mode == "time_dependent" and request.alternatives_count > 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Wiatr zmienny w czasie (routing_mode time_dependent) nie wyznacza tras alternatywnych"
+            )
+        if request.keep_search_state and (regional_graph or request.routing_mode == "time_dependent"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Stan wyszukiwania do przeliczania trasy wymaga siatki trasy (nie grafu regionalnego) "
+                       "i wiatru stałego w czasie"
+            )
+
         try:
             # Konwertuj punkty na obiekty Shapely
             start_point = Point(request.start.lon, request.start.lat)
@@ -41,6 +81,11 @@ class RouteService:
                 'east': max(request.start.lon, request.end.lon) + buffer,
                 'west': min(request.start.lon, request.end.lon) - buffer
             }
+            regional = {}
+            if regional_graph:
+                # Graf regionalny - przeszkody i wiatr całego akwenu (stała wersja przeszkód)
+                bounds = dict(settings.GDANSK_BAY_BOUNDS)
+                regional = dict(region_bounds=bounds)
             
             # Pobierz przeszkody z bazy
             obstacles = await self.obstacle_crud.get_obstacles_in_area(
@@ -49,26 +94,52 @@ class RouteService:
                 east=bounds['east'],
                 west=bounds['west']
             )
+            # Zdekoduj przeszkody raz dla całego obliczenia
+            obstacle_index = ObstacleIndex(obstacles)
             
             # Pobierz dane pogodowe
-            weather_data = await self.weather_service.get_weather_data(bounds)
+            time_dependent = {}
+            if request.routing_mode == "time_dependent":
+                # Prognoza wiatru; siatka i opis trasy korzystają z wiatru w chwili wypłynięcia
+                forecast = await self.weather_service.get_weather_forecast(bounds, settings.FORECAST_HOURS)
+                departure_hours = forecast.hours_since_start(request.departure_time or datetime.utcnow())
+                weather_data = forecast.snapshot(departure_hours)
+                time_dependent = dict(
+                    routing_mode="time_dependent",
+                    forecast_arrays=forecast.to_arrays(),
+                    forecast_start=forecast.start_time,
+                    departure_hours=departure_hours,
+                    isochrone_sector_deg=request.isochrone_sector_deg
+                )
+            else:
+                weather_data = await self.weather_service.get_weather_data(bounds)
             
             # Wybierz charakterystykę łodzi
-            polar = DEFAULT_POLAR  # Domyślnie, można rozszerzyć o pobieranie z bazy
+            polar = await self._get_sailing_polar(request.boat_profile_id)
             
-            # Wygeneruj siatkę punktów
+            # Siatka, graf i wyszukiwanie trasy - w puli procesów, poza pętlą zdarzeń
             config = GridConfig(
                 min_distance_nm=request.grid_resolution_nm,
-                corridor_margin_nm=request.corridor_margin_nm
+                corridor_margin_nm=request.corridor_margin_nm,
+                grid_mode=request.grid_mode,
+                wind_gradient_threshold=request.wind_gradient_threshold
             )
-            generator = AdaptiveGridGenerator(config)
-            grid_points = generator.generate_route_grid(start_point, end_point, obstacles)
-            
-            # Optymalizator trasy
-            optimizer = RouteOptimizer(polar)
-            route_points, total_time = optimizer.find_optimal_route(
-                start_point, end_point, grid_points, obstacles, weather_data
+            time_limit = min(request.max_calculation_time, settings.MAX_ROUTE_CALCULATION_TIME)
+            job = RouteJob.create(
+                start_point, end_point, config, obstacle_index, weather_data, polar,
+                graph_backend=request.graph_backend,
+                search_mode=request.search_mode,
+                heuristic=request.heuristic,
+                # Margines na przerwanie poziomu siatki i przekazanie wyniku z procesu obliczeniowego
+                deadline=start_time + time_limit * settings.ANYTIME_BUDGET_FRACTION,
+                refinement_levels=settings.ANYTIME_REFINEMENT_LEVELS,
+                alternatives=request.alternatives_count - 1,
+                keep_search_state=request.keep_search_state,
+                **time_dependent,
+                **regional
             )
+            result: RouteJobResult = await self._run_job(run_route_job, job, start_time + time_limit - time.time())
+            route_points, total_time = result.route_points, result.total_time
             
             if not route_points:
                 raise HTTPException(
@@ -81,6 +152,7 @@ class RouteService:
             
             # Utwórz waypoints
             waypoints = self._create_waypoints(route_points, weather_data)
+            alternatives = self._create_alternatives(result.alternative_routes)
             
             # Wygeneruj ID trasy
             route_id = uuid4()
@@ -93,7 +165,7 @@ class RouteService:
                 geometry=self._create_linestring_wkt(route_points),
                 distance_nm=total_distance,
                 estimated_time_hours=total_time,
-                grid_resolution_nm=request.grid_resolution_nm,
+                grid_resolution_nm=result.grid_resolution_nm,
                 corridor_margin_nm=request.corridor_margin_nm,
                 calculation_time_seconds=time.time() - start_time,
                 weather_timestamp=weather_data.timestamp
@@ -103,9 +175,16 @@ class RouteService:
             try:
                 saved_route = await self.route_crud.create_route(route_data)
                 route_id = saved_route.id
+                if alternatives:
+                    await self.route_crud.create_route_alternatives(
+                        route_id, self._alternatives_to_records(result.alternative_routes, alternatives)
+                    )
             except Exception as e:
                 # Jeśli zapis się nie powiedzie, użyj tymczasowego ID
                 print(f"Ostrzeżenie: Nie udało się zapisać trasy w bazie: {e}")
+
+            if result.reroute_session is not None:
+                reroute_store.put(route_id, result.reroute_session, bounds)
             
             # Zwróć odpowiedź
             return RouteResponseSchema(
@@ -119,20 +198,575 @@ class RouteService:
                 max_wind_speed=self._get_max_wind_speed(weather_data),
                 avg_wind_speed=self._get_avg_wind_speed(weather_data),
                 wind_direction=self._get_avg_wind_direction(weather_data),
-                grid_resolution_nm=request.grid_resolution_nm,
+                grid_resolution_nm=result.grid_resolution_nm,
                 corridor_margin_nm=request.corridor_margin_nm,
                 calculation_time_seconds=time.time() - start_time,
-                alternatives=[],  # Można rozszerzyć o alternatywne trasy
+                search_statistics=self._create_search_statistics(result.statistics),
+                refinement_level=result.refinement_level,
+                refinement_levels=result.refinement_levels,
+                alternatives=alternatives,
+                search_state_kept=result.reroute_session is not None,
                 created_at=datetime.utcnow(),
                 weather_timestamp=weather_data.timestamp
             )
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Błąd obliczania trasy: {str(e)}"
             )
 
+    async def reroute(self, route_id: UUID, request: RerouteRequestSchema) -> RerouteResponseSchema:
+        """Przelicza aktywną trasę po zmianie wiatru lub pozycji łodzi, poprawiając zachowany stan wyszukiwania"""
+        start_time = time.time()
+
+        entry = reroute_store.get(route_id)
+        if entry is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Brak stanu wyszukiwania trasy (trasa obliczona bez keep_search_state lub stan wygasł) "
+                       "- oblicz trasę ponownie"
+            )
+
+        time_limit = min(request.max_calculation_time, settings.MAX_ROUTE_CALCULATION_TIME)
+        # Przeliczenia jednej trasy kolejno - każde poprawia stan zostawiony przez poprzednie;
+        # zadanie naprawia kopię sesji, zapamiętywaną dopiero po powodzeniu
+        async with entry.lock:
+            try:
+                weather_data = None
+                if request.refresh_weather:
+                    weather_data = await self.weather_service.get_weather_data(entry.bounds)
+                job = RerouteJob(
+                    session=entry.session,
+                    position=(request.position.lon, request.position.lat) if request.position else None,
+                    weather_arrays=weather_data.to_arrays() if weather_data is not None else None,
+                    weather_timestamp=weather_data.timestamp if weather_data is not None else None,
+                    deadline=start_time + time_limit
+                )
+                result = await self._run_job(run_reroute_job, job, start_time + time_limit - time.time())
+                reroute_store.update(route_id, entry, result.session)
+
+                route_points = result.route_points
+                weather_data = result.session.weather_data()
+                return RerouteResponseSchema(
+                    id=route_id,
+                    found=result.statistics.path_found,
+                    waypoints=self._create_waypoints(route_points, weather_data),
+                    distance_nm=self._calculate_total_distance(route_points),
+                    estimated_time_hours=result.total_time,
+                    changed_edges=result.changed_edges,
+                    full_search=result.full_search,
+                    search_statistics=self._create_search_statistics(result.statistics),
+                    calculation_time_seconds=time.time() - start_time,
+                    weather_timestamp=weather_data.timestamp
+                )
+
+            except HTTPException:
+                raise
+            except Exception as e:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Błąd przeliczania trasy: {str(e)}"
+                )
+
+    async def calculate_routes_batch(self, request: BatchRouteRequestSchema) -> BatchRouteResponseSchema:
+        """Oblicza wiele tras (jeden-do-wielu lub wiele-do-wielu) na jednym grafie obszaru"""
+        start_time = time.time()
+
+        if request.pairing == "pairs":
+            if len(request.starts) != len(request.ends):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="W trybie pairs liczba startów i met musi być równa"
+                )
+            index_pairs = [(i, i) for i in range(len(request.starts))]
+        else:
+            index_pairs = [(i, j) for i in range(len(request.starts)) for j in range(len(request.ends))]
+        if len(index_pairs) > settings.BATCH_MAX_ROUTES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Zbyt wiele tras w jednym żądaniu (maksymalnie {settings.BATCH_MAX_ROUTES})"
+            )
+
+        try:
+            # Różne punkty startu i mety - węzły wspólnej siatki
+            points: List[Point] = []
+            point_index = {}
+            for p in list(request.starts) + list(request.ends):
+                if (p.lon, p.lat) not in point_index:
+                    point_index[(p.lon, p.lat)] = len(points)
+                    points.append(Point(p.lon, p.lat))
+            node_pairs = [
+                (point_index[(request.starts[i].lon, request.starts[i].lat)],
+                 point_index[(request.ends[j].lon, request.ends[j].lat)])
+                for i, j in index_pairs
+            ]
+
+            buffer = max(request.corridor_margin_nm / 60.0, 0.1)  # Konwersja NM na stopnie
+            bounds = {
+                'north': max(p.y for p in points) + buffer,
+                'south': min(p.y for p in points) - buffer,
+                'east': max(p.x for p in points) + buffer,
+                'west': min(p.x for p in points) - buffer
+            }
+            obstacles = await self.obstacle_crud.get_obstacles_in_area(**bounds)
+            obstacle_index = ObstacleIndex(obstacles)
+            weather_data = await self.weather_service.get_weather_data(bounds)
+            polar = await self._get_sailing_polar(request.boat_profile_id)
+
+            config = GridConfig(
+                min_distance_nm=request.grid_resolution_nm,
+                corridor_margin_nm=request.corridor_margin_nm
+            )
+            time_limit = min(request.max_calculation_time, settings.MAX_ROUTE_CALCULATION_TIME)
+            job = BatchRouteJob.create(
+                points, node_pairs, config, obstacle_index, weather_data, polar,
+                deadline=start_time + time_limit
+            )
+            result = await self._run_job(run_batch_route_job, job, start_time + time_limit - time.time())
+
+            items = []
+            for number, (i, j) in enumerate(index_pairs):
+                route = result.route_points(number)
+                if route is None:
+                    items.append(BatchRouteItemSchema(start_index=i, end_index=j, found=False))
+                    continue
+                route_points, total_time = route
+                items.append(BatchRouteItemSchema(
+                    start_index=i,
+                    end_index=j,
+                    found=True,
+                    geometry=[PointSchema(lat=p.y, lon=p.x) for p in route_points],
+                    distance_nm=self._calculate_total_distance(route_points),
+                    estimated_time_hours=total_time
+                ))
+
+            if request.save_routes:
+                name = f"Trasa {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}"
+                await self._save_route_items(
+                    items, [f"{name} ({item.start_index + 1}-{item.end_index + 1})" for item in items],
+                    request.grid_resolution_nm, request.corridor_margin_nm, weather_data, time.time() - start_time
+                )
+
+            return BatchRouteResponseSchema(
+                routes=items,
+                grid_nodes=result.num_nodes,
+                search_statistics=self._create_search_statistics(result.statistics),
+                calculation_time_seconds=time.time() - start_time,
+                weather_timestamp=weather_data.timestamp
+            )
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Błąd obliczania tras: {str(e)}"
+            )
+
+    async def calculate_fleet_routes(self, request: FleetRouteRequestSchema) -> FleetRouteResponseSchema:
+        """Porównuje trasy kilku łodzi na tym samym odcinku (jedna siatka i topologia grafu)"""
+        start_time = time.time()
+
+        if len(request.boat_profile_ids) > settings.FLEET_MAX_BOATS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Zbyt wiele łodzi w jednym porównaniu (maksymalnie {settings.FLEET_MAX_BOATS})"
+            )
+
+        try:
+            start_point = Point(request.start.lon, request.start.lat)
+            end_point = Point(request.end.lon, request.end.lat)
+
+            buffer = max(request.corridor_margin_nm / 60.0, 0.1)  # Konwersja NM na stopnie
+            bounds = {
+                'north': max(request.start.lat, request.end.lat) + buffer,
+                'south': min(request.start.lat, request.end.lat) - buffer,
+                'east': max(request.start.lon, request.end.lon) + buffer,
+                'west': min(request.start.lon, request.end.lon) - buffer
+            }
+            obstacles = await self.obstacle_crud.get_obstacles_in_area(**bounds)
+            obstacle_index = ObstacleIndex(obstacles)
+            weather_data = await self.weather_service.get_weather_data(bounds)
+            polars = [await self._get_sailing_polar(profile_id) for profile_id in request.boat_profile_ids]
+
+            config = GridConfig(
+                min_distance_nm=request.grid_resolution_nm,
+                corridor_margin_nm=request.corridor_margin_nm
+            )
+            time_limit = min(request.max_calculation_time, settings.MAX_ROUTE_CALCULATION_TIME)
+            job = FleetRouteJob.create(
+                start_point, end_point, config, obstacle_index, weather_data, polars,
+                use_weather_grid=request.use_weather_routing,
+                deadline=start_time + time_limit
+            )
+            result = await self._run_job(run_fleet_route_job, job, start_time + time_limit - time.time())
+
+            found_times = [route[1] for route in result.routes if route is not None]
+            fastest = min(found_times) if found_times else None
+            items = []
+            for number, profile_id in enumerate(request.boat_profile_ids):
+                route = result.route_points(number)
+                if route is None:
+                    items.append(FleetRouteItemSchema(boat_profile_id=profile_id, found=False))
+                    continue
+                route_points, total_time = route
+                items.append(FleetRouteItemSchema(
+                    boat_profile_id=profile_id,
+                    found=True,
+                    geometry=[PointSchema(lat=p.y, lon=p.x) for p in route_points],
+                    distance_nm=self._calculate_total_distance(route_points),
+                    estimated_time_hours=total_time,
+                    time_behind_hours=total_time - fastest
+                ))
+
+            if request.save_routes:
+                name = f"Trasa {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}"
+                await self._save_route_items(
+                    items, [f"{name} (łódź {item.boat_profile_id})" for item in items],
+                    request.grid_resolution_nm, request.corridor_margin_nm, weather_data, time.time() - start_time
+                )
+
+            return FleetRouteResponseSchema(
+                routes=items,
+                grid_nodes=result.num_nodes,
+                search_statistics=self._create_search_statistics(result.statistics),
+                calculation_time_seconds=time.time() - start_time,
+                weather_timestamp=weather_data.timestamp
+            )
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Błąd obliczania tras: {str(e)}"
+            )
+
+    async def calculate_departure_sweep(self, request: DepartureSweepRequestSchema) -> DepartureSweepResponseSchema:
+        """Porównuje czasy przejścia odcinka dla kolejnych chwil wypłynięcia w oknie czasowym
+
+        Siatka i graf budowane są raz, a chwile wypłynięcia dzielone między
+        procesy puli obliczeniowej - każdy liczy trasy zależne od czasu
+        (wiatr z prognozy) na tym samym grafie.
+        """
+        start_time = time.time()
+
+        step_hours = request.step_minutes / 60.0
+        departures_count = int(request.window_hours / step_hours + 1e-9) + 1
+        if departures_count > settings.DEPARTURE_SWEEP_MAX_DEPARTURES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Zbyt wiele chwil wypłynięcia (maksymalnie {settings.DEPARTURE_SWEEP_MAX_DEPARTURES}) "
+                       f"- zwiększ odstęp lub skróć okno"
+            )
+
+        try:
+            start_point = Point(request.start.lon, request.start.lat)
+            end_point = Point(request.end.lon, request.end.lat)
+
+            buffer = max(request.corridor_margin_nm / 60.0, 0.1)  # Konwersja NM na stopnie
+            bounds = {
+                'north': max(request.start.lat, request.end.lat) + buffer,
+                'south': min(request.start.lat, request.end.lat) - buffer,
+                'east': max(request.start.lon, request.end.lon) + buffer,
+                'west': min(request.start.lon, request.end.lon) - buffer
+            }
+            obstacles = await self.obstacle_crud.get_obstacles_in_area(**bounds)
+            obstacle_index = ObstacleIndex(obstacles)
+            forecast = await self.weather_service.get_weather_forecast(bounds, settings.FORECAST_HOURS)
+            polar = await self._get_sailing_polar(request.boat_profile_id)
+
+            window_start = request.window_start or datetime.utcnow()
+            first_hours = forecast.hours_since_start(window_start)
+            departure_hours = [first_hours + k * step_hours for k in range(departures_count)]
+
+            # Graf wspólny dla całego okna - siatka zagęszczana według wiatru na jego początku
+            config = GridConfig(
+                min_distance_nm=request.grid_resolution_nm,
+                corridor_margin_nm=request.corridor_margin_nm
+            )
+            time_limit = min(request.max_calculation_time, settings.MAX_ROUTE_CALCULATION_TIME)
+            deadline = start_time + time_limit
+            job = DepartureSweepJob.create(
+                start_point, end_point, config, obstacle_index, forecast.snapshot(first_hours), polar,
+                use_weather_grid=request.use_weather_routing,
+                deadline=deadline
+            )
+            departure_graph = await self._run_job(run_departure_graph_job, job, deadline - time.time())
+
+            # Co n-ta chwila wypłynięcia dla każdego procesu - części o podobnym koszcie,
+            # nie więcej niż wolnych miejsc w kolejce puli
+            parts = max(min(compute_pool.workers, compute_pool.max_pending - compute_pool.pending), 1)
+            polar_speeds, polar_steps = DepartureChunkJob.encode_polar(polar)
+            chunk_jobs = [
+                DepartureChunkJob(
+                    departure_graph=departure_graph,
+                    forecast_arrays=forecast.to_arrays(),
+                    forecast_start=forecast.start_time,
+                    polar_speeds=polar_speeds,
+                    polar_steps=polar_steps,
+                    departure_hours=departure_hours[part::parts],
+                    isochrone_sector_deg=request.isochrone_sector_deg,
+                    deadline=deadline
+                )
+                for part in range(min(parts, departures_count))
+            ]
+            tasks = [
+                asyncio.ensure_future(self._run_job(run_departure_chunk_job, chunk_job, deadline - time.time()))
+                for chunk_job in chunk_jobs
+            ]
+            try:
+                chunks = await asyncio.gather(*tasks)
+            except BaseException:
+                # Część odrzucona lub przerwana - pozostałe nie zajmują dalej miejsc w puli
+                for task in tasks:
+                    task.cancel()
+                raise
+
+            items = []
+            for number in range(departures_count):
+                departure_time = window_start + timedelta(hours=number * step_hours)
+                total_time = chunks[number % len(chunks)].times[number // len(chunks)]
+                if total_time is None:
+                    items.append(DepartureSweepItemSchema(departure_time=departure_time, found=False))
+                    continue
+                items.append(DepartureSweepItemSchema(
+                    departure_time=departure_time,
+                    found=True,
+                    estimated_time_hours=total_time,
+                    arrival_time=departure_time + timedelta(hours=total_time)
+                ))
+
+            # Statystyki - sumy dla wszystkich części
+            statistics = chunks[0].statistics
+            for chunk in chunks[1:]:
+                statistics.nodes_expanded += chunk.statistics.nodes_expanded
+                statistics.edges_evaluated += chunk.statistics.edges_evaluated
+                statistics.nodes_pruned += chunk.statistics.nodes_pruned
+                statistics.may_be_suboptimal |= chunk.statistics.may_be_suboptimal
+
+            best_route = None
+            found_chunks = [(part, chunk) for part, chunk in enumerate(chunks) if chunk.best is not None]
+            if found_chunks:
+                part, chunk = min(found_chunks, key=lambda found: found[1].times[found[1].best])
+                number = chunk.best * len(chunks) + part
+                route_points = [Point(lon, lat) for lon, lat in chunk.route.tolist()]
+                best_route = DepartureSweepRouteSchema(
+                    departure_time=items[number].departure_time,
+                    geometry=[PointSchema(lat=p.y, lon=p.x) for p in route_points],
+                    distance_nm=self._calculate_total_distance(route_points),
+                    estimated_time_hours=items[number].estimated_time_hours
+                )
+                if request.save_route:
+                    name = f"Trasa {best_route.departure_time.strftime('%Y-%m-%d %H:%M')} (najlepsze wypłynięcie)"
+                    await self._save_route_items(
+                        [best_route], [name], request.grid_resolution_nm, request.corridor_margin_nm,
+                        forecast.snapshot(departure_hours[number]), time.time() - start_time
+                    )
+
+            return DepartureSweepResponseSchema(
+                departures=items,
+                best_route=best_route,
+                grid_nodes=departure_graph.graph.num_nodes,
+                search_statistics=self._create_search_statistics(statistics),
+                calculation_time_seconds=time.time() - start_time,
+                weather_timestamp=forecast.start_time
+            )
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Błąd obliczania tras: {str(e)}"
+            )
+
+    async def calculate_course(self, request: CourseRequestSchema) -> CourseResponseSchema:
+        """Oblicza trasę regatową przez kolejne znaki kursu na jednym grafie obszaru"""
+        start_time = time.time()
+
+        if len(request.marks) > settings.COURSE_MAX_MARKS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Zbyt wiele znaków kursu (maksymalnie {settings.COURSE_MAX_MARKS})"
+            )
+
+        try:
+            marks = [CourseMark(mark.lon, mark.lat, mark.rounding) for mark in request.marks]
+
+            buffer = max(request.corridor_margin_nm / 60.0, 0.1)  # Konwersja NM na stopnie
+            bounds = {
+                'north': max(mark.lat for mark in marks) + buffer,
+                'south': min(mark.lat for mark in marks) - buffer,
+                'east': max(mark.lon for mark in marks) + buffer,
+                'west': min(mark.lon for mark in marks) - buffer
+            }
+            obstacles = await self.obstacle_crud.get_obstacles_in_area(**bounds)
+            obstacle_index = ObstacleIndex(obstacles)
+            weather_data = await self.weather_service.get_weather_data(bounds)
+            polar = await self._get_sailing_polar(request.boat_profile_id)
+
+            config = GridConfig(
+                min_distance_nm=request.grid_resolution_nm,
+                corridor_margin_nm=request.corridor_margin_nm
+            )
+            time_limit = min(request.max_calculation_time, settings.MAX_ROUTE_CALCULATION_TIME)
+            job = CourseRouteJob.create(
+                marks, config, obstacle_index, weather_data, polar,
+                rounding_radius_nm=settings.MARK_ROUNDING_RADIUS_NM,
+                deadline=start_time + time_limit
+            )
+            result = await self._run_job(run_course_route_job, job, start_time + time_limit - time.time())
+
+            legs = []
+            for number, leg in enumerate(result.legs):
+                leg_points = leg.route_points
+                distance = self._calculate_total_distance(leg_points)
+                legs.append(CourseLegSchema(
+                    leg_number=number + 1,
+                    from_mark=number,
+                    to_mark=number + 1,
+                    found=leg.path_found,
+                    geometry=[PointSchema(lat=p.y, lon=p.x) for p in leg_points],
+                    distance_nm=distance,
+                    estimated_time_hours=leg.total_time,
+                    avg_boat_speed_kts=distance / leg.total_time if 0 < leg.total_time < float("inf") else None
+                ))
+
+            route_points = result.route_points
+            total_distance = self._calculate_total_distance(route_points)
+            route_id = uuid4()
+            route_data = RouteCreate(
+                name=f"Regaty {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}",
+                start_point=f"POINT({route_points[0].x} {route_points[0].y})",
+                end_point=f"POINT({route_points[-1].x} {route_points[-1].y})",
+                geometry=self._create_linestring_wkt(route_points),
+                distance_nm=total_distance,
+                estimated_time_hours=result.total_time,
+                grid_resolution_nm=request.grid_resolution_nm,
+                corridor_margin_nm=request.corridor_margin_nm,
+                calculation_time_seconds=time.time() - start_time,
+                weather_timestamp=weather_data.timestamp
+            )
+
+            if request.save_route:
+                try:
+                    saved_route = await self.route_crud.create_route(route_data)
+                    route_id = saved_route.id
+                except Exception as e:
+                    logger.warning(f"Nie udało się zapisać trasy regatowej w bazie: {e}")
+
+            return CourseResponseSchema(
+                id=route_id,
+                name=route_data.name,
+                geometry=[PointSchema(lat=p.y, lon=p.x) for p in route_points],
+                legs=legs,
+                distance_nm=total_distance,
+                estimated_time_hours=result.total_time,
+                grid_nodes=result.num_nodes,
+                search_statistics=self._create_search_statistics(result.statistics),
+                calculation_time_seconds=time.time() - start_time,
+                weather_timestamp=weather_data.timestamp
+            )
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Błąd obliczania trasy: {str(e)}"
+            )
+
+    async def _save_route_items(self, items: list, names: List[str], grid_resolution_nm: float,
+                                corridor_margin_nm: float, weather_data, calculation_time: float):
+        """Zapisuje znalezione trasy (schematy z geometry) jednym zatwierdzeniem i uzupełnia ich ID"""
+        found = [(item, name) for item, name in zip(items, names) if item.found]
+        routes_data = [
+            RouteCreate(
+                name=name,
+                start_point=f"POINT({item.geometry[0].lon} {item.geometry[0].lat})",
+                end_point=f"POINT({item.geometry[-1].lon} {item.geometry[-1].lat})",
+                geometry=self._create_linestring_wkt([Point(p.lon, p.lat) for p in item.geometry]),
+                distance_nm=item.distance_nm,
+                estimated_time_hours=item.estimated_time_hours,
+                grid_resolution_nm=grid_resolution_nm,
+                corridor_margin_nm=corridor_margin_nm,
+                calculation_time_seconds=calculation_time,
+                weather_timestamp=weather_data.timestamp
+            )
+            for item, name in found
+        ]
+        try:
+            saved_routes = await self.route_crud.create_routes(routes_data)
+            for (item, _), saved_route in zip(found, saved_routes):
+                item.id = saved_route.id
+        except Exception as e:
+            logger.warning(f"Nie udało się zapisać tras w bazie: {e}")
+
+    def _validate_regional_request(self, request: RouteRequestSchema):
+        """Sprawdza, czy zapytanie można policzyć na grafie regionalnym (siatka regional)"""
+        region = settings.GDANSK_BAY_BOUNDS
+        for point in (request.start, request.end):
+            if not (region["south"] <= point.lat <= region["north"] and region["west"] <= point.lon <= region["east"]):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Siatka regional obsługuje tylko trasy w obszarze Zatoki Gdańskiej"
+                )
+        if request.routing_mode == "time_dependent":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Siatka regional wymaga stałych wag krawędzi - niedostępna przy wietrze zmiennym w czasie"
+            )
+        if request.alternatives_count > 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Siatka regional nie wyznacza tras alternatywnych"
+            )
+        if request.search_mode != "eager":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Siatka regional (kierunkowe czasy krawędzi) obsługuje tylko tryb eager"
+            )
+
+    async def _run_job(self, fn, job, timeout: float):
+        """Wykonuje zadanie obliczeniowe w puli obliczeniowej z limitem czasu"""
+        try:
+            return await compute_pool.run(fn, job, timeout=max(timeout, 0.0))
+        except ComputePoolBusyError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Zbyt wiele obliczeń tras w kolejce - spróbuj ponownie później",
+                headers={"Retry-After": "5"}
+            )
+        except (asyncio.TimeoutError, CalculationTimeoutError):
+            raise HTTPException(
+                status_code=status.HTTP_408_REQUEST_TIMEOUT,
+                detail="Obliczenie trasy przekroczyło limit czasu"
+            )
+
+    async def _get_sailing_polar(self, boat_profile_id: Optional[UUID]) -> SailingPolar:
+        """Zwraca skompilowaną polarę z profilu łodzi lub polarę domyślną"""
+        if boat_profile_id is None:
+            return DEFAULT_POLAR
+
+        profile = await self.boat_profile_crud.get_boat_profile(boat_profile_id)
+        if not profile:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Profil łodzi nie został znaleziony"
+            )
+
+        try:
+            return SailingPolar.from_profile_data(profile.polar_data)
+        except (ValueError, KeyError, TypeError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Nieprawidłowe dane polarne profilu łodzi: {e}"
+            )
+
     def _calculate_total_distance(self, route_points: List[Point]) -> float:
         """Oblicza całkowitą odległość trasy"""
         total_distance = 0.0
@@ -171,6 +805,46 @@ class RouteService:
         
         return waypoints
 
+    def _create_search_statistics(self, statistics) -> Optional[SearchStatisticsSchema]:
+        """Konwertuje statystyki wyszukiwania na schema"""
+        if statistics is None:
+            return None
+        return SearchStatisticsSchema(
+            search_mode=statistics.search_mode,
+            nodes_expanded=statistics.nodes_expanded,
+            edges_evaluated=statistics.edges_evaluated,
+            edges_possible=statistics.edges_possible,
+            heuristic=statistics.heuristic,
+            nodes_pruned=statistics.nodes_pruned,
+            may_be_suboptimal=statistics.may_be_suboptimal
+        )
+
+    def _create_alternatives(self, routes: List[Tuple[List[Point], float]]) -> List[RouteAlternativeSchema]:
+        """Tworzy schematy tras alternatywnych (numerowanych od 1)"""
+        return [
+            RouteAlternativeSchema(
+                alternative_number=number,
+                geometry=[PointSchema(lat=p.y, lon=p.x) for p in points],
+                distance_nm=self._calculate_total_distance(points),
+                estimated_time_hours=total_time
+            )
+            for number, (points, total_time) in enumerate(routes, start=1)
+        ]
+
+    def _alternatives_to_records(self, routes: List[Tuple[List[Point], float]],
+                                 alternatives: List[RouteAlternativeSchema]) -> List[dict]:
+        """Dane tras alternatywnych do zapisu w tabeli route_alternatives"""
+        return [
+            {
+                "alternative_number": alternative.alternative_number,
+                "geometry": self._create_linestring_wkt(points),
+                "distance_nm": alternative.distance_nm,
+                "estimated_time_hours": alternative.estimated_time_hours,
+                "risk_score": alternative.risk_score
+            }
+            for (points, _), alternative in zip(routes, alternatives)
+        ]
+
     def _create_linestring_wkt(self, route_points: List[Point]) -> str:
         """Tworzy WKT LineString z punktów trasy"""
         coords = [f"{point.x} {point.y}" for point in route_points]
@@ -211,6 +885,7 @@ class RouteService:
 
     async def delete_route(self, route_id: UUID) -> bool:
         """Usuwa trasę"""
+        reroute_store.discard(route_id)
         return await self.route_crud.delete_route(route_id)
 
     async def count_routes(self) -> int:
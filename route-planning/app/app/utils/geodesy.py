@@ -0,0 +1,91 @@
+import numpy as np
+import shapely
+from shapely.geometry.base import BaseGeometry
+from typing import Tuple
+
+# Wektorowe funkcje geodezyjne: przyjmują skalary lub tablice numpy (z rozgłaszaniem),
+# odległości w milach morskich, kąty w stopniach. Model Ziemi to sfera o promieniu
+# 6371 km - ten sam, którego używają calculate_distance i calculate_bearing.
+
+# Przelicznik kilometrów na mile morskie
+NM_PER_KM = 0.539957
+# Promień Ziemi w milach morskich
+EARTH_RADIUS_NM = 6371.0 * NM_PER_KM
+
+
+def haversine_nm(lons1, lats1, lons2, lats2) -> np.ndarray:
+    """Odległość ortodromiczna (haversine) w milach morskich"""
+    lat1, lon1 = np.radians(lats1), np.radians(lons1)
+    lat2, lon2 = np.radians(lats2), np.radians(lons2)
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = (np.sin(dlat / 2) ** 2 +
+         np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2)
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_NM * c
+
+
+def initial_bearing(lons1, lats1, lons2, lats2) -> np.ndarray:
+    """Kurs początkowy (azymut względem północy geograficznej, 0-360°)"""
+    lat1, lon1 = np.radians(lats1), np.radians(lons1)
+    lat2, lon2 = np.radians(lats2), np.radians(lons2)
+    dlon = lon2 - lon1
+    x = np.sin(dlon) * np.cos(lat2)
+    y = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon)
+    return (np.degrees(np.arctan2(x, y)) + 360) % 360
+
+
+def destination_point(lons, lats, bearings, distances_nm) -> Tuple[np.ndarray, np.ndarray]:
+    """Punkt docelowy po przepłynięciu distances_nm kursem bearings z punktu (lons, lats)"""
+    lat1, lon1 = np.radians(lats), np.radians(lons)
+    theta = np.radians(bearings)
+    delta = np.asarray(distances_nm, dtype=float) / EARTH_RADIUS_NM
+
+    lat2 = np.arcsin(np.sin(lat1) * np.cos(delta) +
+                     np.cos(lat1) * np.sin(delta) * np.cos(theta))
+    lon2 = lon1 + np.arctan2(np.sin(theta) * np.sin(delta) * np.cos(lat1),
+                             np.cos(delta) - np.sin(lat1) * np.sin(lat2))
+    return (np.degrees(lon2) + 540) % 360 - 180, np.degrees(lat2)
+
+
+class LocalProjection:
+    """Lokalne odwzorowanie równoodległościowe (equirectangular) w milach morskich
+
+    Rzutuje współrzędne na płaszczyznę (x, y) wokół punktu (lon0, lat0).
+    Skala wschód-zachód jest dokładna tylko na szerokości lat0, więc względny
+    błąd odległości wynosi co najwyżej ok. tan(lat0) * |lat - lat0| [rad]:
+    - korytarz trasy (±0.05° od lat0, ok. ±3 NM): < 0.13%,
+    - cała Zatoka Gdańska (54.3-54.8° N, 18.3-19.0° E, lat0 = 54.55°): < 0.65%,
+      czyli do ok. 0.15 NM na najdłuższych odcinkach.
+    """
+
+    def __init__(self, lon0: float, lat0: float):
+        self.lon0 = float(lon0)
+        self.lat0 = float(lat0)
+        self.cos_lat0 = float(np.cos(np.radians(lat0)))
+
+    @classmethod
+    def around(cls, lons, lats) -> "LocalProjection":
+        """Tworzy odwzorowanie ze środkiem w środku prostokąta otaczającego punkty"""
+        lons, lats = np.asarray(lons, dtype=float), np.asarray(lats, dtype=float)
+        return cls((lons.min() + lons.max()) / 2, (lats.min() + lats.max()) / 2)
+
+    def to_xy(self, lons, lats) -> Tuple[np.ndarray, np.ndarray]:
+        """Współrzędne geograficzne -> (x, y) w NM"""
+        x = EARTH_RADIUS_NM * np.radians(np.asarray(lons, dtype=float) - self.lon0) * self.cos_lat0
+        y = EARTH_RADIUS_NM * np.radians(np.asarray(lats, dtype=float) - self.lat0)
+        return x, y
+
+    def to_lonlat(self, x, y) -> Tuple[np.ndarray, np.ndarray]:
+        """(x, y) w NM -> współrzędne geograficzne"""
+        lons = self.lon0 + np.degrees(np.asarray(x, dtype=float) / (EARTH_RADIUS_NM * self.cos_lat0))
+        lats = self.lat0 + np.degrees(np.asarray(y, dtype=float) / EARTH_RADIUS_NM)
+        return lons, lats
+
+    def project_geometry(self, geometry: BaseGeometry) -> BaseGeometry:
+        """Rzutuje geometrię Shapely ze współrzędnych geograficznych na płaszczyznę NM"""
+        return shapely.transform(geometry, lambda coords: np.column_stack(self.to_xy(coords[:, 0], coords[:, 1])))
+
+    def unproject_geometry(self, geometry: BaseGeometry) -> BaseGeometry:
+        """Odwrotność project_geometry"""
+        return shapely.transform(geometry, lambda coords: np.column_stack(self.to_lonlat(coords[:, 0], coords[:, 1])))
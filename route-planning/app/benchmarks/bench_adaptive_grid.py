@@ -0,0 +1,71 @@
+"""Benchmark siatki wielorozdzielczej (grid_mode="adaptive")
+
+Dla kilku odcinków w Zatoce Gdańskiej z przeszkodami porównuje siatkę
+jednorodną (grid_mode="poisson") z wielorozdzielczą: liczbę węzłów, liczbę
+krawędzi grafu, czas obliczenia oraz różnicę czasu przejścia znalezionej
+trasy względem siatki jednorodnej.
+
+Uruchomienie (z katalogu route-planning/app):
+    python -m benchmarks.bench_adaptive_grid
+"""
+import time
+
+from shapely.geometry import Point, box
+
+from app.core.grid import AdaptiveGridGenerator, GridConfig
+from app.core.obstacles import ObstacleIndex
+from app.core.routing import DEFAULT_POLAR, RouteOptimizer
+from app.core.weather import WeatherService
+from app.utils.geodesy import haversine_nm
+
+# Przeszkody testowe (mielizny i wyspa)
+OBSTACLES = [
+    box(18.60, 54.45, 18.63, 54.47),
+    Point(18.68, 54.52).buffer(0.012),
+    box(18.52, 54.55, 18.56, 54.56),
+]
+
+# (start, meta, margines korytarza NM)
+LEGS = [
+    ((18.55, 54.42), (18.70, 54.50), 2.0),
+    ((18.45, 54.40), (18.85, 54.62), 2.0),
+    ((18.45, 54.40), (18.85, 54.62), 5.0),
+    ((18.40, 54.60), (18.95, 54.40), 5.0),
+]
+RESOLUTION_NM = 0.5
+
+
+def solve(mode: str, start: Point, end: Point, margin: float, obstacle_index, weather_data, seed: int = 0):
+    config = GridConfig(min_distance_nm=RESOLUTION_NM, corridor_margin_nm=margin, seed=seed, grid_mode=mode)
+    t0 = time.perf_counter()
+    grid_points = AdaptiveGridGenerator(config).generate_route_grid(start, end, obstacle_index)
+    optimizer = RouteOptimizer(DEFAULT_POLAR, backend="csr")
+    _, total_time = optimizer.find_optimal_route(start, end, grid_points, obstacle_index, weather_data)
+    elapsed = time.perf_counter() - t0
+    return len(grid_points), optimizer.last_statistics.edges_possible, total_time, elapsed
+
+
+def main():
+    obstacle_index = ObstacleIndex(OBSTACLES)
+    weather_data = WeatherService()._create_default_weather_data(
+        {'north': 54.7, 'south': 54.35, 'east': 19.0, 'west': 18.35}
+    )
+
+    print(f"{'odcinek':>8} {'marg.':>5} | {'jednorodna: węzły':>17} {'krawędzie':>9} {'czas [s]':>8} | "
+          f"{'adaptive: węzły':>15} {'krawędzie':>9} {'czas [s]':>8} | {'Δ czasu trasy':>13} {'Δ szum':>8}")
+
+    for (lon1, lat1), (lon2, lat2), margin in LEGS:
+        start, end = Point(lon1, lat1), Point(lon2, lat2)
+        uniform = solve("poisson", start, end, margin, obstacle_index, weather_data)
+        adaptive = solve("adaptive", start, end, margin, obstacle_index, weather_data)
+        reseeded = solve("poisson", start, end, margin, obstacle_index, weather_data, seed=1)
+
+        length = float(haversine_nm(lon1, lat1, lon2, lat2))
+        delta = (adaptive[2] - uniform[2]) / uniform[2] * 100
+        noise = (reseeded[2] - uniform[2]) / uniform[2] * 100
+        print(f"{length:>6.1f}NM {margin:>5.1f} | {uniform[0]:>17} {uniform[1]:>9} {uniform[3]:>8.3f} | "
+              f"{adaptive[0]:>15} {adaptive[1]:>9} {adaptive[3]:>8.3f} | {delta:>+12.2f}% {noise:>+7.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark tras alternatywnych (metoda kar na jednym grafie)
+
+Dla odcinka w Zatoce Gdańskiej z przeszkodami mierzy czas wyznaczenia trasy
+głównej i k tras alternatywnych oraz porównuje go z k + 1 niezależnymi
+obliczeniami (każde z budową grafu). Dla każdej alternatywy podaje wydłużenie
+czasu przejścia względem trasy optymalnej.
+
+Uruchomienie (z katalogu route-planning/app):
+    python -m benchmarks.bench_alternatives
+"""
+import time
+
+from shapely.geometry import Point, box
+
+from app.core.grid import AdaptiveGridGenerator, GridConfig
+from app.core.obstacles import ObstacleIndex
+from app.core.routing import DEFAULT_POLAR, RouteOptimizer
+from app.core.weather import WeatherService
+
+OBSTACLES = [
+    box(18.60, 54.45, 18.63, 54.47),
+    Point(18.68, 54.52).buffer(0.012),
+    box(18.52, 54.55, 18.56, 54.56),
+]
+START, END = Point(18.45, 54.40), Point(18.85, 54.62)
+RESOLUTION_NM = 0.5
+MARGIN_NM = 3.0
+COUNTS = [0, 1, 2, 4]
+
+
+def main():
+    obstacle_index = ObstacleIndex(OBSTACLES)
+    weather_data = WeatherService()._create_default_weather_data(
+        {'north': 54.75, 'south': 54.3, 'east': 19.0, 'west': 18.3}
+    )
+    grid_points = AdaptiveGridGenerator(
+        GridConfig(min_distance_nm=RESOLUTION_NM, corridor_margin_nm=MARGIN_NM, seed=0)
+    ).generate_route_grid(START, END, obstacle_index)
+
+    for backend, search_mode in [("csr", "eager"), ("csr", "lazy"), ("networkx", "eager")]:
+        print(f"{backend}/{search_mode} ({len(grid_points)} węzłów)")
+        print(f"  {'k':>3} {'znalezione':>10} {'czas [s]':>9} {'k+1 obliczeń [s]':>17} {'wydłużenie tras':>30}")
+        single = None
+        for k in COUNTS:
+            optimizer = RouteOptimizer(DEFAULT_POLAR, backend=backend, search_mode=search_mode)
+            t0 = time.perf_counter()
+            _, total_time = optimizer.find_optimal_route(
+                START, END, grid_points, obstacle_index, weather_data, alternatives=k
+            )
+            elapsed = time.perf_counter() - t0
+            single = elapsed if k == 0 else single
+
+            stretch = " ".join(f"{(t / total_time - 1) * 100:+.1f}%" for _, t in optimizer.last_alternatives)
+            print(f"  {k:>3} {len(optimizer.last_alternatives):>10} {elapsed:>9.3f} "
+                  f"{single * (k + 1):>17.3f} {stretch:>30}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark dwukierunkowego A* dla odcinków różnej długości
+
+Dla odcinków od 2 do 40 NM w Zatoce Gdańskiej buduje graf CSR na siatce
+heksagonalnej i porównuje jednokierunkowy A* z dwukierunkowym (obie wersje
+z heurystyką polarną i z ALT): liczbę rozwiniętych węzłów i czas samego
+wyszukiwania. Sprawdza też, że wszystkie warianty zwracają ten sam czas trasy.
+
+Wynik: wersja dwukierunkowa rozwija mniej węzłów tylko na odcinkach do ok.
+10 NM (i o kilka-kilkanaście procent), a na odcinkach 20-40 NM, dla których
+miała być przeznaczona, rozwija tyle samo lub więcej - dlatego tryb
+bidirectional nie jest oferowany w API.
+
+Uruchomienie (z katalogu route-planning/app):
+    python -m benchmarks.bench_bidirectional
+"""
+import time
+
+import numpy as np
+from shapely.geometry import Point
+
+from app.core.config import settings
+from app.core.graph import Landmarks, astar, bidirectional_astar
+from app.core.grid import GridConfig, HexLatticeGenerator
+from app.core.obstacles import ObstacleIndex
+from app.core.routing import DEFAULT_POLAR, RouteOptimizer
+from app.core.weather import WeatherService
+
+START = (18.62, 54.42)
+BEARING_DEG = 25.0
+LEG_LENGTHS_NM = [2, 5, 10, 20, 40]
+RESOLUTION_NM = 0.5
+MARGINS_NM = [2.0, 8.0]
+
+
+def leg_end(length_nm: float) -> Point:
+    lon, lat = START
+    bearing = np.radians(BEARING_DEG)
+    return Point(lon + length_nm * np.sin(bearing) / (60 * np.cos(np.radians(lat))),
+                 lat + length_nm * np.cos(bearing) / 60)
+
+
+def main():
+    obstacle_index = ObstacleIndex([])
+    weather_data = WeatherService()._create_default_weather_data(
+        {'north': 55.1, 'south': 54.3, 'east': 19.3, 'west': 18.4}
+    )
+    start = Point(*START)
+
+    print(f"{'odcinek':>8} {'marg.':>5} {'węzły':>6} {'krawędzie':>9} | {'wariant':<20} {'rozwinięte':>10} "
+          f"{'wyszukiwanie [s]':>17} {'czas trasy [h]':>15}")
+    for margin in MARGINS_NM:
+        for length in LEG_LENGTHS_NM:
+            run_leg(start, leg_end(length), length, margin, obstacle_index, weather_data)
+
+
+def run_leg(start: Point, end: Point, length: float, margin: float, obstacle_index, weather_data):
+    grid_points = HexLatticeGenerator(
+        GridConfig(min_distance_nm=RESOLUTION_NM, corridor_margin_nm=margin, grid_mode="hex")
+    ).generate_route_grid(start, end, obstacle_index)
+    grid_points = [start] + grid_points + [end]
+    source, target = 0, len(grid_points) - 1
+
+    optimizer = RouteOptimizer(DEFAULT_POLAR, backend="csr")
+    graph = optimizer.build_csr_graph(grid_points, obstacle_index, weather_data)
+    landmarks = Landmarks.select(graph, settings.ALT_LANDMARKS)
+
+    lons, lats = graph.lons, graph.lats
+    polar = (optimizer._heuristic_array(lons, lats, target, weather_data),
+             optimizer._heuristic_array(lons, lats, source, weather_data))
+    alt = (np.maximum(polar[0], landmarks.heuristic(target)), np.maximum(polar[1], landmarks.heuristic(source)))
+
+    variants = [
+        ("A* polara", lambda: astar(graph, source, target, polar[0])),
+        ("dwukierunkowy polara", lambda: bidirectional_astar(graph, source, target, *polar)),
+        ("A* ALT", lambda: astar(graph, source, target, alt[0])),
+        ("dwukierunkowy ALT", lambda: bidirectional_astar(graph, source, target, *alt)),
+    ]
+    for number, (name, search) in enumerate(variants):
+        t0 = time.perf_counter()
+        result = search()
+        elapsed = time.perf_counter() - t0
+        prefix = f"{length:>6}NM {margin:>5.1f} {graph.num_nodes:>6} {graph.num_edges:>9}" if number == 0 \
+            else " " * 31
+        print(f"{prefix} | {name:<20} {result.nodes_expanded:>10} {elapsed:>17.4f} {result.cost:>15.4f}")
+
+
+if __name__ == "__main__":
+    main()
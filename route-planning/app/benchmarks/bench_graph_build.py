@@ -0,0 +1,74 @@
+"""Benchmark wyszukiwania kandydatów na krawędzie grafu
+
+Porównuje dawną pętlę po wszystkich parach punktów (O(n²) wywołań
+calculate_distance) z zapytaniem KD-tree w PointIndex i sprawdza, że oba
+podejścia dają identyczny zbiór krawędzi.
+
+Uruchomienie (z katalogu route-planning/app):
+    python -m benchmarks.bench_graph_build
+"""
+import time
+
+import numpy as np
+from shapely.geometry import Point
+
+from app.core.routing import RouteOptimizer
+from app.core.spatial import PointIndex
+from app.utils.calculations import calculate_distance
+
+# Obszar Zatoki Gdańskiej
+SOUTH, NORTH = 54.35, 54.75
+WEST, EAST = 18.40, 18.95
+
+GRID_SIZES = [250, 500, 1000, 2000, 4000, 8000]
+# Pętla O(n²) jest mierzona tylko do tego rozmiaru siatki
+MAX_ALL_PAIRS_SIZE = 2000
+
+
+def random_grid(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    lons = rng.uniform(WEST, EAST, n)
+    lats = rng.uniform(SOUTH, NORTH, n)
+    return [Point(lon, lat) for lon, lat in zip(lons, lats)]
+
+
+def all_pairs_edges(points, max_distance_nm):
+    """Dotychczasowa implementacja z RouteOptimizer.build_graph"""
+    edges = []
+    for i, point1 in enumerate(points):
+        for j, point2 in enumerate(points[i + 1:], i + 1):
+            if calculate_distance(point1, point2) <= max_distance_nm:
+                edges.append((i, j))
+    return edges
+
+
+def kdtree_edges(points, max_distance_nm):
+    pairs_i, pairs_j, _ = PointIndex.from_points(points).pairs_within(max_distance_nm)
+    return list(zip(pairs_i.tolist(), pairs_j.tolist()))
+
+
+def main():
+    max_distance = RouteOptimizer.MAX_CONNECTION_DISTANCE_NM
+    print(f"Promień połączenia: {max_distance} NM")
+    print(f"{'punkty':>8} {'krawędzie':>10} {'all-pairs [s]':>14} {'kd-tree [s]':>12} {'przyspieszenie':>15}")
+
+    for n in GRID_SIZES:
+        points = random_grid(n)
+
+        t0 = time.perf_counter()
+        fast = kdtree_edges(points, max_distance)
+        kdtree_time = time.perf_counter() - t0
+
+        if n <= MAX_ALL_PAIRS_SIZE:
+            t0 = time.perf_counter()
+            slow = all_pairs_edges(points, max_distance)
+            all_pairs_time = time.perf_counter() - t0
+            assert slow == fast, f"Różne zbiory krawędzi dla n={n}"
+            print(f"{n:>8} {len(fast):>10} {all_pairs_time:>14.3f} {kdtree_time:>12.4f} "
+                  f"{all_pairs_time / kdtree_time:>14.1f}x")
+        else:
+            print(f"{n:>8} {len(fast):>10} {'-':>14} {kdtree_time:>12.4f} {'-':>15}")
+
+
+if __name__ == "__main__":
+    main()
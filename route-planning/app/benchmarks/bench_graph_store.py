@@ -0,0 +1,101 @@
+"""Benchmark zapisanego grafu regionalnego mapowanego z pliku
+
+Zapisuje graf Zatoki Gdańskiej do pliku tymczasowego tak jak krok budowania,
+mierzy otwarcie pliku w świeżym obiekcie pamięci podręcznej i pamięć procesu
+(prywatną oraz mapowaną z pliku, wspólną dla procesów). Dla losowych odcinków
+porównuje trasę na zapisanym grafie (siatka regional: find_route, Dijkstra
+na całym grafie) z trybem korytarzowym, który dla każdego zapytania buduje
+siatkę heksagonalną i graf; ostatnia kolumna to różnica czasu trasy grafu
+regionalnego względem korytarza.
+
+Uruchomienie (z katalogu route-planning/app):
+    python -m benchmarks.bench_graph_store
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+from shapely.geometry import Point
+
+from app.core.config import settings
+from app.core.grid import GridConfig, HexLatticeGenerator
+from app.core.obstacles import ObstacleIndex
+from app.core.regional_graph import RegionalGraph, RegionalGraphCache, regional_graph_path
+from app.core.routing import DEFAULT_POLAR, RouteOptimizer
+from app.core.weather import WeatherService
+
+ROUTES = 12
+MARGIN_NM = 2.0
+SEED = 3
+
+
+def memory_mb() -> dict:
+    """Pamięć procesu z /proc (Linux): prywatna anonimowa i mapowana z plików"""
+    usage = {}
+    with open("/proc/self/smaps_rollup") as handle:
+        for line in handle:
+            name, _, value = line.partition(":")
+            if name in ("Anonymous", "Pss_File"):
+                usage[name] = int(value.split()[0]) / 1024
+    return usage
+
+
+def main():
+    bounds = settings.GDANSK_BAY_BOUNDS
+    obstacle_index = ObstacleIndex([])
+    weather_data = WeatherService()._create_default_weather_data(bounds)
+
+    with tempfile.TemporaryDirectory() as directory:
+        t0 = time.perf_counter()
+        built = RegionalGraph.build(RegionalGraphCache.make_key(bounds, obstacle_index), obstacle_index)
+        built.save(regional_graph_path("gdansk_bay", directory))
+        size = os.path.getsize(regional_graph_path("gdansk_bay", directory)) / 2 ** 20
+        print(f"budowa i zapis: {time.perf_counter() - t0:.2f} s, plik {size:.1f} MB")
+        del built
+
+        cache = RegionalGraphCache(directory=directory)
+        t0 = time.perf_counter()
+        cache.load_stored()
+        regional = cache.get_graph(bounds, obstacle_index)
+        print(f"otwarcie pliku: {1000 * (time.perf_counter() - t0):.1f} ms, pamięć {memory_mb()}")
+
+        t0 = time.perf_counter()
+        regional.weights(weather_data, DEFAULT_POLAR)
+        print(f"czasy krawędzi: {time.perf_counter() - t0:.2f} s, pamięć {memory_mb()}")
+
+        print(f"{'trasa':>5} | {'regional [s]':>12} {'czas [h]':>9} | {'korytarz [s]':>12} {'czas [h]':>9} "
+              f"| {'różnica':>8}")
+        graph = regional.graph
+        rng = np.random.default_rng(SEED)
+        for number, (source, target) in enumerate(rng.integers(0, graph.num_nodes, (ROUTES, 2)).tolist()):
+            start = Point(graph.lons[source] + 0.002, graph.lats[source])
+            end = Point(graph.lons[target] - 0.002, graph.lats[target])
+            row = [f"{number:>5}"]
+            times = []
+            for search in (
+                lambda: regional.find_route(start, end, weather_data, DEFAULT_POLAR)[1],
+                lambda: corridor_route(start, end, obstacle_index, weather_data),
+            ):
+                t0 = time.perf_counter()
+                total_time = search()
+                times.append(total_time)
+                row.append(f"{time.perf_counter() - t0:>12.4f} {total_time:>9.3f}")
+            row.append(f"{100 * (times[0] / times[1] - 1):>+7.1f}%")
+            print(" | ".join(row))
+
+
+def corridor_route(start: Point, end: Point, obstacle_index: ObstacleIndex, weather_data) -> float:
+    """Trasa trybu korytarzowego: siatka heksagonalna i graf budowane dla zapytania"""
+    generator = HexLatticeGenerator(GridConfig(
+        min_distance_nm=settings.REGIONAL_GRAPH_RESOLUTION_NM, corridor_margin_nm=MARGIN_NM, grid_mode="hex"
+    ))
+    grid_points = generator.generate_route_grid(start, end, obstacle_index)
+    _, total_time = RouteOptimizer(DEFAULT_POLAR, backend="csr").find_optimal_route(
+        start, end, grid_points, obstacle_index, weather_data, generator.lattice
+    )
+    return total_time
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark generowania siatki Poisson disk
+
+Porównuje dotychczasowy sampler (współrzędne w stopniach, komórki siatki
+pomocniczej w NM, pojedynczy kandydat na iterację) z PoissonDiskSamplerem
+działającym w lokalnym odwzorowaniu metrycznym. Raportowana jest liczba
+punktów, minimalna odległość między punktami (haversine) i czas.
+
+Dawny sampler nie gwarantuje zbieżności (każda komórka pamięta tylko
+ostatni punkt), dlatego jest przerywany po LEGACY_MAX_SAMPLES punktach.
+
+Uruchomienie (z katalogu route-planning/app):
+    python -m benchmarks.bench_grid
+"""
+import random
+import time
+
+import numpy as np
+from shapely.geometry import LineString, Point
+
+from app.core.grid import GridConfig, PoissonDiskSampler
+from app.utils.geodesy import haversine_nm
+
+# Krótkie odcinki w Zatoce Gdańskiej: (start, meta, rozdzielczość NM, margines NM)
+LEGS = [
+    ((18.60, 54.45), (18.62, 54.46), 0.25, 0.5),
+    ((18.60, 54.45), (18.65, 54.47), 0.25, 0.5),
+    ((18.60, 54.45), (18.70, 54.50), 0.5, 1.0),
+    ((18.55, 54.40), (18.75, 54.55), 0.5, 2.0),
+]
+LEGACY_MAX_SAMPLES = 5000
+
+
+class LegacyPoissonDiskSampler:
+    """Kopia dotychczasowej implementacji (z limitem liczby punktów)"""
+
+    def __init__(self, config: GridConfig):
+        self.config = config
+        self.cell_size = config.min_distance_nm / np.sqrt(2)
+
+    def generate_grid(self, start: Point, end: Point):
+        corridor = LineString([start, end]).buffer(self.config.corridor_margin_nm / 60.0)
+        self.grid, self.active_list, self.samples = {}, [], []
+        self._add_sample(start)
+
+        while self.active_list and len(self.samples) < LEGACY_MAX_SAMPLES:
+            idx = random.randint(0, len(self.active_list) - 1)
+            current_point = self.active_list[idx]
+            found = False
+            for _ in range(self.config.max_attempts):
+                angle = random.uniform(0, 2 * np.pi)
+                min_dist = self.config.min_distance_nm / 60.0
+                distance = random.uniform(min_dist, 2 * min_dist)
+                candidate = Point(current_point.x + distance * np.cos(angle),
+                                  current_point.y + distance * np.sin(angle))
+                if corridor.contains(candidate) and self._is_valid_candidate(candidate):
+                    self._add_sample(candidate)
+                    found = True
+                    break
+            if not found:
+                self.active_list.pop(idx)
+
+        if not any(self._distance_nm(end, s) < self.config.min_distance_nm for s in self.samples):
+            self.samples.append(end)
+        return self.samples
+
+    def _add_sample(self, point: Point):
+        self.samples.append(point)
+        self.active_list.append(point)
+        self.grid[(int(point.x / self.cell_size), int(point.y / self.cell_size))] = point
+
+    def _is_valid_candidate(self, candidate: Point) -> bool:
+        grid_x = int(candidate.x / self.cell_size)
+        grid_y = int(candidate.y / self.cell_size)
+        for dx in [-1, 0, 1]:
+            for dy in [-1, 0, 1]:
+                existing_point = self.grid.get((grid_x + dx, grid_y + dy))
+                if existing_point and self._distance_nm(candidate, existing_point) < self.config.min_distance_nm:
+                    return False
+        return True
+
+    def _distance_nm(self, point1: Point, point2: Point) -> float:
+        return float(haversine_nm(point1.x, point1.y, point2.x, point2.y))
+
+
+def min_spacing_nm(points) -> float:
+    lons = np.array([p.x for p in points])
+    lats = np.array([p.y for p in points])
+    i, j = np.triu_indices(len(points), 1)
+    return float(haversine_nm(lons[i], lats[i], lons[j], lats[j]).min())
+
+
+def run(sampler, start: Point, end: Point):
+    t0 = time.perf_counter()
+    points = sampler.generate_grid(start, end)
+    elapsed = time.perf_counter() - t0
+    return len(points), min_spacing_nm(points), elapsed
+
+
+def main():
+    random.seed(0)
+    print(f"{'odcinek [NM]':>12} {'r [NM]':>7} | {'dawny: pkt':>10} {'min odl.':>9} {'czas [s]':>9} | "
+          f"{'nowy: pkt':>9} {'min odl.':>9} {'czas [s]':>9}")
+
+    for (lon1, lat1), (lon2, lat2), resolution, margin in LEGS:
+        start, end = Point(lon1, lat1), Point(lon2, lat2)
+        config = GridConfig(min_distance_nm=resolution, corridor_margin_nm=margin, seed=0)
+
+        legacy = run(LegacyPoissonDiskSampler(config), start, end)
+        new = run(PoissonDiskSampler(config), start, end)
+
+        length = float(haversine_nm(lon1, lat1, lon2, lat2))
+        legacy_count = f"{legacy[0]}{'+' if legacy[0] >= LEGACY_MAX_SAMPLES else ''}"
+        print(f"{length:>12.2f} {resolution:>7.2f} | {legacy_count:>10} {legacy[1]:>9.3f} {legacy[2]:>9.3f} | "
+              f"{new[0]:>9} {new[1]:>9.3f} {new[2]:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Benchmark heurystyk A*: stała prędkość 6 kn, maksimum polary i ALT
+
+Dla kilku prędkości wiatru porównuje dawną heurystykę (odległość / 6 kn),
+dopuszczalną heurystykę z maksymalnej prędkości polary oraz ALT: liczbę
+rozwiniętych węzłów, czas wyszukiwania i nadwyżkę czasu trasy względem
+optimum z algorytmu Dijkstry. Przy silnym wietrze dawna heurystyka
+przeszacowuje czas i zwraca trasy gorsze od optymalnych.
+
+Czas ALT obejmuje wyznaczenie punktów orientacyjnych (ALT_LANDMARKS + 1
+przebiegów Dijkstry) - na grafie budowanym dla jednego zapytania jest ono
+droższe niż oszczędność w A*, dlatego RouteOptimizer nie oferuje ALT. Graf
+regionalny, na którym punkty można by wyznaczyć raz, przeszukiwany jest
+Dijkstrą ze scipy - szybszą od A* w Pythonie (bench_graph_store).
+
+Uruchomienie (z katalogu route-planning/app):
+    python -m benchmarks.bench_heuristic
+"""
+import time
+
+import numpy as np
+from shapely.geometry import Point, box
+
+from app.core.config import settings
+from app.core.graph import Landmarks, astar, dijkstra_path
+from app.core.grid import AdaptiveGridGenerator, GridConfig
+from app.core.obstacles import ObstacleIndex
+from app.core.routing import DEFAULT_POLAR, RouteOptimizer
+from app.core.weather import WeatherData, WeatherPoint, WindData
+from app.utils.geodesy import haversine_nm
+
+OBSTACLES = [
+    box(18.60, 54.45, 18.63, 54.47),
+    Point(18.68, 54.52).buffer(0.012),
+    box(18.52, 54.55, 18.56, 54.56),
+]
+START, END = Point(18.45, 54.40), Point(18.85, 54.62)
+WIND_SPEEDS_MS = [3.0, 8.0, 15.0]
+LEGACY_SPEED_KTS = 6.0
+
+
+def uniform_weather(speed: float) -> WeatherData:
+    weather_data = WeatherData()
+    for lat in np.arange(54.30, 54.75, 0.05):
+        for lon in np.arange(18.30, 19.05, 0.05):
+            weather_data.add_weather_point(WeatherPoint(lat=float(lat), lon=float(lon),
+                                                        wind=WindData(speed=speed, direction=250.0)))
+    return weather_data
+
+
+def main():
+    obstacle_index = ObstacleIndex(OBSTACLES)
+    grid_points = AdaptiveGridGenerator(
+        GridConfig(min_distance_nm=0.3, corridor_margin_nm=3.0, seed=0)
+    ).generate_route_grid(START, END, obstacle_index)
+    grid_points = [START] + grid_points + [END]
+    source, target = 0, len(grid_points) - 1
+
+    print(f"{len(grid_points)} węzłów, {settings.ALT_LANDMARKS} punktów orientacyjnych ALT")
+    print(f"{'wiatr [m/s]':>11} {'heurystyka':>12} {'rozwinięte':>10} {'wyszukiwanie [s]':>17} {'nadwyżka czasu':>15}")
+
+    for wind_speed in WIND_SPEEDS_MS:
+        weather_data = uniform_weather(wind_speed)
+        optimizer = RouteOptimizer(DEFAULT_POLAR, backend="csr")
+        graph = optimizer.build_csr_graph(grid_points, obstacle_index, weather_data)
+        optimum = dijkstra_path(graph, source, target).cost
+        distance = haversine_nm(graph.lons, graph.lats, graph.lons[target], graph.lats[target])
+
+        polar = distance / optimizer.heuristic_speed(weather_data)
+        t0 = time.perf_counter()
+        alt = np.maximum(polar, Landmarks.select(graph, settings.ALT_LANDMARKS).heuristic(target))
+        preprocessing = time.perf_counter() - t0
+
+        heuristics = [
+            ("6 kn", distance / LEGACY_SPEED_KTS, 0.0),
+            ("polara", polar, 0.0),
+            ("ALT", alt, preprocessing),
+        ]
+        for name, heuristic, setup in heuristics:
+            t0 = time.perf_counter()
+            result = astar(graph, source, target, heuristic)
+            elapsed = time.perf_counter() - t0 + setup
+            excess = (result.cost - optimum) / optimum * 100
+            print(f"{wind_speed:>11.1f} {name:>12} {result.nodes_expanded:>10} {elapsed:>17.4f} {excess:>+14.2f}%")
+        print(f"{'':>11} (w tym ALT - wyznaczenie punktów orientacyjnych: {preprocessing:.3f} s)")
+
+
+if __name__ == "__main__":
+    main()
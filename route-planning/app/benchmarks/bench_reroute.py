@@ -0,0 +1,151 @@
+"""Benchmark przyrostowego przeliczania trasy (D* Lite) względem wyszukiwania od nowa
+
+Buduje sesję przeliczania dla trasy przez Zatokę Gdańską, a następnie
+w kolejnych krokach przesuwa łódź wzdłuż pierwszego odcinka bieżącej trasy
+i zmienia wiatr w kilku punktach pogodowych leżących na trasie. Każdy krok
+porównuje naprawę sesji z pełnym wyszukiwaniem A* na tej samej siatce (czas
+obliczeń i czas trasy; A* dołącza pozycję łodzi jako nowy węzeł, więc czasy
+mogą się nieznacznie różnić). Podaje też rozmiar sesji przekazywanej do
+procesu obliczeniowego.
+
+Na koniec sprawdza poprawność naprawy: w losowych sekwencjach ruchów łodzi
+(wzdłuż trasy i skoki w dowolne miejsce siatki) i zmian wiatru (pojedyncze
+punkty pogodowe, wiatr silniejszy od ograniczenia heurystyki, zmiana całego
+pola) czas trasy po każdej naprawie musi być równy czasowi z algorytmu
+Dijkstry (dijkstra_path) na grafie sesji z łodzią dołączoną jako węzeł.
+
+Uruchomienie (z katalogu route-planning/app):
+    python -m benchmarks.bench_reroute
+"""
+import pickle
+import time
+
+import numpy as np
+from shapely.geometry import Point
+
+from app.core.graph import CSRGraph, dijkstra_path
+from app.core.grid import GridConfig, HexLatticeGenerator
+from app.core.obstacles import ObstacleIndex
+from app.core.reroute import RerouteSession
+from app.core.routing import DEFAULT_POLAR, RouteOptimizer
+from app.core.weather import WeatherData
+
+STEPS = 8
+STATIONS_CHANGED = 3
+MOVE_FRACTION = 0.4
+RESOLUTION_NM = 0.5
+SEED = 5
+RANDOM_SEQUENCES = 6
+RANDOM_STEPS = 10
+
+
+def main():
+    start, end = Point(18.45, 54.38), Point(18.9, 54.7)
+    bounds = {"west": 18.35, "east": 19.0, "south": 54.3, "north": 54.8}
+    rng = np.random.default_rng(SEED)
+    lons, lats = np.meshgrid(np.linspace(bounds["west"], bounds["east"], 10),
+                             np.linspace(bounds["south"], bounds["north"], 10))
+    lons, lats = lons.ravel(), lats.ravel()
+    speeds, directions = rng.uniform(6.0, 12.0, len(lons)), rng.uniform(240.0, 300.0, len(lons))
+    obstacle_index = ObstacleIndex([])
+
+    generator = HexLatticeGenerator(GridConfig(min_distance_nm=RESOLUTION_NM, grid_mode="hex"))
+    grid_points = generator.generate_route_grid(start, end, obstacle_index)
+    t0 = time.perf_counter()
+    session = RerouteSession.create(start, end, grid_points, obstacle_index,
+                                    WeatherData.from_arrays(lons, lats, speeds, directions), DEFAULT_POLAR)
+    print(f"węzły {session.search.graph.num_nodes}, krawędzie {session.search.graph.num_edges}, "
+          f"sesja: {time.perf_counter() - t0:.2f} s, {session.nbytes / 2 ** 20:.1f} MB "
+          f"(pickle {len(pickle.dumps(session)) / 2 ** 20:.1f} MB)")
+
+    print(f"{'krok':>4} | {'zmienione':>9} {'od nowa':>7} {'rozwinięte':>10} {'naprawa [s]':>11} {'czas [h]':>9} "
+          f"| {'A* [s]':>8} {'czas [h]':>9}")
+    for step in range(STEPS):
+        # Łódź przepływa część pierwszego odcinka bieżącej trasy
+        points, _, _ = session.route()
+        position = Point(points[0].x + MOVE_FRACTION * (points[1].x - points[0].x),
+                         points[0].y + MOVE_FRACTION * (points[1].y - points[0].y))
+        stations = rng.choice(np.unique(session.wind_stations), STATIONS_CHANGED, replace=False)
+        speeds, directions = speeds.copy(), directions.copy()
+        speeds[stations] = np.clip(speeds[stations] + rng.uniform(-3.0, 1.0, STATIONS_CHANGED), 0.5, None)
+        directions[stations] = (directions[stations] + rng.uniform(-30.0, 30.0, STATIONS_CHANGED)) % 360
+        weather_data = WeatherData.from_arrays(lons, lats, speeds, directions)
+
+        t0 = time.perf_counter()
+        statistics, changed, full_search = session.repair(position, weather_data)
+        _, repaired_time, _ = session.route()
+        repair_seconds = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        _, fresh_time = RouteOptimizer(DEFAULT_POLAR, backend="csr").find_optimal_route(
+            position, end, grid_points, obstacle_index, weather_data, generator.lattice
+        )
+        fresh_seconds = time.perf_counter() - t0
+        print(f"{step:>4} | {changed:>9} {'tak' if full_search else 'nie':>7} {statistics.nodes_expanded:>10} "
+              f"{repair_seconds:>11.4f} {repaired_time:>9.3f} | {fresh_seconds:>8.4f} {fresh_time:>9.3f}")
+
+    verify_random_sequences(start, end, grid_points, obstacle_index, lons, lats)
+
+
+def exact_time(session: RerouteSession) -> float:
+    """Czas trasy z pozycji łodzi z algorytmu Dijkstry na grafie sesji (łódź - dodatkowy węzeł)"""
+    graph = session.search.graph
+    nodes, times = RerouteSession._attach(graph, session.search.position, session.weather_data(),
+                                          session.polar, session.obstacle_index())
+    order = np.argsort(nodes)
+    boat_graph = CSRGraph(
+        lons=np.append(graph.lons, session.search.position[0]),
+        lats=np.append(graph.lats, session.search.position[1]),
+        indptr=np.append(graph.indptr, graph.indptr[-1] + len(nodes)),
+        indices=np.concatenate((graph.indices, nodes[order])),
+        distances=np.concatenate((graph.distances, np.zeros(len(nodes)))),
+        # Zerowy czas (łódź w węźle siatki) - minimalna waga, bo scipy pomija zera macierzy
+        times=np.concatenate((graph.times, np.maximum(times[order], 1e-12)))
+    )
+    return dijkstra_path(boat_graph, graph.num_nodes, session.search.goal).cost
+
+
+def verify_random_sequences(start: Point, end: Point, grid_points, obstacle_index, lons, lats):
+    """Porównuje naprawy D* Lite z algorytmem Dijkstry w losowych sekwencjach ruchów i zmian wiatru"""
+    rng = np.random.default_rng(SEED + 1)
+    repairs = full_searches = 0
+    for _ in range(RANDOM_SEQUENCES):
+        speeds, directions = rng.uniform(4.0, 10.0, len(lons)), rng.uniform(0.0, 360.0, len(lons))
+        session = RerouteSession.create(start, end, grid_points, obstacle_index,
+                                        WeatherData.from_arrays(lons, lats, speeds, directions), DEFAULT_POLAR)
+        for _ in range(RANDOM_STEPS):
+            kind = rng.integers(4)
+            position = None
+            if kind in (0, 1):
+                # Ruch wzdłuż trasy albo skok do losowego miejsca siatki
+                points, _, _ = session.route()
+                if kind == 0 and len(points) > 1:
+                    fraction = rng.uniform(0.0, 1.0)
+                    position = Point(points[0].x + fraction * (points[1].x - points[0].x),
+                                     points[0].y + fraction * (points[1].y - points[0].y))
+                else:
+                    node = grid_points[rng.integers(len(grid_points))]
+                    position = Point(node.x + rng.uniform(-0.002, 0.002), node.y + rng.uniform(-0.002, 0.002))
+
+            speeds, directions = speeds.copy(), directions.copy()
+            if kind == 2:
+                # Zmiana całego pola wiatru, czasem silniejszego od ograniczenia heurystyki
+                speeds = rng.uniform(4.0, 14.0, len(lons))
+                directions = rng.uniform(0.0, 360.0, len(lons))
+            elif kind != 0 or rng.random() < 0.5:
+                stations = rng.choice(len(lons), rng.integers(1, 6), replace=False)
+                speeds[stations] = np.clip(speeds[stations] + rng.uniform(-4.0, 4.0, len(stations)), 0.5, None)
+                directions[stations] = (directions[stations] + rng.uniform(-90.0, 90.0, len(stations))) % 360
+
+            _, _, full_search = session.repair(position, WeatherData.from_arrays(lons, lats, speeds, directions))
+            _, repaired_time, found = session.route()
+            reference = exact_time(session)
+            assert found and abs(repaired_time - reference) <= 1e-9 * max(reference, 1.0), (repaired_time, reference)
+            repairs += 1
+            full_searches += full_search
+
+    print(f"losowe sekwencje: {repairs} napraw ({full_searches} od nowa) - czasy zgodne z Dijkstrą")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark zagęszczania siatki w strefach zmiany wiatru
+
+Pole wiatru ma front: na zachód od FRONT_LON wieje słabiej i z innego
+kierunku niż na wschód od niego. Dla odcinków przecinających front porównuje
+siatkę jednorodną, wielorozdzielczą bez danych wiatru i wielorozdzielczą
+zagęszczaną według gradientu wiatru. Czasy tras porównywane są z trasą
+na gęstej siatce jednorodnej (REFERENCE_RESOLUTION_NM).
+
+Uruchomienie (z katalogu route-planning/app):
+    python -m benchmarks.bench_weather_grid
+"""
+import time
+
+import numpy as np
+from shapely.geometry import Point
+
+from app.core.grid import AdaptiveGridGenerator, GridConfig
+from app.core.obstacles import ObstacleIndex
+from app.core.routing import DEFAULT_POLAR, RouteOptimizer
+from app.core.weather import WeatherData, WeatherPoint, WindData
+from app.utils.geodesy import haversine_nm
+
+FRONT_LON = 18.66
+LEGS = [
+    ((18.45, 54.45), (18.85, 54.55)),
+    ((18.50, 54.60), (18.90, 54.40)),
+]
+RESOLUTION_NM = 0.5
+REFERENCE_RESOLUTION_NM = 0.25
+MARGIN_NM = 3.0
+
+
+def front_weather() -> WeatherData:
+    weather_data = WeatherData()
+    for lat in np.arange(54.30, 54.80, 0.05):
+        for lon in np.arange(18.30, 19.05, 0.05):
+            west = lon < FRONT_LON
+            wind = WindData(speed=6.0 if west else 9.0, direction=240.0 if west else 300.0)
+            weather_data.add_weather_point(WeatherPoint(lat=float(lat), lon=float(lon), wind=wind))
+    return weather_data
+
+
+def solve(config: GridConfig, start: Point, end: Point, weather_data, use_weather: bool):
+    obstacle_index = ObstacleIndex([])
+    t0 = time.perf_counter()
+    grid_points = AdaptiveGridGenerator(config).generate_route_grid(
+        start, end, obstacle_index, weather_data if use_weather else None
+    )
+    optimizer = RouteOptimizer(DEFAULT_POLAR, backend="csr")
+    _, total_time = optimizer.find_optimal_route(start, end, grid_points, obstacle_index, weather_data)
+    return len(grid_points), total_time, time.perf_counter() - t0
+
+
+def main():
+    weather_data = front_weather()
+    variants = [
+        ("jednorodna", GridConfig(min_distance_nm=RESOLUTION_NM, corridor_margin_nm=MARGIN_NM, seed=0), False),
+        ("adaptive", GridConfig(min_distance_nm=RESOLUTION_NM, corridor_margin_nm=MARGIN_NM, seed=0,
+                                grid_mode="adaptive"), False),
+        ("adaptive + wiatr", GridConfig(min_distance_nm=RESOLUTION_NM, corridor_margin_nm=MARGIN_NM, seed=0,
+                                        grid_mode="adaptive", wind_gradient_threshold=0.1), True),
+    ]
+
+    for (lon1, lat1), (lon2, lat2) in LEGS:
+        start, end = Point(lon1, lat1), Point(lon2, lat2)
+        reference = solve(GridConfig(min_distance_nm=REFERENCE_RESOLUTION_NM, corridor_margin_nm=MARGIN_NM, seed=0),
+                          start, end, weather_data, False)
+        length = float(haversine_nm(lon1, lat1, lon2, lat2))
+        print(f"Odcinek {length:.1f} NM - siatka wzorcowa {REFERENCE_RESOLUTION_NM} NM: "
+              f"{reference[0]} węzłów, czas trasy {reference[1]:.3f} h")
+        print(f"  {'wariant':<18} {'węzły':>7} {'czas trasy [h]':>15} {'Δ wzorzec':>10} {'obliczenie [s]':>15}")
+        for name, config, use_weather in variants:
+            nodes, total_time, elapsed = solve(config, start, end, weather_data, use_weather)
+            delta = (total_time - reference[1]) / reference[1] * 100
+            print(f"  {name:<18} {nodes:>7} {total_time:>15.3f} {delta:>+9.2f}% {elapsed:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()